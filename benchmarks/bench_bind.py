@@ -0,0 +1,55 @@
+"""
+Benchmark of binding many functions by input name: one bind call per binding against a single bind_many call.
+usage: python benchmarks/bench_bind.py [number of bindings]
+"""
+import sys
+import time
+from typing import Tuple
+from inputflow.flow_core import FixedInputListHandler
+
+
+class NamedInputHandler(FixedInputListHandler[Tuple[int, int, int], int, int]):
+    """
+    Handler resolving input names like GamepadHandler.make_input
+    """
+    INPUTS = {-1: "NULL"} | {i: f"input{i}" for i in range(20)}
+    DEFAULT_IDS = {i: 300 + i for i in range(20)}
+
+    def make_input(self, input_like: str | int) -> int:
+        if isinstance(input_like, int):
+            return input_like
+        try:
+            return getattr(self, input_like.upper())
+        except AttributeError as e:
+            raise ValueError(f"Unable to interpret '{input_like}' as an input") from e
+
+
+for i in range(20):
+    setattr(NamedInputHandler, f"INPUT{i}", i)
+
+
+def on_value(value: float = 0.0, scale: float = 1.0) -> None:
+    pass
+
+
+def main(n: int) -> None:
+    names = [f"input{i % 20}" for i in range(n)]
+
+    handler = NamedInputHandler(compiled_dispatch=True)
+    start = time.perf_counter()
+    for name in names:
+        handler.bind(name, on_value, "value", scale=2.0)
+    bind_time = time.perf_counter() - start
+
+    handler = NamedInputHandler(compiled_dispatch=True)
+    start = time.perf_counter()
+    handler.bind_many([(name, (on_value, "value", {"scale": 2.0})) for name in names])
+    bind_many_time = time.perf_counter() - start
+
+    print(f"{n} bindings")
+    print(f"    bind loop:  {bind_time * 1e3:8.2f} ms")
+    print(f"    bind_many:  {bind_many_time * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,52 @@
+"""
+Micro-benchmark of EventFuncWrapper calls: the previous implementation (shared kwargs dict mutated on every call)
+against the current one (call specialised at construction).
+usage: python benchmarks/bench_event_func_wrapper.py [number of calls]
+"""
+import sys
+import timeit
+from inputflow.flow_core import EventFuncWrapper, EventInfo
+
+
+class LegacyEventFuncWrapper:
+    def __init__(self, func, event_value_arg_name="", input_origin_arg_name="", **kwargs):
+        self.func = func
+        self.event_value_arg_name = event_value_arg_name
+        self.input_origin_arg_name = input_origin_arg_name
+        self.kwargs = kwargs
+        if event_value_arg_name:
+            self.kwargs[event_value_arg_name] = None
+
+    def __call__(self, event_info):
+        if self.event_value_arg_name:
+            self.kwargs[self.event_value_arg_name] = event_info.event_value
+        if self.input_origin_arg_name:
+            self.kwargs[self.input_origin_arg_name] = event_info.input
+        return self.func(**self.kwargs)
+
+
+def on_value(value=None, input_origin=None, scale=1.0):
+    pass
+
+
+CASES = {
+    "no arguments": ((), {}),
+    "value": (("value",), {}),
+    "value + input": (("value", "input_origin"), {}),
+    "value + kwargs": (("value",), {"scale": 2.0}),
+}
+
+
+def main(n: int) -> None:
+    event_info = EventInfo(input=3, event_value=0.5)
+    print(f"{'case':<20s}{'legacy calls/s':>18s}{'compiled calls/s':>18s}{'speedup':>10s}")
+    for name, (arg_names, kwargs) in CASES.items():
+        legacy = LegacyEventFuncWrapper(on_value, *arg_names, **dict(kwargs))
+        compiled = EventFuncWrapper(on_value, *arg_names, **dict(kwargs))
+        legacy_time = min(timeit.repeat(lambda: legacy(event_info), number=n, repeat=3))
+        compiled_time = min(timeit.repeat(lambda: compiled(event_info), number=n, repeat=3))
+        print(f"{name:<20s}{n/legacy_time:>18,.0f}{n/compiled_time:>18,.0f}{legacy_time/compiled_time:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,71 @@
+"""
+Benchmark of the import time of the package and of its modules, in fresh interpreters (like short-lived worker processes):
+the median wall time of "python -c 'import <module>'" minus the median time of an interpreter importing nothing.
+usage: python benchmarks/bench_import.py [number of runs] [-X importtime]
+    -X importtime: also print the 10 slowest imports of every module (from python -X importtime)
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = (
+    "inputflow",
+    "inputflow.flow_core",
+    "inputflow.sources",
+    "inputflow.routing",
+    "inputflow.gamepad",
+    "inputflow.keyboard",
+)
+
+
+def run_time(code: str, runs: int) -> float:
+    """
+    Median wall time of running code in a new interpreter, in seconds (None if it fails)
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            return None
+    return statistics.median(times)
+
+
+def slowest_imports(module: str, count: int = 10) -> list:
+    """
+    The (cumulative microseconds, module) of the slowest imports of a module, from python -X importtime
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main(runs: int, importtime: bool) -> None:
+    # the modules must be importable from the repository without installing the package
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.dirname(os.path.abspath(__file__))), os.environ.get("PYTHONPATH")]))
+    baseline = run_time("pass", runs)
+    print(f"interpreter startup: {baseline * 1e3:8.2f} ms (median of {runs} runs, subtracted below)")
+    for module in MODULES:
+        duration = run_time(f"import {module}", runs)
+        if duration is None:
+            print(f"    {module:24s}  import failed (missing dependency?)")
+            continue
+        loaded = run_time(f"import sys, {module}; sys.exit('pynput' in sys.modules or 'evdev' in sys.modules)", 1)
+        backends = "" if loaded is not None else "  (loads pynput or evdev)"
+        print(f"    {module:24s}  {(duration - baseline) * 1e3:8.2f} ms{backends}")
+        if importtime:
+            for cumulative, name in slowest_imports(module):
+                print(f"        {cumulative / 1e3:8.2f} ms  {name}")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg not in ("-X", "importtime")]
+    main(int(args[0]) if args else 20, "importtime" in sys.argv[1:])
@@ -0,0 +1,74 @@
+"""
+Benchmark of event streaming over localhost (see inputflow/net.py): a gamepad handler fed with synthetic axis events
+is served by an EventServer, a RemoteHandler reads the stream in another thread.
+Reports events/s delivered to the remote bindings and bytes/event on the wire, with and without delta encoding
+(the workload repeats values, like a stick held still on a device reporting at a fixed rate).
+usage: python benchmarks/bench_net.py [number of events]
+"""
+import asyncio
+import sys
+import threading
+import time
+from inputflow.gamepad import GamepadHandler
+from inputflow.net import EventServer, RemoteHandler
+from inputflow.sources import MemoryEventSource, SyntheticEvent
+
+EV_ABS = 3
+AXES = (0, 1, 3, 4)
+
+
+def make_events(n: int) -> list:
+    # every axis value is reported 4 times in a row
+    return [SyntheticEvent(0, 0, EV_ABS, AXES[i % 4], (i // 16) % 256 * 128) for i in range(n)]
+
+
+def run(loop: asyncio.AbstractEventLoop, n: int, delta: bool) -> None:
+    handler = GamepadHandler(source=MemoryEventSource(), compiled_dispatch=True)
+    server = EventServer(handler, port=0, delta=delta)
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+    remote = RemoteHandler("127.0.0.1", server.port, device=handler.device_id, compiled_dispatch=True)
+    received = [0]
+    done = threading.Event()
+    expected = [None]
+
+    def on_value(value: float) -> None:
+        received[0] += 1
+        if received[0] == expected[0]:
+            done.set()
+
+    for axis in ("LH", "LV", "RH", "RV"):
+        remote.bind(axis, on_value, "value")
+    reader = remote.background_loop()
+    events = make_events(n)
+
+    start = time.perf_counter()
+    handle_event = handler.handle_event
+    for event in events:
+        handle_event(event)
+    sent_at = time.perf_counter()
+    expected[0] = n - server.suppressed
+    if received[0] >= expected[0]:
+        done.set()
+    done.wait(60)
+    elapsed = time.perf_counter() - start
+
+    label = "delta" if delta else "full"
+    print(f"{label:6s} {n} events, {expected[0]} sent, {received[0]} received")
+    print(f"    produce:        {n / (sent_at - start):12.0f} events/s")
+    # events of the source handler per second, until the last of them reached the remote bindings
+    print(f"    end to end:     {n / elapsed:12.0f} events/s")
+    print(f"    wire:           {remote.received_bytes / n:12.2f} bytes/event ({remote.received_bytes} bytes)")
+    remote.close()
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    reader.join(1)
+
+
+def main(n: int) -> None:
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    for delta in (False, True):
+        run(loop, n, delta)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,204 @@
+"""
+Benchmarks of the event pipeline on synthetic events (no device needed), results printed as JSON.
+For every case: events/s, p50/p99 latency per event (including the timer overhead of about 50-100 ns),
+high-water mark of traced memory during the run and memory retained per event (tracemalloc),
+and number of garbage collections triggered during the throughput run.
+usage: python benchmarks/bench_pipeline.py [--events N] [--output results.json] [--filter name]
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any, Dict, List, Tuple
+from inputflow.flow_core import EventFuncWrapper, EventInfo, FixedInputListHandler, HandlerCore
+from inputflow.routing import RoutingGraph
+
+
+class SyntheticHandler(FixedInputListHandler[Tuple[int, int, int], int, int]):
+    """
+    Handler with the inputs of a gamepad, taking (type, code, value) tuples as events
+    """
+    INPUTS = {-1: "NULL"} | {i: f"input{i}" for i in range(20)}
+    DEFAULT_IDS = {i: 300 + i for i in range(20)}
+
+    def get_event_id(self, event: Tuple[int, int, int]) -> int:
+        return event[1]
+
+    def get_event_raw_value(self, event: Tuple[int, int, int]) -> float:
+        return event[2]
+
+
+def make_events(n: int) -> List[Tuple[int, int, int]]:
+    return [(3, 300 + i % 20, i % 256) for i in range(n)]
+
+
+def noop(value: float = 0.0, input: Any = None) -> None:
+    pass
+
+
+def measure(name: str, func: Callable[[Any], Any], args: List[Any], latency_samples: int = 10_000) -> Dict[str, Any]:
+    n = len(args)
+    for arg in args[:1000]:
+        func(arg)
+
+    collections = sum(stats["collections"] for stats in gc.get_stats())
+    start = time.perf_counter_ns()
+    for arg in args:
+        func(arg)
+    elapsed = time.perf_counter_ns() - start
+    collections = sum(stats["collections"] for stats in gc.get_stats()) - collections
+
+    samples = args[:latency_samples]
+    perf_counter_ns = time.perf_counter_ns
+    latencies = []
+    for arg in samples:
+        t0 = perf_counter_ns()
+        func(arg)
+        latencies.append(perf_counter_ns() - t0)
+    latencies.sort()
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for arg in samples:
+        func(arg)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "name": name,
+        "events": n,
+        "events_per_sec": n / (elapsed / 1e9),
+        "p50_ns": latencies[len(latencies) // 2],
+        "p99_ns": latencies[int(len(latencies) * 0.99)],
+        "tracemalloc_peak_bytes": peak - baseline,
+        "retained_bytes_per_event": (current - baseline) / len(samples),
+        "gc_collections": collections,
+    }
+
+
+def bench_handle_event(n: int) -> List[Dict[str, Any]]:
+    results = []
+    events = make_events(n)
+    for compiled in (False, True):
+        handler = SyntheticHandler(compiled_dispatch=compiled)
+        handler.bind_all(noop, "value", "input")
+        mode = "compiled" if compiled else "interpreted"
+        results.append(measure(f"handle_event[{mode}, bind_all]", handler.handle_event, events))
+    return results
+
+
+def bench_event_info(n: int) -> List[Dict[str, Any]]:
+    results = []
+    events = make_events(n)
+    for mode in ("new", "frozen", "pooled"):
+        handler = SyntheticHandler(compiled_dispatch=True, event_info=mode)
+        handler.bind_all(noop, "value", "input")
+        results.append(measure(f"handle_event[compiled, event_info={mode}]", handler.handle_event, events))
+    return results
+
+
+def bench_find_input(n: int) -> List[Dict[str, Any]]:
+    results = []
+    ids = [300 + i % 20 for i in range(n)]
+    for fast in (True, False):
+        handler = SyntheticHandler()
+        handler.fast_id_finding = fast
+        results.append(measure(f"find_input[{'fast' if fast else 'slow'}]", handler.find_input, ids))
+    return results
+
+
+def bench_event_func_wrapper(n: int) -> List[Dict[str, Any]]:
+    event_infos = [EventInfo(i % 20, 0.5) for i in range(n)]
+    return [
+        measure("EventFuncWrapper[no arguments]", EventFuncWrapper(noop), event_infos),
+        measure("EventFuncWrapper[value]", EventFuncWrapper(noop, "value"), event_infos),
+        measure("EventFuncWrapper[value, input]", EventFuncWrapper(noop, "value", "input"), event_infos),
+    ]
+
+
+def bench_emit_signal(n: int) -> List[Dict[str, Any]]:
+    results = []
+    event_infos = [EventInfo(0, 0.5) for _ in range(n)]
+    for bindings in (0, 1, 10, 100):
+        handler = SyntheticHandler()
+        for _ in range(bindings):
+            handler.bind(0, noop, "value")
+        results.append(measure(f"emit_signal[{bindings} bindings]", handler.emit_signal, event_infos[:max(n // max(bindings, 1), 1000)]))
+    return results
+
+
+def bench_connect_events(n: int) -> List[Dict[str, Any]]:
+    results = []
+    events = [(3, 300, i % 256) for i in range(n)]
+    for length in (1, 4, 16):
+        handlers = [SyntheticHandler() for _ in range(length + 1)]
+        for src, target in zip(handlers, handlers[1:]):
+            HandlerCore.connect_events(src, 0, target, 0)
+        handlers[-1].bind(0, noop, "value")
+        results.append(measure(f"connect_events[chain of {length}]", handlers[0].handle_event, events[:max(n // length, 1000)]))
+    return results
+
+
+def bench_routing(n: int) -> List[Dict[str, Any]]:
+    results = []
+    events = [(3, 300 + i % 2, i % 256) for i in range(n)]
+    for connections in (10, 100):
+        src, target = SyntheticHandler(), SyntheticHandler()
+        for i in range(connections):
+            HandlerCore.connect_events(src, i % 2, target, i % 20)
+        results.append(measure(f"routing[connect_events, {connections} connections]", src.handle_event, events[:max(n // connections, 1000)]))
+
+        src, target = SyntheticHandler(), SyntheticHandler()
+        graph = RoutingGraph()
+        graph.source("s0", src, 0)
+        graph.source("s1", src, 1)
+        for i in range(connections):
+            graph.sink(f"k{i}", f"s{i % 2}", target, i % 20)
+        graph.attach()
+        results.append(measure(f"routing[RoutingGraph, {connections} connections]", src.handle_event, events[:max(n // connections, 1000)]))
+    return results
+
+
+BENCHMARKS = {
+    "handle_event": bench_handle_event,
+    "event_info": bench_event_info,
+    "find_input": bench_find_input,
+    "event_func_wrapper": bench_event_func_wrapper,
+    "emit_signal": bench_emit_signal,
+    "connect_events": bench_connect_events,
+    "routing": bench_routing,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000, help="number of events per case")
+    parser.add_argument("--output", help="file to write the results to (stdout by default)")
+    parser.add_argument("--filter", default="", help="only run the benchmarks whose name contains this string")
+    args = parser.parse_args()
+
+    results = []
+    for name, bench in BENCHMARKS.items():
+        if args.filter in name:
+            results.extend(bench(args.events))
+    report = {
+        "python": sys.version,
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of the shared-memory ring of the process reader (see inputflow/ring.py): a child process writes batches of records
+stamped with the monotonic clock, the main process drains them while running a CPU-heavy callback per batch,
+and reports the throughput and the delay from writing a record to reading it.
+usage: python benchmarks/bench_ring.py [number of records] [batch size]
+"""
+import multiprocessing
+import os
+import select
+import sys
+import time
+from inputflow.ring import EventRing, _notify
+
+
+def writer(name: str, notify, records: int, batch: int) -> None:
+    ring = EventRing.attach(name)
+    fd = notify.fileno()
+    os.set_blocking(fd, False)
+    for start in range(0, records, batch):
+        now = time.monotonic_ns()
+        ring.write_many([(now, 0.5, i % 20) for i in range(start, min(start + batch, records))])
+        _notify(fd)
+        # a device gives a frame every millisecond or so
+        time.sleep(0.0002)
+    ring.close()
+
+
+def busy(iterations: int = 2000) -> int:
+    total = 0
+    for i in range(iterations):
+        total += i * i
+    return total
+
+
+def percentile(values: list, p: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main(records: int, batch: int) -> None:
+    context = multiprocessing.get_context("spawn")
+    ring = EventRing(4096)
+    notify_reader, notify_writer = context.Pipe(duplex=False)
+    process = context.Process(target=writer, args=(ring.name, notify_writer, records, batch), daemon=True)
+    process.start()
+    notify_writer.close()
+    delays = []
+    start = None
+    while len(delays) + ring.dropped < records:
+        batch_records = ring.read()
+        if not batch_records:
+            if select.select([notify_reader.fileno()], [], [], 1.0)[0]:
+                os.read(notify_reader.fileno(), 4096)
+            elif not process.is_alive():
+                break
+            continue
+        now = time.monotonic_ns()
+        if start is None:
+            start = time.perf_counter()
+        delays.extend(now - timestamp_ns for timestamp_ns, _, _ in batch_records)
+        busy()
+    elapsed = time.perf_counter() - start
+    process.join()
+    delays.sort()
+    print(f"{len(delays)} records in batches of {batch}, {ring.dropped} dropped")
+    print(f"    throughput:     {len(delays) / elapsed:12.0f} records/s")
+    print(f"    delay p50:      {percentile(delays, 0.5) / 1e3:12.1f} us")
+    print(f"    delay p99:      {percentile(delays, 0.99) / 1e3:12.1f} us")
+    notify_reader.close()
+    ring.close()
+    ring.unlink()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+    )
@@ -0,0 +1,55 @@
+"""
+Load test of a gamepad handler fed by a MemoryEventSource (no device needed): a producer thread pushes synthetic
+frames of stick and button events while the handler reads them in its background loop and runs its bindings.
+usage: python benchmarks/bench_source.py [number of frames]
+"""
+import sys
+import threading
+import time
+from inputflow.gamepad import GamepadHandler
+from inputflow.sources import MemoryEventSource, SyntheticEvent
+
+EV_SYN, EV_KEY, EV_ABS = 0, 1, 3
+
+
+def make_frame(i: int) -> list:
+    sec, usec = divmod(i * 8000, 1_000_000)
+    return [
+        SyntheticEvent(sec, usec, EV_ABS, 0, i % 65536 - 32768),
+        SyntheticEvent(sec, usec, EV_ABS, 1, 32767 - i % 65536),
+        SyntheticEvent(sec, usec, EV_KEY, 304, i % 2),
+        SyntheticEvent(sec, usec, EV_SYN, 0, 0),
+    ]
+
+
+def main(frames: int) -> None:
+    source = MemoryEventSource(maxsize=100_000)
+    handler = GamepadHandler(source=source, compiled_dispatch=True, LH_amplitude=32768, LV_amplitude=-32768)
+    counts = {"values": 0}
+
+    def on_value(value: float) -> None:
+        counts["values"] += 1
+
+    for input in ("LH", "LV", "cross"):
+        handler.bind(input, on_value, "value")
+
+    batches = [make_frame(i) for i in range(1000)]
+    start = time.perf_counter()
+    reader = handler.background_loop()
+
+    def produce() -> None:
+        for i in range(frames):
+            source.push_many(batches[i % 1000])
+        source.close()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    producer.join()
+    reader.join()
+    elapsed = time.perf_counter() - start
+    events = frames * 4
+    print(f"{events} events in {elapsed:.2f} s: {events / elapsed:,.0f} events/s, {counts['values']} binded calls")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 250_000)
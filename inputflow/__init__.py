@@ -1,2 +1,41 @@
-from . import keyboard
-from . import gamepad
\ No newline at end of file
+"""
+The submodules are imported on first access (inputflow.gamepad, inputflow.keyboard...), so that importing the package
+doesn't load the dependencies of every backend: a gamepad-only process never imports pynput, and a keyboard-only one never imports evdev.
+The dependencies of the backends are optional (pip install inputflow[gamepad], inputflow[keyboard] or inputflow[all]).
+"""
+import importlib
+
+
+# no typing import here, it is most of the import time of the package
+SUBMODULES = (
+    "aio",
+    "calibration",
+    "chords",
+    "executors",
+    "filters",
+    "flow_core",
+    "gamepad",
+    "hotplug",
+    "hub",
+    "instrumentation",
+    "keyboard",
+    "merge",
+    "net",
+    "profiles",
+    "recording",
+    "ring",
+    "routing",
+    "sources",
+    "state",
+)
+
+
+def __getattr__(name: str):
+    if name in SUBMODULES:
+        # import_module also sets the attribute on the package, so this runs once per submodule
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(SUBMODULES))
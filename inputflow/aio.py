@@ -0,0 +1,211 @@
+from __future__ import annotations
+import asyncio
+import collections
+import concurrent.futures
+from typing import Any, Deque, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .flow_core import HandlerCore, EventInfo
+
+
+class EventStream:
+    """
+    Async iterator over the events of a handler:
+        async for event_info in handler.events():
+            ...
+    Events are received through HandlerCore.subscribe, from the threads of the handler (pynput listener, background_loop...)
+    or from the event loop itself, and kept in a bounded queue.
+    When the queue is full, policy "drop_oldest" drops the oldest event while "block" makes the producer wait.
+    A producer running on the event loop itself cannot wait, its events are then held back until the consumer catches up.
+    """
+    POLICIES = ("drop_oldest", "block")
+    # how often (seconds) a blocked producer checks that the stream and its loop are still there
+    BLOCK_CHECK_INTERVAL = 0.1
+
+    def __init__(self, handler: HandlerCore, maxsize: int = 1024, policy: str = "drop_oldest", loop: asyncio.AbstractEventLoop = None):
+        """
+        :param handler: the handler to get the events from
+        :param maxsize: size of the queue
+        :param policy: "drop_oldest" or "block"
+        :param loop: the event loop of the consumer (by default the running loop)
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', must be one of {self.POLICIES}")
+        self.handler = handler
+        self.policy = policy
+        self.loop = loop if loop is not None else asyncio.get_running_loop()
+        self.queue : asyncio.Queue = asyncio.Queue(maxsize)
+        # events produced on the event loop while the queue was full (policy "block")
+        self._held_back : Deque[EventInfo] = collections.deque()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        # puts of blocked producers (policy "block"), cancelled on close
+        self._pending_puts : Set[concurrent.futures.Future] = set()
+        self.dropped = 0
+        self.closed = False
+        handler.subscribe(self._on_event)
+
+    def _on_event(self, event_info: EventInfo) -> None:
+        event_info = event_info.retained()
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self.loop:
+            self._push(event_info)
+        elif self.policy == "block":
+            self._put_blocking(event_info)
+        else:
+            self.loop.call_soon_threadsafe(self._push, event_info)
+
+    def _put_blocking(self, event_info: EventInfo) -> None:
+        """
+        Wait for room in the queue, from a producer thread. Gives up (and counts the event as dropped)
+        when the stream is closed or its loop stops
+        """
+        if self.closed:
+            return
+        try:
+            future = asyncio.run_coroutine_threadsafe(self.queue.put(event_info), self.loop)
+        except RuntimeError:
+            # the loop is closed
+            self.dropped += 1
+            return
+        self._pending_puts.add(future)
+        try:
+            while True:
+                try:
+                    future.result(self.BLOCK_CHECK_INTERVAL)
+                    return
+                except concurrent.futures.TimeoutError:
+                    if self.closed or not self.loop.is_running():
+                        future.cancel()
+                        self.dropped += 1
+                        return
+                except concurrent.futures.CancelledError:
+                    self.dropped += 1
+                    return
+        finally:
+            self._pending_puts.discard(future)
+
+    def _push(self, event_info: Any) -> None:
+        """
+        Add an event to the queue, from the event loop
+        """
+        if self.policy == "block":
+            if self._held_back or self.queue.full():
+                self._held_back.append(event_info)
+                self._drained.clear()
+            else:
+                self.queue.put_nowait(event_info)
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event_info)
+
+    def __aiter__(self) -> EventStream:
+        return self
+
+    async def __anext__(self) -> EventInfo:
+        if self.closed and self.queue.empty():
+            raise StopAsyncIteration
+        event_info = await self.queue.get()
+        if self._held_back:
+            self.queue.put_nowait(self._held_back.popleft())
+            if not self._held_back:
+                self._drained.set()
+        if event_info is None:
+            raise StopAsyncIteration
+        return event_info
+
+    async def __aenter__(self) -> EventStream:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Stop receiving events, the iteration ends once the queued events are consumed
+        """
+        self._finish()
+
+    def _finish(self) -> None:
+        """
+        aclose from the event loop, without waiting: queue the end of the iteration after the events already queued
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.handler.unsubscribe(self._on_event)
+        for future in list(self._pending_puts):
+            future.cancel()
+        self._held_back.append(None)
+        if not self.queue.full():
+            self.queue.put_nowait(self._held_back.popleft())
+
+
+class DeviceEventStream(EventStream):
+    """
+    EventStream that also reads the device of the handler on the event loop, for devices that support it
+    (evdev.InputDevice.async_read_loop), so that no thread is needed.
+    The events go through handle_event as usual, so binded functions are still called.
+    With policy "block", reading pauses while the queue is full.
+    When reading fails (the device is unplugged), the iteration ends with the error once the queued events are consumed.
+    """
+
+    def __init__(self, handler: HandlerCore, maxsize: int = 1024, policy: str = "drop_oldest", loop: asyncio.AbstractEventLoop = None):
+        super().__init__(handler, maxsize, policy, loop)
+        # the error that stopped the reader
+        self.error : BaseException = None
+        # emits the values held back by the change filters when no other event comes
+        self._flush_handle : asyncio.TimerHandle = None
+        self.reader = self.loop.create_task(self._read())
+        self.reader.add_done_callback(self._on_reader_done)
+
+    def _on_reader_done(self, reader: asyncio.Task) -> None:
+        if reader.cancelled():
+            return
+        self.error = reader.exception()
+        # wakes up a consumer waiting for the next event
+        self._finish()
+
+    async def _read(self) -> None:
+        handler = self.handler
+        async for event in handler.device.async_read_loop():
+            handler.handle_event(event)
+            self._schedule_flush(handler.flush_change_filters())
+            await self._drained.wait()
+
+    def _schedule_flush(self, delay: float) -> None:
+        """
+        Flush the change filters of the handler in delay seconds, unless it is already scheduled sooner
+        """
+        if delay is None:
+            return
+        when = self.loop.time() + delay
+        if self._flush_handle is not None:
+            if self._flush_handle.when() <= when:
+                return
+            self._flush_handle.cancel()
+        self._flush_handle = self.loop.call_at(when, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        self._schedule_flush(self.handler.flush_change_filters())
+
+    async def __anext__(self) -> EventInfo:
+        try:
+            return await super().__anext__()
+        except StopAsyncIteration:
+            if self.error is not None:
+                raise self.error from None
+            raise
+
+    async def aclose(self) -> None:
+        self.reader.cancel()
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await super().aclose()
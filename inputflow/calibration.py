@@ -0,0 +1,268 @@
+"""
+Vectorised calibration of analog axes with numpy, for whole frames or recorded batches of raw values:
+offset and amplitude, per-axis epsilon, radial deadzones for pairs of axes (sticks), response curves and clamping.
+"""
+from __future__ import annotations
+import math
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+DEADZONE_MODES = ("radial", "scaled_radial")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("inputflow.calibration requires numpy")
+
+
+def power_curve(exponent: float) -> Callable[[Any], Any]:
+    """
+    Response curve |x|**exponent keeping the sign of x
+    """
+    return lambda values: np.sign(values) * np.abs(values) ** exponent
+
+
+def table_curve(xs: Iterable[float], ys: Iterable[float]) -> Callable[[Any], Any]:
+    """
+    Response curve given by a lookup table of points (xs must be increasing), linearly interpolated
+    """
+    _require_numpy()
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    return lambda values: np.interp(values, xs, ys)
+
+
+@dataclass
+class AxisCalibration:
+    """
+    Calibration of one axis: value = clamp(curve(smoothen((raw - offset) / amplitude)))
+    raw_range is the (min, max) of the raw values of the axis, for its lookup table (offset ± |amplitude| by default)
+    """
+    offset: float = 0.0
+    amplitude: float = 1.0
+    epsilon: float = 0.0
+    curve: Callable[[Any], Any] = None
+    clamp: Tuple[float, float] = (-1.0, 1.0)
+    raw_range: Tuple[int, int] = None
+
+
+class Calibrator:
+    """
+    Calibration of the analog axes of a handler, working on numpy arrays:
+        calibrator = Calibrator.from_handler(gamepad_handler, deadzone=0.1)
+        values = calibrator.calibrate_batch(inputs, raw_values)
+    Pairs of axes (sticks) get a radial deadzone on the vector (horizontal, vertical):
+    "radial" zeroes the vector when its norm is below the deadzone,
+    "scaled_radial" also rescales the norm from [deadzone, 1] to [0, 1] so that there is no jump at the edge of the deadzone.
+    """
+
+    def __init__(
+            self,
+            axes: Dict[Any, AxisCalibration],
+            sticks: Iterable[Tuple[Any, Any]] = (),
+            deadzone: float = 0.0,
+            deadzone_mode: str = "scaled_radial"
+        ):
+        """
+        :param axes: calibration of every axis, by input
+        :param sticks: pairs of inputs (horizontal, vertical) getting a radial deadzone
+        :param deadzone: radius of the radial deadzone, in calibrated units
+        :param deadzone_mode: "radial" or "scaled_radial"
+        """
+        _require_numpy()
+        if deadzone_mode not in DEADZONE_MODES:
+            raise ValueError(f"Unknown deadzone mode '{deadzone_mode}', must be one of {DEADZONE_MODES}")
+        self.axes = axes
+        self.sticks = tuple(sticks) if deadzone > 0 else ()
+        self.deadzone = deadzone
+        self.deadzone_mode = deadzone_mode
+        self._stick_axes = {input for stick in self.sticks for input in stick}
+        self._luts : Dict[Any, Tuple[int, Any]] = {}
+
+    @classmethod
+    def from_handler(cls, handler: Any, inputs: Iterable[Any] = None, **kwargs) -> Calibrator:
+        """
+        Use the offsets, amplitudes and epsilons of a handler (and its STICKS if no sticks are given).
+        :param inputs: the axes to calibrate (by default the ANALOG_TRIGGERS of the handler)
+        :param kwargs: see __init__
+        """
+        if inputs is None:
+            inputs = handler.ANALOG_TRIGGERS
+        axes = {
+            input: AxisCalibration(
+                offset=handler.get_input_offset(input),
+                amplitude=handler.get_input_amplitude(input),
+                epsilon=handler.get_input_epsilon(input),
+            )
+            for input in inputs
+        }
+        kwargs.setdefault("sticks", getattr(handler, "STICKS", ()))
+        return cls(axes, **kwargs)
+
+    def normalize(self, input: Any, raw_values: Any) -> Any:
+        """
+        Offset, amplitude and epsilon of one axis
+        """
+        axis = self.axes[input]
+        values = (np.asarray(raw_values, dtype=np.float64) - axis.offset) / axis.amplitude
+        if axis.epsilon:
+            values = np.where(np.abs(values) < axis.epsilon, 0.0, values)
+        return values
+
+    def shape(self, input: Any, values: Any) -> Any:
+        """
+        Curve and clamping of one axis
+        """
+        axis = self.axes[input]
+        if axis.curve is not None:
+            values = axis.curve(values)
+        if axis.clamp is not None:
+            values = np.clip(values, *axis.clamp)
+        return values
+
+    def apply_deadzone(self, x: Any, y: Any) -> Tuple[Any, Any]:
+        """
+        Radial deadzone on normalized stick values
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        norm = np.hypot(x, y)
+        inside = norm < self.deadzone
+        if self.deadzone_mode == "radial":
+            return np.where(inside, 0.0, x), np.where(inside, 0.0, y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.where(inside, 0.0, (norm - self.deadzone) / ((1.0 - self.deadzone) * norm))
+        return x * scale, y * scale
+
+    def calibrate(self, input: Any, raw_values: Any) -> Any:
+        """
+        Calibrate values of a single axis (no radial deadzone since the other axis of the stick is unknown)
+        """
+        return self.shape(input, self.normalize(input, raw_values))
+
+    def shape_frame(self, frame: Dict[Any, float], state: Dict[Any, float] = None) -> Dict[Any, float]:
+        """
+        Deadzones, curves and clamping of a frame of normalized values, such as the frames given to HandlerCore.bind_frame
+        :param state: last normalized values of the axes, used for the other axis of a stick when only one of them is in the frame (updated)
+        """
+        if state is None:
+            state = {}
+        state.update(frame)
+        result = dict(frame)
+        for h, v in self.sticks:
+            if h in frame or v in frame:
+                x, y = self.apply_deadzone(state.get(h, 0.0), state.get(v, 0.0))
+                if h in frame:
+                    result[h] = float(x)
+                if v in frame:
+                    result[v] = float(y)
+        for input, value in result.items():
+            if input in self.axes:
+                result[input] = float(self.shape(input, value))
+        return result
+
+    def calibrate_frame(self, raw_frame: Dict[Any, float], state: Dict[Any, float] = None) -> Dict[Any, float]:
+        """
+        Calibrate a frame of raw values {input: raw value}, inputs without calibration are kept as is
+        """
+        normalized = {
+            input: float(self.normalize(input, raw)) if input in self.axes else raw
+            for input, raw in raw_frame.items()
+        }
+        return self.shape_frame(normalized, state)
+
+    def lut_range(self, input: Any) -> Tuple[int, int]:
+        """
+        Raw values covered by the lookup table of an axis: its raw_range, or offset ± |amplitude|
+        """
+        axis = self.axes[input]
+        if axis.raw_range is not None:
+            return axis.raw_range
+        return math.floor(axis.offset - abs(axis.amplitude)), math.ceil(axis.offset + abs(axis.amplitude))
+
+    def _calibrate_raw(self, input: Any, raw_values: Any) -> Any:
+        """
+        What the lookup table of an axis gives for raw values (no radial deadzone nor shaping for the axes of sticks)
+        """
+        values = self.normalize(input, raw_values)
+        if input not in self._stick_axes:
+            values = self.shape(input, values)
+        return values
+
+    def build_lut(self, input: Any, low: int = None, high: int = None) -> Any:
+        """
+        Precompute the calibrated value of every raw value in [low, high] (the radial deadzone and what follows it
+        are not included for the axes of sticks), so that calibrating is a single indexing operation: lut[raw - low]
+        :param low, high: the raw values to cover (by default see lut_range)
+        """
+        if low is None or high is None:
+            low, high = self.lut_range(input)
+        values = self._calibrate_raw(input, np.arange(low, high + 1))
+        self._luts[input] = (low, values)
+        return values
+
+    def calibrate_batch(self, inputs: Any, raw_values: Any, low: int = None, high: int = None) -> Any:
+        """
+        Calibrate a batch of events, for instance a recorded log (see recording.EventLog.as_numpy).
+        Values of the axes are looked up in per-axis tables built on first use (see build_lut),
+        the radial deadzone of a stick uses the last value of its other axis at the time of each event (centered before its first event).
+        Events of inputs without calibration are returned unchanged.
+        :param inputs: array of inputs
+        :param raw_values: array of integer raw values, values outside the table of their axis are calibrated without it
+        :param low, high: the raw values covered by the tables of all the axes (by default the lut_range of each axis)
+        :return: array of calibrated values
+        """
+        inputs = np.asarray(inputs)
+        raw_values = np.asarray(raw_values)
+        values = raw_values.astype(np.float64)
+        masks = {}
+        for input in self.axes:
+            mask = inputs == input
+            if not mask.any():
+                continue
+            masks[input] = mask
+            table_low, table_high = (low, high) if low is not None and high is not None else self.lut_range(input)
+            lut_low, lut = self._luts.get(input, (None, None))
+            if lut is None or lut_low != table_low or len(lut) != table_high - table_low + 1:
+                lut = self.build_lut(input, table_low, table_high)
+            raw = raw_values[mask]
+            indices = raw.astype(np.int64) - table_low
+            inside = (indices >= 0) & (indices < len(lut))
+            if inside.all():
+                values[mask] = lut[indices]
+            else:
+                # no wrapping around the table for values out of range
+                calibrated = self._calibrate_raw(input, raw)
+                calibrated[inside] = lut[indices[inside]]
+                values[mask] = calibrated
+
+        for h, v in self.sticks:
+            h_mask = masks.get(h)
+            v_mask = masks.get(v)
+            if h_mask is None and v_mask is None:
+                continue
+            x = _forward_fill(values, h_mask)
+            y = _forward_fill(values, v_mask)
+            x, y = self.apply_deadzone(x, y)
+            for input, mask, shaped in ((h, h_mask, x), (v, v_mask, y)):
+                if mask is not None:
+                    values[mask] = self.shape(input, shaped[mask])
+        return values
+
+
+def _forward_fill(values: Any, mask: Any) -> Any:
+    """
+    For every position, the last value at a position where mask is true (0 before the first one)
+    """
+    if mask is None:
+        return np.zeros(len(values))
+    positions = np.where(mask, np.arange(len(values)), -1)
+    np.maximum.accumulate(positions, out=positions)
+    return np.where(positions >= 0, values[positions], 0.0)
@@ -0,0 +1,268 @@
+"""
+Key state and chord matching for keyboards (see KeyboardHandler.bind_chord):
+keys are interned into small integer slots, the state of all keys is a bitmap over these slots,
+and chords ("ctrl+shift+k") and sequences of chords ("ctrl+k ctrl+c") are stored in a trie keyed by (modifiers, key slot),
+so that matching a key event is a couple of dict lookups whatever the number of bindings.
+Keys are named by their lowercase character ("k", "1") or by their pynput name ("f5", "space", "ctrl_l").
+"""
+from __future__ import annotations
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Dict, List, Tuple
+
+
+# bits of the modifier mask
+MODIFIERS = {"ctrl": 1, "shift": 2, "alt": 4, "cmd": 8}
+# key names of the modifiers (left and right keys count as the same modifier)
+MODIFIER_KEYS = {
+    "ctrl": "ctrl", "ctrl_l": "ctrl", "ctrl_r": "ctrl", "control": "ctrl",
+    "shift": "shift", "shift_l": "shift", "shift_r": "shift",
+    "alt": "alt", "alt_l": "alt", "alt_r": "alt", "alt_gr": "alt",
+    "cmd": "cmd", "cmd_l": "cmd", "cmd_r": "cmd", "super": "cmd", "win": "cmd", "meta": "cmd",
+}
+# names that can't be written in a chord as they are
+KEY_ALIASES = {"plus": "+", "return": "enter", "escape": "esc"}
+
+ChordStep = Tuple[int, int]
+
+
+def canonical_key_name(name: str) -> str:
+    name = name.strip().lower()
+    return KEY_ALIASES.get(name, name)
+
+
+class KeyState:
+    """
+    Pressed keys as a bitmap over interned key slots, and mask of the modifiers held
+    """
+
+    def __init__(self):
+        self.slots : Dict[str, int] = {}
+        self.names : List[str] = []
+        self.pressed = 0
+        self.modifiers = 0
+        # modifier bit of the slots of modifier keys
+        self._modifier_slots : Dict[int, int] = {}
+
+    def slot(self, name: str) -> int:
+        """
+        Slot of a key, given on first use
+        """
+        name = canonical_key_name(name)
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+            modifier = MODIFIER_KEYS.get(name)
+            if modifier is not None:
+                self._modifier_slots[slot] = MODIFIERS[modifier]
+        return slot
+
+    def is_modifier(self, slot: int) -> bool:
+        return slot in self._modifier_slots
+
+    def press(self, slot: int) -> bool:
+        """
+        :return: False if the key was already pressed (auto-repeat)
+        """
+        bit = 1 << slot
+        if self.pressed & bit:
+            return False
+        self.pressed |= bit
+        if slot in self._modifier_slots:
+            self._update_modifiers()
+        return True
+
+    def release(self, slot: int) -> None:
+        self.pressed &= ~(1 << slot)
+        if slot in self._modifier_slots:
+            self._update_modifiers()
+
+    def _update_modifiers(self) -> None:
+        pressed = self.pressed
+        modifiers = 0
+        for slot, bit in self._modifier_slots.items():
+            if pressed >> slot & 1:
+                modifiers |= bit
+        self.modifiers = modifiers
+
+    def is_pressed(self, name: str) -> bool:
+        """
+        :param name: a key name, or a modifier ("ctrl" is pressed if either control key is)
+        """
+        name = canonical_key_name(name)
+        if name in MODIFIERS:
+            return bool(self.modifiers & MODIFIERS[name])
+        slot = self.slots.get(name)
+        return slot is not None and bool(self.pressed >> slot & 1)
+
+    def reset(self) -> None:
+        self.pressed = 0
+        self.modifiers = 0
+
+
+def parse_chord(text: str, key_state: KeyState) -> ChordStep:
+    """
+    "ctrl+shift+k" -> (modifier mask, slot of k)
+    """
+    text = text.strip()
+    # "+" itself may be the key: "ctrl++"
+    parts = text[:-2].split("+") + ["+"] if text.endswith("++") else text.split("+")
+    *modifiers, key = [part.strip() for part in parts]
+    mask = 0
+    for modifier in modifiers:
+        name = MODIFIER_KEYS.get(canonical_key_name(modifier))
+        if name is None:
+            raise ValueError(f"Invalid chord '{text}': '{modifier}' is not a modifier ({', '.join(MODIFIERS)})")
+        mask |= MODIFIERS[name]
+    if not key or canonical_key_name(key) in MODIFIER_KEYS:
+        raise ValueError(f"Invalid chord '{text}': it must end with a key that is not a modifier")
+    return mask, key_state.slot(key)
+
+
+def parse_sequence(text: str, key_state: KeyState) -> Tuple[ChordStep, ...]:
+    """
+    "ctrl+k ctrl+c" -> the steps of the two chords
+    """
+    steps = tuple(parse_chord(chord, key_state) for chord in text.split())
+    if not steps:
+        raise ValueError("Empty chord sequence")
+    return steps
+
+
+class _TrieNode:
+    __slots__ = ("children", "funcs")
+
+    def __init__(self):
+        self.children : Dict[ChordStep, _TrieNode] = {}
+        self.funcs : List[Callable[[], Any]] = []
+
+
+class ChordMatcher:
+    """
+    Calls the functions binded to chords and sequences of chords, fed with the key presses and releases.
+    A chord matches when its key is pressed while exactly its modifiers are held.
+    The chords of a sequence must follow each other within timeout seconds, other keys break the sequence.
+    When a sequence is also the beginning of a longer one ("ctrl+k" and "ctrl+k ctrl+c"), its functions are called
+    once the longer one can't match anymore: on another key, or after timeout seconds (from a timer thread).
+    """
+
+    def __init__(self, timeout: float = 1.0, key_state: KeyState = None):
+        """
+        :param timeout: maximum delay between the chords of a sequence, in seconds
+        :param key_state: the key state to use (a new one by default)
+        """
+        self.timeout = timeout
+        self.key_state = key_state if key_state is not None else KeyState()
+        self.root = _TrieNode()
+        self._node = self.root
+        self._deadline = 0.0
+        self._timer : threading.Timer = None
+        self._lock = threading.Lock()
+
+    def bind(self, sequence: str, func: Callable[[], Any]) -> None:
+        """
+        :param sequence: a chord ("ctrl+shift+k") or chords separated by spaces ("ctrl+k ctrl+c")
+        :param func: function called without arguments
+        """
+        node = self.root
+        for step in parse_sequence(sequence, self.key_state):
+            node = node.children.setdefault(step, _TrieNode())
+        node.funcs.append(func)
+
+    def unbind(self, sequence: str, func: Callable[[], Any] = None) -> None:
+        """
+        Remove a function binded to a sequence (all of them if func is None)
+        """
+        steps = parse_sequence(sequence, self.key_state)
+        path = [self.root]
+        for step in steps:
+            node = path[-1].children.get(step)
+            if node is None:
+                return
+            path.append(node)
+        node = path[-1]
+        with self._lock:
+            if func is None:
+                node.funcs = []
+            elif func in node.funcs:
+                node.funcs = [f for f in node.funcs if f is not func]
+            # prune the branches left empty
+            for parent, child, step in zip(reversed(path[:-1]), reversed(path[1:]), reversed(steps)):
+                if child.funcs or child.children:
+                    break
+                del parent.children[step]
+            self._node = self.root
+
+    def press(self, slot: int) -> None:
+        """
+        Feed a key press (see KeyState.slot for the slot of a key)
+        """
+        key_state = self.key_state
+        if not key_state.press(slot) or key_state.is_modifier(slot):
+            return
+        step = (key_state.modifiers, slot)
+        now = time.monotonic()
+        with self._lock:
+            node = self._node
+            pending = None
+            if node is not self.root:
+                if now > self._deadline:
+                    pending = node.funcs
+                    node = self.root
+                child = node.children.get(step)
+                if child is None and node is not self.root:
+                    # the sequence is broken, the key may start another one
+                    pending = node.funcs
+                    node = self.root
+                    child = node.children.get(step)
+            else:
+                child = node.children.get(step)
+            self._cancel_timer()
+            funcs = None
+            if child is None:
+                self._node = self.root
+            elif child.children:
+                self._node = child
+                self._deadline = now + self.timeout
+                if child.funcs:
+                    self._timer = threading.Timer(self.timeout, self._expire, (child,))
+                    self._timer.daemon = True
+                    self._timer.start()
+            else:
+                self._node = self.root
+                funcs = child.funcs
+        if pending:
+            for func in pending:
+                func()
+        if funcs:
+            for func in funcs:
+                func()
+
+    def release(self, slot: int) -> None:
+        self.key_state.release(slot)
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _expire(self, node: _TrieNode) -> None:
+        with self._lock:
+            if self._node is not node:
+                return
+            self._node = self.root
+            self._timer = None
+            funcs = node.funcs
+        for func in funcs:
+            func()
+
+    def reset(self) -> None:
+        """
+        Forget the keys pressed and the sequence in progress (for instance when the keyboard focus is lost)
+        """
+        with self._lock:
+            self._cancel_timer()
+            self._node = self.root
+        self.key_state.reset()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import concurrent.futures
+    from .flow_core import EventFuncWrapper, EventInfo
+
+
+KINDS = ("inline", "thread", "serial", "process")
+BACKPRESSURES = ("block", "drop", "coalesce")
+
+
+@dataclass
+class ExecutorPolicy:
+    """
+    Where the function binded to an input runs (see HandlerCore.bind):
+        "inline": in the thread reading the device (default)
+        "thread": in a thread pool shared by all bindings
+        "serial": in a thread dedicated to the binding, so that calls keep their order
+        "process": in a process pool shared by all bindings, for CPU-heavy functions
+            (the function, its arguments and the inputs must be picklable)
+    When max_pending calls are already waiting, backpressure decides what happens to a new event:
+        "block": the reading thread waits for a call to finish
+        "drop": the event is dropped
+        "coalesce": only the latest event waits for the running call to finish (max_pending is ignored)
+    """
+    kind: str = "inline"
+    backpressure: str = "block"
+    max_pending: int = 1024
+
+    def __post_init__(self):
+        if self.kind not in KINDS:
+            raise ValueError(f"Unknown executor '{self.kind}', must be one of {KINDS}")
+        if self.backpressure not in BACKPRESSURES:
+            raise ValueError(f"Unknown backpressure policy '{self.backpressure}', must be one of {BACKPRESSURES}")
+        if self.max_pending < 1:
+            raise ValueError(f"Invalid max_pending {self.max_pending}, must be at least 1")
+
+
+_pools_lock = threading.Lock()
+_thread_pool : concurrent.futures.ThreadPoolExecutor = None
+_process_pool : concurrent.futures.ProcessPoolExecutor = None
+
+
+def shared_thread_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _thread_pool
+    import concurrent.futures
+    with _pools_lock:
+        if _thread_pool is None:
+            _thread_pool = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="inputflow")
+        return _thread_pool
+
+
+def shared_process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _process_pool
+    import concurrent.futures
+    with _pools_lock:
+        if _process_pool is None:
+            _process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
+        return _process_pool
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """
+    Shut the shared pools down (they are created again when needed)
+    """
+    global _thread_pool, _process_pool
+    with _pools_lock:
+        pools = (_thread_pool, _process_pool)
+        _thread_pool = None
+        _process_pool = None
+    for pool in pools:
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+def _report_exception(future: concurrent.futures.Future) -> None:
+    if future.cancelled():
+        return
+    exception = future.exception()
+    if exception is not None:
+        import traceback
+        traceback.print_exception(type(exception), exception, exception.__traceback__)
+
+
+class ScheduledCall:
+    """
+    Binded function running on an executor: calling it only schedules the call, following an ExecutorPolicy
+    """
+
+    def __init__(self, wrapper: EventFuncWrapper, policy: ExecutorPolicy):
+        self.wrapper = wrapper
+        self.policy = policy
+        self.dropped = 0
+        if policy.kind == "thread":
+            self.executor = shared_thread_pool()
+        elif policy.kind == "serial":
+            import concurrent.futures
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="inputflow-serial")
+        else:
+            self.executor = shared_process_pool()
+        self._slots = threading.BoundedSemaphore(policy.max_pending)
+        # coalescing state: whether a call is running or waiting, and the latest event that arrived meanwhile
+        self._lock = threading.Lock()
+        self._in_flight = False
+        self._latest : EventInfo = None
+        if policy.backpressure == "coalesce":
+            self.invoke = self._call_coalesced
+        elif policy.backpressure == "drop":
+            self.invoke = self._call_or_drop
+        else:
+            self.invoke = self._call_blocking
+
+    def __call__(self, event_info: EventInfo) -> None:
+        self.invoke(event_info)
+
+    def _submit(self, event_info: EventInfo) -> concurrent.futures.Future:
+        wrapper = self.wrapper
+        if self.policy.kind != "process":
+            future = self.executor.submit(wrapper.invoke, event_info)
+        else:
+            kwargs = dict(wrapper.kwargs)
+            if wrapper.event_value_arg_name:
+                kwargs[wrapper.event_value_arg_name] = event_info.event_value
+            if wrapper.input_origin_arg_name:
+                kwargs[wrapper.input_origin_arg_name] = event_info.input
+            future = self.executor.submit(wrapper.func, **kwargs)
+        future.add_done_callback(_report_exception)
+        return future
+
+    def _release(self, future: concurrent.futures.Future) -> None:
+        self._slots.release()
+
+    def _call_blocking(self, event_info: EventInfo) -> None:
+        self._slots.acquire()
+        self._submit(event_info.retained()).add_done_callback(self._release)
+
+    def _call_or_drop(self, event_info: EventInfo) -> None:
+        if not self._slots.acquire(blocking=False):
+            self.dropped += 1
+            return
+        self._submit(event_info.retained()).add_done_callback(self._release)
+
+    def _call_coalesced(self, event_info: EventInfo) -> None:
+        event_info = event_info.retained()
+        with self._lock:
+            if self._in_flight:
+                if self._latest is not None:
+                    self.dropped += 1
+                self._latest = event_info
+                return
+            self._in_flight = True
+        self._submit(event_info).add_done_callback(self._on_coalesced_done)
+
+    def _on_coalesced_done(self, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            event_info = self._latest
+            self._latest = None
+            if event_info is None:
+                self._in_flight = False
+                return
+        self._submit(event_info).add_done_callback(self._on_coalesced_done)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the dedicated thread of a "serial" binding
+        """
+        if self.policy.kind == "serial":
+            self.executor.shutdown(wait=wait)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .flow_core import EventInfo
+
+
+class ChangeFilter:
+    """
+    Change suppression and rate limiting of the events of one input (see HandlerCore.set_change_filter):
+    an event is dropped when its value differs from the last emitted value by less than min_delta (or is equal to it),
+    except for a return to 0 which always goes through.
+    With max_rate, events coming faster than max_rate per second are held back and only the last of them is emitted
+    at the end of the interval by flush, so the final value is never lost. There is no thread: the handler calls flush
+    from the thread reading it (see HandlerCore.flush_change_filters).
+    """
+
+    def __init__(
+            self,
+            emit: Callable[[EventInfo], Any],
+            min_delta: float = 0.0,
+            max_rate: float = None,
+            on_hold: Callable[[ChangeFilter], Any] = None
+        ):
+        """
+        :param emit: function emitting the events held back by the rate limit
+        :param min_delta: smallest change of value to emit
+        :param max_rate: maximum number of events per second, None for no limit
+        :param on_hold: function called with the filter when it starts holding an event back (so that it gets flushed)
+        """
+        self.emit = emit
+        self.min_delta = min_delta
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.on_hold = on_hold if on_hold is not None else lambda change_filter: None
+        self.last_value : float = None
+        self.last_time = float("-inf")
+        self.pending : EventInfo = None
+        self._lock = threading.Lock()
+
+    @property
+    def due(self) -> float:
+        """
+        When the event held back can be emitted (time.monotonic), None if there is none
+        """
+        return self.last_time + self.min_interval if self.pending is not None else None
+
+    def _is_change(self, value: float) -> bool:
+        last = self.last_value
+        if last is None:
+            return True
+        if value == last:
+            return False
+        return abs(value - last) >= self.min_delta or value == 0.0
+
+    def accept(self, event_info: EventInfo) -> bool:
+        """
+        :return: whether the event should be emitted now
+        """
+        with self._lock:
+            if not self._is_change(event_info.event_value):
+                # the value went back to the last emitted one, nothing left to emit
+                self.pending = None
+                return False
+            if self.min_interval:
+                now = time.monotonic()
+                if self.last_time + self.min_interval > now:
+                    held = self.pending is not None
+                    self.pending = event_info.retained()
+                    if not held:
+                        self.on_hold(self)
+                    return False
+                self.last_time = now
+                self.pending = None
+            self.last_value = event_info.event_value
+            return True
+
+    def flush(self, now: float = None) -> float:
+        """
+        Emit the event held back if its interval is over.
+        :param now: the current time (time.monotonic)
+        :return: when the event held back can be emitted if it is still too early, None if there is nothing left
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            event_info = self.pending
+            if event_info is None:
+                return None
+            due = self.last_time + self.min_interval
+            if due > now:
+                return due
+            self.pending = None
+            self.last_value = event_info.event_value
+            self.last_time = now
+        self.emit(event_info)
+        return None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.pending = None
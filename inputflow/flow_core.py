@@ -1,9 +1,20 @@
 from __future__ import annotations
 import threading
+import time
+import functools
+import itertools
+import inspect
 from dataclasses import dataclass
 from collections.abc import Callable
-from typing import List, Dict, TypeVar, Generic, Any
+from typing import List, Dict, Iterable, Tuple, TypeVar, Generic, Any, TYPE_CHECKING
 from abc import ABC, abstractmethod
+from .state import InputStateVector
+from .instrumentation import HandlerInstrumentation
+from .filters import ChangeFilter
+from .executors import ExecutorPolicy, ScheduledCall
+
+if TYPE_CHECKING:
+    from . import aio
 
 
 T = TypeVar("T")
@@ -12,10 +23,99 @@ IdType = TypeVar("IdType")
 InputType = TypeVar("InputType")
 
 
-@dataclass
+@dataclass(init=False)
 class EventInfo(Generic[InputType]):
+    """
+    What binded functions get for an event: the input and its value, when the event happened
+    (monotonic clock, time.monotonic_ns) and the id of the handler it comes from (see HandlerCore.device_id).
+    Events of different handlers can be put in order by (timestamp_ns, device_id), see merge.py.
+    """
+    __slots__ = ("input", "event_value", "timestamp_ns", "device_id")
+    input: InputType
+    event_value: float
+    timestamp_ns: int
+    device_id: int
+
+    def __init__(self, input: InputType, event_value: float, timestamp_ns: int = 0, device_id: int = 0):
+        self.input = input
+        self.event_value = event_value
+        self.timestamp_ns = timestamp_ns
+        self.device_id = device_id
+
+    def retained(self) -> EventInfo[InputType]:
+        """
+        The event info to keep when a reference outlives the call it was given to (queues, timers, other threads):
+        itself, except for pooled event infos which are copied (see EventInfoPool)
+        """
+        return self
+
+
+@dataclass(init=False, frozen=True)
+class FrozenEventInfo(Generic[InputType]):
+    """
+    Immutable (and hashable) event info, for handlers created with event_info="frozen"
+    """
+    __slots__ = ("input", "event_value", "timestamp_ns", "device_id")
     input: InputType
     event_value: float
+    timestamp_ns: int
+    device_id: int
+
+    def __init__(self, input: InputType, event_value: float, timestamp_ns: int = 0, device_id: int = 0):
+        object.__setattr__(self, "input", input)
+        object.__setattr__(self, "event_value", event_value)
+        object.__setattr__(self, "timestamp_ns", timestamp_ns)
+        object.__setattr__(self, "device_id", device_id)
+
+    def retained(self) -> FrozenEventInfo[InputType]:
+        return self
+
+
+class PooledEventInfo(EventInfo[InputType]):
+    """
+    Event info belonging to an EventInfoPool, overwritten once the pool has gone round
+    """
+    __slots__ = ()
+
+    def retained(self) -> EventInfo[InputType]:
+        return EventInfo(self.input, self.event_value, self.timestamp_ns, self.device_id)
+
+
+class EventInfoPool:
+    """
+    Ring of preallocated event infos given out in turn, so that handling an event allocates nothing
+    (for handlers created with event_info="pooled").
+    An event info is only valid until size more events have been handled: functions keeping a reference longer
+    must keep event_info.retained() instead (the change filters, executors and async streams of inputflow do).
+    Not locked: events must be handled by a single thread.
+    """
+
+    def __init__(self, size: int = 256):
+        if size < 1:
+            raise ValueError(f"Invalid pool size {size}")
+        self.items : List[PooledEventInfo] = [PooledEventInfo(None, 0.0) for _ in range(size)]
+        self.size = size
+        next_item = itertools.cycle(self.items).__next__
+
+        # a closure is cheaper to call than __call__, which makes a difference next to allocating a small object
+        def acquire(input: InputType, event_value: float, timestamp_ns: int = 0, device_id: int = 0) -> PooledEventInfo[InputType]:
+            event_info = next_item()
+            event_info.input = input
+            event_info.event_value = event_value
+            event_info.timestamp_ns = timestamp_ns
+            event_info.device_id = device_id
+            return event_info
+
+        self.acquire : Callable[..., PooledEventInfo[InputType]] = acquire
+
+    def __call__(self, input: InputType, event_value: float, timestamp_ns: int = 0, device_id: int = 0) -> PooledEventInfo[InputType]:
+        return self.acquire(input, event_value, timestamp_ns, device_id)
+
+
+EVENT_INFO_MODES = ("new", "frozen", "pooled")
+
+# default ids of the handlers (see HandlerCore.device_id)
+_device_ids = itertools.count(1)
 
 
 class EventFuncWrapper(Generic[T]):
@@ -35,15 +135,125 @@ class EventFuncWrapper(Generic[T]):
         self.event_value_arg_name = event_value_arg_name
         self.input_origin_arg_name = input_origin_arg_name
         self.kwargs = kwargs
-        if event_value_arg_name:
-            self.kwargs[event_value_arg_name] = None
+        # callable taking the event info, built once here so that calls don't touch any shared state
+        self.invoke : Callable[[EventInfo], T] = self._compile()
     
     def __call__(self, event_info: EventInfo) -> T:
-        if self.event_value_arg_name:
-            self.kwargs[self.event_value_arg_name] = event_info.event_value
-        if self.input_origin_arg_name:
-            self.kwargs[self.input_origin_arg_name] = event_info.input
-        return self.func(**self.kwargs)
+        return self.invoke(event_info)
+
+    def _compile(self) -> Callable[[EventInfo], T]:
+        """
+        Specialise the call for the given argument names.
+        Arguments are passed positionally when the signature of the function allows it (the event value and input
+        must then be its first parameters), otherwise as keyword arguments.
+        """
+        value_name = self.event_value_arg_name
+        input_name = self.input_origin_arg_name
+        func = self.func
+        names = [name for name in (value_name, input_name) if name]
+        args = _positional_arguments(func, names, self.kwargs)
+
+        if args is None:
+            func = functools.partial(func, **self.kwargs)
+            if not value_name and not input_name:
+                return lambda event_info: func()
+            if not input_name:
+                return lambda event_info: func(**{value_name: event_info.event_value})
+            if not value_name:
+                return lambda event_info: func(**{input_name: event_info.input})
+            return lambda event_info: func(**{value_name: event_info.event_value, input_name: event_info.input})
+
+        if not value_name and not input_name:
+            return lambda event_info: func(*args)
+        if not input_name:
+            if not args:
+                return lambda event_info: func(event_info.event_value)
+            return lambda event_info: func(event_info.event_value, *args)
+        if not value_name:
+            if not args:
+                return lambda event_info: func(event_info.input)
+            return lambda event_info: func(event_info.input, *args)
+        if not args:
+            return lambda event_info: func(event_info.event_value, event_info.input)
+        return lambda event_info: func(event_info.event_value, event_info.input, *args)
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_positional_parameters(func: Callable) -> Tuple[inspect.Parameter, ...]:
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    positional_kinds = (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+    return tuple(param for param in parameters if param.kind in positional_kinds)
+
+
+def _positional_parameters(func: Callable) -> Tuple[inspect.Parameter, ...]:
+    """
+    The parameters of func that can be given positionally (None if its signature is unknown),
+    cached since binding the same function many times is common (see HandlerCore.bind_many)
+    """
+    try:
+        return _cached_positional_parameters(func)
+    except TypeError:
+        # unhashable callable
+        return _cached_positional_parameters.__wrapped__(func)
+
+
+def _positional_arguments(func: Callable, names: List[str], kwargs: Dict[str, Any]) -> Any:
+    """
+    Turn kwargs into the positional arguments following the parameters called names,
+    filling the gaps with the default values of the function.
+    :return: a tuple of arguments, or None if the signature of func doesn't allow it
+    """
+    positional = _positional_parameters(func)
+    if positional is None:
+        return None
+    if [param.name for param in positional[:len(names)]] != names:
+        return None
+    rest = positional[len(names):]
+    if not set(kwargs) <= {param.name for param in rest}:
+        return None
+    args = []
+    remaining = len(kwargs)
+    for param in rest:
+        if not remaining:
+            break
+        if param.name in kwargs:
+            args.append(kwargs[param.name])
+            remaining -= 1
+        elif param.default is not inspect.Parameter.empty:
+            args.append(param.default)
+        else:
+            return None
+    return tuple(args)
+
+
+def _binding_specs(binding: Any) -> List[Tuple[Callable, str, Dict[str, Any]]]:
+    """
+    (function, event value arg name, kwargs) of the bindings given to HandlerCore.bind_many for one input
+    """
+    if isinstance(binding, list):
+        return [spec for item in binding for spec in _binding_specs(item)]
+    if callable(binding):
+        return [(binding, "", {})]
+    if isinstance(binding, tuple) and 1 <= len(binding) <= 3 and callable(binding[0]):
+        func, event_value_arg_name, kwargs = binding + ("", {})[len(binding) - 1:]
+        if isinstance(event_value_arg_name, str) and isinstance(kwargs, dict):
+            return [(func, event_value_arg_name, kwargs)]
+    raise ValueError(f"Invalid binding '{binding}', must be a function, a tuple (function, event value arg name[, kwargs]) or a list of those")
+
+
+def _schedule(event_func: EventFuncWrapper, executor: str | ExecutorPolicy = None) -> EventFuncWrapper | ScheduledCall:
+    """
+    Wrap a binded function to run on the given executor (see executors.ExecutorPolicy)
+    """
+    if executor is None:
+        return event_func
+    policy = executor if isinstance(executor, ExecutorPolicy) else ExecutorPolicy(executor)
+    if policy.kind == "inline":
+        return event_func
+    return ScheduledCall(event_func, policy)
 
 
 class HandlerCore(Generic[EventType, IdType, InputType]): #, ABC):
@@ -55,18 +265,243 @@ class HandlerCore(Generic[EventType, IdType, InputType]): #, ABC):
     Also allows to bind functions to be called upon the event of a certain input.
     """
     NULL: InputType = None
+    # clock of the timestamps of the events (see get_event_timestamp_ns)
+    event_clock_ns = staticmethod(time.monotonic_ns)
     
     def __init__(self, **kwargs):
         """
         :param kwargs: Must contain all the ids, offsets and amplitudes of the inputs that need to be set to a different than default value.
             All parameters need to be given as keyword arguments in the format [name of input]_id, [name of input]_offset and [name of input]_amplitude.
             Default ids are given by EventHandlerConfig.DEFAULT_IDS, default offsets are set to 0,  default amplitudes are set to 1.
+            Set compiled_dispatch=True to use the precompiled dispatch table (see _handle_event_compiled).
+            Set event_info to "frozen" or "pooled" to change the type of the event infos given to binded functions (see set_event_info_mode).
+            Set source to read the events from an event source instead of the device (see sources.MemoryEventSource).
+            Set device_id to choose the id given to the event infos of this handler (a new id by default, see merge.py).
         """
+        # where read_inputs gets the events from, if not from the device
+        self.source = kwargs.get("source")
+        # id of the handler in the event infos, to tell apart the events of several handlers
+        self.device_id : int = kwargs.get("device_id")
+        if self.device_id is None:
+            self.device_id = next(_device_ids)
+        # event_clock_ns - time.monotonic_ns, to put the timestamps of the events on the monotonic clock (see sync_clock)
+        self._clock_offset_ns = 0
+        self.sync_clock()
+        # compiled dispatch table {event id: (input, offset, 1/amplitude, epsilon, callbacks, change filter) or None for unknown ids},
+        # filled lazily and dropped whenever the bindings or the config change
+        self._dispatch_table : Dict[IdType, Any] = {}
         self.smoothing_epsilon = kwargs.get("smoothing_epsilon", 0)
 
         # list of functions to be called on event for every input
         self.event_signals : Dict[InputType, List[EventFuncWrapper]] = {}   # {k: [] for k in self.INPUTS}
         self.common_event_signals : List[EventFuncWrapper] = []
+        # functions called once per frame of events, for handlers whose device groups events in frames
+        self.frame_signals : List[Callable[[Dict[InputType, float]], Any]] = []
+        # functions called with every raw event before it is handled (see add_event_tap)
+        self.event_taps : List[Callable[[EventType], Any]] = []
+        # change suppression and rate limiting by input (see set_change_filter)
+        self.change_filters : Dict[InputType, ChangeFilter] = {}
+        self._default_change_filter : Dict[str, Any] = None
+        # change filters holding an event back, flushed by the thread reading the handler (see flush_change_filters)
+        self._held_filters : List[ChangeFilter] = []
+        # latency histograms, if enabled (see enable_instrumentation)
+        self.instrumentation : HandlerInstrumentation = None
+        # inputs already resolved by resolve_input, by input-like value
+        self._resolved_inputs : Dict[Any, InputType] = {}
+
+        # factory of the event infos, (input, event value) -> EventInfo (see set_event_info_mode)
+        self.make_event_info : Callable[[InputType, float], EventInfo] = EventInfo
+        self.event_info_mode = "new"
+        self.set_event_info_mode(kwargs.get("event_info", "new"), kwargs.get("event_info_pool_size", 256))
+
+        self._compiled_dispatch = False
+        self.compiled_dispatch = kwargs.get("compiled_dispatch", False)
+
+    @property
+    def smoothing_epsilon(self) -> float:
+        return self._smoothing_epsilon
+
+    @smoothing_epsilon.setter
+    def smoothing_epsilon(self, epsilon: float) -> None:
+        self._smoothing_epsilon = epsilon
+        self.invalidate_dispatch()
+
+    @property
+    def compiled_dispatch(self) -> bool:
+        return self._compiled_dispatch
+
+    @compiled_dispatch.setter
+    def compiled_dispatch(self, enabled: bool) -> None:
+        self._compiled_dispatch = bool(enabled)
+        self.invalidate_dispatch()
+        self._install_dispatch()
+
+    def invalidate_dispatch(self) -> None:
+        """
+        Drop the compiled dispatch table, it will be rebuilt on the next events.
+        Must be called after any change of the bindings or of the input config.
+        """
+        self._dispatch_table = {}
+
+    def _select_dispatch(self) -> Callable[[EventType], None]:
+        """
+        Choose the implementation of handle_event for the current settings
+        """
+        if self._compiled_dispatch:
+            return self._handle_event_compiled
+        return self._handle_event_interpreted
+
+    def _install_dispatch(self) -> None:
+        dispatch = self._select_dispatch()
+        if self.event_taps:
+            taps = tuple(self.event_taps)
+            untapped_dispatch = dispatch
+
+            def dispatch(event: EventType) -> None:
+                for tap in taps:
+                    tap(event)
+                untapped_dispatch(event)
+
+        if self._rate_limited():
+            unflushed_dispatch = dispatch
+
+            def dispatch(event: EventType) -> None:
+                if self._held_filters:
+                    self.flush_change_filters()
+                unflushed_dispatch(event)
+
+        if self.instrumentation is not None:
+            dispatch = self.instrumentation.wrap_dispatch(dispatch)
+            self.emit_signal = self.instrumentation.wrap_emit_signal()
+        else:
+            self.__dict__.pop("emit_signal", None)
+        self.handle_event = dispatch
+
+    def set_event_info_mode(self, mode: str, pool_size: int = 256) -> None:
+        """
+        Choose how the event infos given to the binded functions are made:
+            "new": a new EventInfo for every event (default)
+            "frozen": a new FrozenEventInfo for every event, which can't be modified by the binded functions
+            "pooled": EventInfo objects taken in turn from a ring of pool_size preallocated ones (see EventInfoPool),
+                for binded functions that don't keep references to them
+        """
+        if mode not in EVENT_INFO_MODES:
+            raise ValueError(f"Unknown event info mode '{mode}', must be one of {EVENT_INFO_MODES}")
+        if mode == "pooled":
+            self.make_event_info = EventInfoPool(pool_size).acquire
+        elif mode == "frozen":
+            self.make_event_info = FrozenEventInfo
+        else:
+            self.make_event_info = EventInfo
+        self.event_info_mode = mode
+
+    def set_change_filter(self, input: InputType = None, min_delta: float = 0.0, max_rate: float = None) -> None:
+        """
+        Drop the events that don't change the value of an input, or change it by less than min_delta,
+        and optionally limit the number of events per second, keeping the last value (see filters.ChangeFilter).
+        The filter applies to events coming from the device, not to emit_signal calls (connect_events, frames).
+        The last values held back by max_rate are emitted by the thread reading the handler, before its next event
+        or when its read loop wakes up for them (see flush_change_filters), or by a timer for readers without a loop
+        (pynput listener, async device streams).
+        :param input: an input type, or None to set the filter of all the inputs that don't have their own
+        :param min_delta: smallest change of value to emit
+        :param max_rate: maximum number of events per second, None for no limit
+        """
+        if input is None:
+            for change_filter in self.change_filters.values():
+                change_filter.cancel()
+            self.change_filters = {}
+            self._default_change_filter = {"min_delta": min_delta, "max_rate": max_rate}
+        else:
+            input = self.resolve_input(input)
+            self.change_filters[input] = ChangeFilter(self._emit_filtered, min_delta, max_rate, self._held_filters.append)
+        self.invalidate_dispatch()
+        self._install_dispatch()
+
+    def clear_change_filters(self) -> None:
+        for change_filter in self.change_filters.values():
+            change_filter.cancel()
+        self.change_filters = {}
+        self._default_change_filter = None
+        self._held_filters.clear()
+        self.invalidate_dispatch()
+        self._install_dispatch()
+
+    def _rate_limited(self) -> bool:
+        if self._default_change_filter is not None and self._default_change_filter["max_rate"]:
+            return True
+        return any(change_filter.min_interval for change_filter in self.change_filters.values())
+
+    def flush_change_filters(self, now: float = None) -> float:
+        """
+        Emit the values held back by the max_rate of the change filters whose interval is over (see set_change_filter).
+        Called by the read loops of the handlers, call it from the thread reading the handler when reading it yourself.
+        :param now: the current time (time.monotonic)
+        :return: how long to wait in seconds for the next value held back, None if there is none
+        """
+        held = self._held_filters
+        if not held:
+            return None
+        if now is None:
+            now = time.monotonic()
+        next_due = None
+        for change_filter in tuple(held):
+            due = change_filter.flush(now)
+            if due is None:
+                held.remove(change_filter)
+            elif next_due is None or due < next_due:
+                next_due = due
+        return None if next_due is None else next_due - now
+
+    def get_change_filter(self, input: InputType) -> ChangeFilter:
+        """
+        The change filter of an input (None if there is none)
+        """
+        change_filter = self.change_filters.get(input)
+        if change_filter is None and self._default_change_filter is not None:
+            change_filter = self.change_filters.setdefault(
+                input, ChangeFilter(self._emit_filtered, on_hold=self._held_filters.append, **self._default_change_filter)
+            )
+        return change_filter
+
+    def _emit_filtered(self, event_info: EventInfo) -> None:
+        self.emit_signal(event_info)
+
+    def enable_instrumentation(self) -> None:
+        """
+        Measure the delay between the timestamp of every event and its dispatch, the time spent in handle_event
+        and in every binded function (see stats).
+        Instrumented versions of handle_event and emit_signal are installed, so that there is no cost when it is disabled.
+        """
+        if self.instrumentation is None:
+            self.instrumentation = HandlerInstrumentation(self)
+            self.invalidate_dispatch()
+            self._install_dispatch()
+
+    def disable_instrumentation(self) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation = None
+            self.invalidate_dispatch()
+            self._install_dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summaries of the latency histograms (see instrumentation.HandlerInstrumentation)
+        """
+        if self.instrumentation is None:
+            raise ValueError(f"Instrumentation is not enabled for '{self.__class__.__name__}'")
+        return self.instrumentation.stats()
+
+    def add_event_tap(self, func: Callable[[EventType], Any]) -> None:
+        """
+        Register a function called with every raw event given to handle_event, before any filtering (used by recording.EventRecorder).
+        """
+        self.event_taps.append(func)
+        self._install_dispatch()
+
+    def remove_event_tap(self, func: Callable[[EventType], Any]) -> None:
+        self.event_taps.remove(func)
+        self._install_dispatch()
 
     def is_input_valid(self, input: InputType) -> bool:
         return True
@@ -92,39 +527,141 @@ class HandlerCore(Generic[EventType, IdType, InputType]): #, ABC):
     
     def get_input_amplitude(self, input: InputType) -> float:
         return 1.0
+
+    def get_input_epsilon(self, input: InputType) -> float:
+        """
+        Smoothing epsilon of the input (see smoothen)
+        """
+        return self.smoothing_epsilon
     
     def get_input_name(self, input: InputType) -> str:
         return str(input)
 
     def make_input(self, input_like: Any) -> InputType:
         return input_like
+
+    def resolve_input(self, input_like: Any) -> InputType:
+        """
+        make_input followed by enforce_valid_input, cached by input_like so that names are only resolved once
+        """
+        try:
+            return self._resolved_inputs[input_like]
+        except KeyError:
+            cache = True
+        except TypeError:
+            # unhashable
+            cache = False
+        input = self.make_input(input_like)
+        self.enforce_valid_input(input)
+        if cache:
+            self._resolved_inputs[input_like] = input
+        return input
     
-    def bind(self, input: InputType, func: Callable, event_value_arg_name: str = "", **kwargs) -> None:
+    def bind(
+            self,
+            input: InputType,
+            func: Callable,
+            event_value_arg_name: str = "",
+            executor: str | ExecutorPolicy = None,
+            **kwargs
+        ) -> None:
         """
         Bind a function call to the trigger event of a certain input.
         :param input: an input type
         :param func: the function to bind (it needs to take the event value as a parameter)
         :param event_value_arg_name: the name of the function's parameter for the event value (if none is given, the event value won't be passed to the function)
+        :param executor: where the function runs, "inline" (default), "thread", "serial" or "process", or an ExecutorPolicy for the backpressure options
         :param kwargs: other arguments of the function given as keyword arguments
         """
-        input = self.make_input(input)
-        self.enforce_valid_input(input)
+        input = self.resolve_input(input)
         # self.event_signals[input].append(EventFuncWrapper(func, event_value_arg_name, **kwargs))
-        event_func = EventFuncWrapper(func, event_value_arg_name, **kwargs)
+        event_func = _schedule(EventFuncWrapper(func, event_value_arg_name, **kwargs), executor)
         self.event_signals.setdefault(input, []).append(event_func)
+        self.invalidate_dispatch()
     
+    def bind_many(
+            self,
+            bindings: Dict[Any, Any] | Iterable[Tuple[Any, Any]],
+            executor: str | ExecutorPolicy = None
+        ) -> None:
+        """
+        Bind many functions at once, for instance from a profile of bindings:
+        every input and function is resolved and checked first (nothing is bound if one of them is invalid),
+        then the bindings are installed together, so that events handled meanwhile see either none or all of them,
+        with a single rebuild of the dispatch table.
+            handler.bind_many({"cross": jump, "L2": (accelerate, "value"), "R2": [(brake, "value", {"force": 2}), log]})
+        :param bindings: {input: binding} or (input, binding) pairs, where a binding is a function,
+            a tuple (function, event value arg name[, dict of kwargs]) or a list of those (see bind)
+        :param executor: see bind
+        """
+        items = bindings.items() if isinstance(bindings, dict) else bindings
+        new_signals : Dict[InputType, List[EventFuncWrapper]] = {}
+        # identical bindings share their wrapper, which is immutable once built
+        wrappers : Dict[Any, EventFuncWrapper] = {}
+        for input_like, binding in items:
+            input = self.resolve_input(input_like)
+            for func, event_value_arg_name, kwargs in _binding_specs(binding):
+                try:
+                    key = (func, event_value_arg_name, *sorted(kwargs.items()))
+                    wrapper = wrappers.get(key)
+                except TypeError:
+                    # unhashable function or arguments
+                    key = wrapper = None
+                if wrapper is None:
+                    wrapper = EventFuncWrapper(func, event_value_arg_name, **kwargs)
+                    if key is not None:
+                        wrappers[key] = wrapper
+                new_signals.setdefault(input, []).append(_schedule(wrapper, executor))
+
+        # copy on write: emit_signal keeps working on the old dict until the new one replaces it
+        event_signals = {input: list(funcs) for input, funcs in self.event_signals.items()}
+        for input, funcs in new_signals.items():
+            event_signals.setdefault(input, []).extend(funcs)
+        self.event_signals = event_signals
+        self.invalidate_dispatch()
+
     def bind_all(
             self,
             func: Callable,
             event_value_arg_name: str = "",
             input_origin_arg_name: str = "",
+            executor: str | ExecutorPolicy = None,
             **kwargs
         ) -> None:
         """
         Bind the same function call to the trigger event of all inputs at once.
         """
-        event_func = EventFuncWrapper(func, event_value_arg_name, input_origin_arg_name, **kwargs)
+        event_func = _schedule(EventFuncWrapper(func, event_value_arg_name, input_origin_arg_name, **kwargs), executor)
         self.common_event_signals.append(event_func)
+        self.invalidate_dispatch()
+
+    def subscribe(self, func: Callable[[EventInfo], Any], input: InputType = None) -> None:
+        """
+        Register a function called with the EventInfo of every event (like bind_all, but without argument mapping).
+        :param input: only call it for the events of this input
+        """
+        if input is None:
+            self.common_event_signals.append(func)
+        else:
+            self.event_signals.setdefault(self.resolve_input(input), []).append(func)
+        self.invalidate_dispatch()
+
+    def unsubscribe(self, func: Callable[[EventInfo], Any], input: InputType = None) -> None:
+        """
+        Remove a function registered with subscribe.
+        """
+        if input is None:
+            self.common_event_signals.remove(func)
+        else:
+            self.event_signals[self.resolve_input(input)].remove(func)
+        self.invalidate_dispatch()
+
+    def bind_frame(self, func: Callable[[Dict[InputType, float]], Any]) -> None:
+        """
+        Bind a function to be called once per frame of events (only for handlers that deliver frames, see emit_frame).
+        :param func: a function taking a dict {input: value} of the inputs that changed during the frame
+        """
+        self.frame_signals.append(func)
 
     def valid_event(self, event: EventType) -> bool:
         """
@@ -145,9 +682,48 @@ class HandlerCore(Generic[EventType, IdType, InputType]): #, ABC):
         Should be overridden
         """
         return 1.0
+
+    def get_event_timestamp_ns(self, event: EventType) -> int:
+        """
+        Time of the event in nanoseconds, on the clock event_clock_ns.
+        Should be overridden if the events carry their own timestamp, by default the time at which this method is called.
+        """
+        return self.event_clock_ns()
+
+    def get_event_monotonic_ns(self, event: EventType) -> int:
+        """
+        Time of the event in nanoseconds on the monotonic clock (time.monotonic_ns), the timestamp of its event info
+        """
+        return self.get_event_timestamp_ns(event) - self._clock_offset_ns
+
+    def sync_clock(self) -> None:
+        """
+        Measure again the offset between event_clock_ns and the monotonic clock, for handlers whose events are timestamped
+        on another clock (the realtime clock of evdev): the offset changes when the system time is set or adjusted.
+        """
+        if self.event_clock_ns is time.monotonic_ns:
+            self._clock_offset_ns = 0
+        else:
+            self._clock_offset_ns = self.event_clock_ns() - time.monotonic_ns()
+
+    def encode_event(self, event: EventType) -> Tuple[int, int, int]:
+        """
+        Turn an event into integers (type, code, value) that decode_event can turn back into the same event (used for recording).
+        Should be overridden
+        """
+        raise NotImplementedError(f"'{self.__class__.__name__}' doesn't support event encoding")
+
+    def decode_event(self, timestamp_ns: int, type: int, code: int, value: int) -> EventType:
+        """
+        Inverse of encode_event.
+        Should be overridden
+        """
+        raise NotImplementedError(f"'{self.__class__.__name__}' doesn't support event decoding")
     
-    def smoothen(self, value: float) -> float:
-        if abs(value) < self.smoothing_epsilon:
+    def smoothen(self, value: float, epsilon: float = None) -> float:
+        if epsilon is None:
+            epsilon = self.smoothing_epsilon
+        if abs(value) < epsilon:
             return 0.0
         return value
     
@@ -155,7 +731,7 @@ class HandlerCore(Generic[EventType, IdType, InputType]): #, ABC):
         offset = self.get_input_offset(input)
         amplitude = self.get_input_amplitude(input)
         event_value = (raw_value - offset) / amplitude
-        event_value = self.smoothen(event_value)
+        event_value = self.smoothen(event_value, self.get_input_epsilon(input))
         return event_value
     
     def get_event_info(self, event: EventType) -> EventInfo:
@@ -163,46 +739,141 @@ class HandlerCore(Generic[EventType, IdType, InputType]): #, ABC):
         input = self.find_input(event_id)
         raw_value = self.get_event_raw_value(event)
         event_value = self.get_event_value(input, raw_value)
-        return EventInfo(
-            input=input,
-            event_value=event_value
-        )
+        return self.make_event_info(input, event_value, self.get_event_monotonic_ns(event), self.device_id)
 
     def handle_event(self, event: EventType) -> None:
         """
-        Obtains the event info then calls then calls emit_signal for treatment of the event and calling of the binded functions
+        Obtains the event info then calls then calls emit_signal for treatment of the event and calling of the binded functions.
+        Replaced per instance by the implementation chosen in _select_dispatch.
         """
+        self._handle_event_interpreted(event)
+
+    def _handle_event_interpreted(self, event: EventType) -> None:
         if not self.valid_event(event):
             return
         event_info = self.get_event_info(event)
         if event_info.input == self.NULL:
             return
+        if self.change_filters or self._default_change_filter is not None:
+            change_filter = self.get_change_filter(event_info.input)
+            if change_filter is not None and not change_filter.accept(event_info):
+                return
         self.emit_signal(event_info)
 
+    def _compile_dispatch_entry(self, table: Dict[IdType, Any], event_id: IdType) -> Any:
+        input = self.find_input(event_id)
+        if input == self.NULL:
+            entry = None
+        else:
+            change_filter = self.get_change_filter(input)
+            entry = (
+                input,
+                self.get_input_offset(input),
+                1.0 / self.get_input_amplitude(input),
+                self.get_input_epsilon(input),
+                tuple(self._compile_callback(func) for func in self._dispatch_callbacks(input)),
+                change_filter.accept if change_filter is not None else None,
+            )
+        table[event_id] = entry
+        return entry
+
+    def _dispatch_callbacks(self, input: InputType) -> List[Callable[[EventInfo], Any]]:
+        """
+        All the functions that emit_signal calls for the given input, in order
+        """
+        return [*self.event_signals.get(input, ()), *self.common_event_signals]
+
+    def _compile_callback(self, func: Callable[[EventInfo], Any]) -> Callable[[EventInfo], Any]:
+        invoke = getattr(func, "invoke", func)
+        if self.instrumentation is not None:
+            return self.instrumentation.wrap_callback(invoke, func)
+        return invoke
+
+    def _handle_event_compiled(self, event: EventType) -> None:
+        """
+        Same as handle_event, but the input, offset, amplitude, epsilon and callbacks of each event id are looked up once
+        and kept in the dispatch table (note that overrides of get_event_value and smoothen are bypassed in this mode).
+        """
+        if not self.valid_event(event):
+            return
+        table = self._dispatch_table
+        event_id = self.get_event_id(event)
+        try:
+            entry = table[event_id]
+        except KeyError:
+            entry = self._compile_dispatch_entry(table, event_id)
+        if entry is None:
+            return
+        input, offset, inv_amplitude, epsilon, callbacks, accept = entry
+        event_value = (self.get_event_raw_value(event) - offset) * inv_amplitude
+        if -epsilon < event_value < epsilon:
+            event_value = 0.0
+        event_info = self.make_event_info(input, event_value, self.get_event_timestamp_ns(event) - self._clock_offset_ns, self.device_id)
+        if accept is not None and not accept(event_info):
+            return
+        for func in callbacks:
+            func(event_info)
+
     def emit_signal(self, event_info: EventInfo) -> None:
         """
         Call functions binded to input.
         :param input: an input type
         :param raw_value: raw value of the event, to be transformed to the desired range using the corresponding offset and amplitude of the config
         """
-        for func in self.event_signals.get(event_info.input, []):
+        for func in self.event_signals.get(event_info.input, ()):
             func(event_info)
         for func in self.common_event_signals:
             func(event_info)
 
+    def emit_frame(self, frame: Dict[InputType, float]) -> None:
+        """
+        Call the functions binded with bind_frame.
+        :param frame: the last value of every input that changed during the frame
+        """
+        for func in self.frame_signals:
+            func(frame)
+
     def read_inputs(self) -> None:
         """
-        Override this method to read the inputs of the specific device
+        Override this method to read the inputs of the specific device (the events of the source are read by default)
+        """
+        if self.source is not None:
+            # wake up for the values held back by the change filters
+            self.read_source(self.flush_change_filters())
+
+    def read_source(self, timeout: float = None) -> int:
         """
-        pass
+        Handle the events available from the source (see sources.MemoryEventSource), waiting for some if there are none.
+        :return: the number of events handled
+        """
+        events = self.source.read(timeout)
+        handle_event = self.handle_event
+        for event in events:
+            handle_event(event)
+        return len(events)
     
     def loop(self) -> None:
-        while True:
+        """
+        Read the inputs forever, or until the source is closed for a handler created with a source
+        """
+        source = self.source
+        while source is None or not source.closed or len(source):
             self.read_inputs()
 
-    def background_loop(self, daemon: bool = True) -> None:
+    def background_loop(self, daemon: bool = True) -> threading.Thread:
         thread = threading.Thread(target=self.loop, daemon=daemon)
         thread.start()
+        return thread
+
+    def events(self, maxsize: int = 1024, policy: str = "drop_oldest") -> aio.EventStream:
+        """
+        Async iterator over the events of this handler, to be called from a running asyncio event loop.
+        The device still needs to be read, by a thread (background_loop) or by the handler itself (see GamepadHandler.events).
+        :param maxsize: size of the queue of events not yet consumed
+        :param policy: what to do when the queue is full, "drop_oldest" or "block" (see aio.EventStream)
+        """
+        from . import aio
+        return aio.EventStream(self, maxsize, policy)
     
     def connect_events(
             src_handler: HandlerCore,
@@ -212,18 +883,16 @@ class HandlerCore(Generic[EventType, IdType, InputType]): #, ABC):
         ) -> None:
         """
         Connect an input from one handler to an input of another handler
+        (see routing.RoutingGraph for many connections, or connections with transforms)
         """
         src_handler.enforce_valid_input(src_input)
         target_handler.enforce_valid_input(target_input)
         
-        def connection(value: float) -> None:
-            event_info = EventInfo(
-                input=target_input,
-                event_value=value
-            )
-            target_handler.emit_signal(event_info)
+        def connection(event_info: EventInfo) -> None:
+            # the event keeps the time and device of the source event
+            target_handler.emit_signal(target_handler.make_event_info(target_input, event_info.event_value, event_info.timestamp_ns, event_info.device_id))
         
-        src_handler.bind(src_input, connection, "value")
+        src_handler.subscribe(connection, src_input)
 
 
 class FixedInputListHandlerMeta(type):
@@ -247,26 +916,56 @@ class FixedInputListHandler(HandlerCore[EventType, IdType, InputType], metaclass
         :param kwargs: Must contain all the ids, offsets and amplitudes of the inputs that need to be set to a different than default value.
             All parameters need to be given as keyword arguments in the format [name of input]_id, [name of input]_offset and [name of input]_amplitude.
             Default ids are given by EventHandlerConfig.DEFAULT_IDS, default offsets are set to 0,  default amplitudes are set to 1.
+            [name of input]_epsilon overrides smoothing_epsilon for one input.
+            Set state_buffer to "array", "numpy" or "shared" to keep the current value of every input (see snapshot).
         """
-        smoothing_epsilon = kwargs.get("smoothing_epsilon", 0)
-        super().__init__(smoothing_epsilon=smoothing_epsilon)
+        # current value of every input, indexed by input
+        self.state : InputStateVector = None
+        state_buffer = kwargs.get("state_buffer")
+        if state_buffer is not None:
+            self.state = InputStateVector(max(self.INPUTS) + 1, state_buffer, kwargs.get("state_buffer_name"))
+        super().__init__(
+            compiled_dispatch=kwargs.get("compiled_dispatch", False),
+            event_info=kwargs.get("event_info", "new"),
+            event_info_pool_size=kwargs.get("event_info_pool_size", 256),
+            source=kwargs.get("source"),
+            device_id=kwargs.get("device_id"),
+        )
+        self.configure(**kwargs)
 
-        self.input_ids : Dict[InputType, IdType] = {}
-        self.input_offsets : Dict[InputType, float] = {self.NULL: 0.0}
-        self.input_amplitudes : Dict[InputType, float] = {self.NULL: 1.0}
+    def configure(self, **kwargs) -> None:
+        """
+        (Re)set the ids, offsets and amplitudes of all inputs, and the smoothing epsilon.
+        Takes the same keyword arguments as the constructor, inputs that are not mentioned are reset to their default.
+        """
+        input_ids : Dict[InputType, IdType] = {}
+        input_offsets : Dict[InputType, float] = {self.NULL: 0.0}
+        input_amplitudes : Dict[InputType, float] = {self.NULL: 1.0}
+        # None to use smoothing_epsilon
+        input_epsilons : Dict[InputType, float] = {self.NULL: None}
         for input, name in self.INPUTS.items():
             attr = f"{name}_id"
-            self.input_ids[input] = kwargs.get(attr, self.DEFAULT_IDS[input])
+            input_ids[input] = kwargs.get(attr, self.DEFAULT_IDS[input])
             attr = f"{name}_offset"
-            self.input_offsets[input] = kwargs.get(attr, 0.0)
+            input_offsets[input] = kwargs.get(attr, 0.0)
             attr = f"{name}_amplitude"
-            self.input_amplitudes[input] = kwargs.get(attr, 1.0)
+            input_amplitudes[input] = kwargs.get(attr, 1.0)
+            attr = f"{name}_epsilon"
+            input_epsilons[input] = kwargs.get(attr)
 
         # dict of inputs correspondig to ids (if multiple inputs have the same id, for instance -1, the behaviour is undefined)
-        self.reverse_id_dict : Dict[IdType, InputType] = {}
-        for inp, id in self.input_ids.items():
-            self.reverse_id_dict[id] = inp
+        reverse_id_dict : Dict[IdType, InputType] = {}
+        for inp, id in input_ids.items():
+            reverse_id_dict[id] = inp
+
+        self.input_ids = input_ids
+        self.input_offsets = input_offsets
+        self.input_amplitudes = input_amplitudes
+        self.input_epsilons = input_epsilons
+        self.reverse_id_dict = reverse_id_dict
         self.fast_id_finding = True
+        # also invalidates the dispatch table
+        self.smoothing_epsilon = kwargs.get("smoothing_epsilon", 0)
     
     def is_input_valid(self, input: InputType) -> bool:
         return input in self.INPUTS
@@ -282,6 +981,11 @@ class FixedInputListHandler(HandlerCore[EventType, IdType, InputType], metaclass
     def get_input_amplitude(self, input: InputType) -> float:
         self.enforce_valid_input(input)
         return self.input_amplitudes[input]
+
+    def get_input_epsilon(self, input: InputType) -> float:
+        self.enforce_valid_input(input)
+        epsilon = self.input_epsilons[input]
+        return self.smoothing_epsilon if epsilon is None else epsilon
     
     def find_input(self, id: IdType) -> InputType:
         """
@@ -297,3 +1001,29 @@ class FixedInputListHandler(HandlerCore[EventType, IdType, InputType], metaclass
     
     def get_input_name(self, input: InputType) -> str:
         return self.INPUTS[input]
+
+    def _dispatch_callbacks(self, input: InputType) -> List[Callable[[EventInfo], Any]]:
+        """
+        Overrides parent method
+        """
+        callbacks = super()._dispatch_callbacks(input)
+        if self.state is not None:
+            callbacks.insert(0, self.state.update)
+        return callbacks
+
+    def emit_signal(self, event_info: EventInfo) -> None:
+        """
+        Overrides parent method to keep the state vector up to date
+        """
+        if self.state is not None:
+            self.state.update(event_info)
+        super().emit_signal(event_info)
+
+    def snapshot(self) -> Any:
+        """
+        Zero-copy view of the current value of every input, indexed by input (see InputStateVector.snapshot).
+        Other processes can open a "shared" state buffer with InputStateVector.attach(handler.state.name, len(snapshot)).
+        """
+        if self.state is None:
+            raise ValueError(f"'{self.__class__.__name__}' was created without a state buffer")
+        return self.state.snapshot()
@@ -1,14 +1,29 @@
 from .flow_core import *
+from .hotplug import DeviceMonitor
+from .profiles import DeviceProfile, ProfileDatabase, default_database
 import evdev
 import evdev.events
+import select
+import threading
 import time
 
+if TYPE_CHECKING:
+    from .ring import ProcessReader
+
+
+# options of GamepadHandler that aren't given to the handler of the child process of process_reader
+PROCESS_READER_LOCAL_OPTIONS = ("source", "device_id", "compiled_dispatch", "state_buffer", "state_buffer_name")
+
+
+class _KnownDeviceNames:
+    def __get__(self, instance: Any, owner: type) -> frozenset:
+        return frozenset(owner.get_profile_database().names())
+
 
 class GamepadHandler(FixedInputListHandler[evdev.events.InputEvent, int, int]):
     """
     Handler for a gamepad using the evdev package
     """
-    # TODO: make a virtual gamepad handler
     # TODO: create an interface for the touchpad
     NULL = -1
     TRIANGLE = 0
@@ -35,23 +50,215 @@ class GamepadHandler(FixedInputListHandler[evdev.events.InputEvent, int, int]):
     BUTTONS = {TRIANGLE: "triangle", SQUARE: "square", CIRCLE: "circle", CROSS: "cross", L1: "L1", R1: "R1", L3: "L3", R3: "R3", CREATE: "create", OPTIONS: "options", PS: "PS", TOUCHPAD: "touchpad"}
     ANALOG_TRIGGERS = {RH: "RH", RV: "RV", LH: "LH", LV: "LV", L2: "L2", R2: "R2", DIRH: "dirH", DIRV: "dirV"}
     INPUTS = {NULL: "NULL"} | BUTTONS | ANALOG_TRIGGERS
+    # pairs of axes (horizontal, vertical) of the sticks, for radial deadzones (see calibration.Calibrator)
+    STICKS = ((LH, LV), (RH, RV))
+    # axes going from 0 (released) to 1 instead of -1 to 1
+    TRIGGERS = (L2, R2)
+    # sign of the amplitude of the axes when it isn't given by a profile, for auto calibration (up is the minimum of vertical axes)
+    AXIS_SIGNS = {LV: -1, RV: -1}
     DEFAULT_IDS = {L1: 310, R1: 311, L2: 2, R2: 5, PS: 316, LH: 0, LV: 1, RH: 3, RV: 4, DIRH: 16, DIRV: 17, TRIANGLE: 307, SQUARE: 308, CIRCLE: 305, CROSS: 304}
 
-    KNOWN_DEVICES = {
-        "Generic X-Box pad",
-        "Wireless Controller",
-        "Sony Interactive Entertainment Wireless Controller",
-        "Xbox Wireless Controller",
-        "SZMY-POWER CO.,LTD. PLAYSTATION(R)3 Controller",
-        "QIXIONG PC Gamepad",
-        "PC Gamepad",
-        "QIXIONG",
-    }
-
-    def __init__(self, **kwargs):
-        self.device = self.connect()
-        kwargs |= self._get_additional_init_kwords()
+    # evdev timestamps are on CLOCK_REALTIME by default
+    # (converted to the monotonic clock for the event infos, with an offset measured again on attach and resync, see sync_clock)
+    event_clock_ns = staticmethod(time.time_ns)
+
+    # names of the devices of the profile database (see profiles.py), read on first access
+    KNOWN_DEVICES = _KnownDeviceNames()
+
+    def __init__(
+            self,
+            frame_mode: bool = False,
+            device: evdev.InputDevice = None,
+            wait_for_device: bool = True,
+            resync: bool = False,
+            auto_calibrate: bool = False,
+            process_reader: bool = False,
+            ring_capacity: int = 4096,
+            **kwargs
+        ):
+        """
+        :param frame_mode: deliver events by frame (see _handle_event_framed)
+        :param resync: recover from SYN_DROPPED (kernel buffer overflow) by querying the state of the device (see _handle_event_resyncing),
+            at the cost of keeping track of the state of the inputs on every event
+        :param device: the device to use, by default the first known device found (see connect)
+        :param wait_for_device: if False and no device is given, don't wait for a device:
+            the handler attaches to the first known device plugged in later (see watch_devices)
+            (neither happens with a source, see sources.MemoryEventSource, or sources.UInputGamepad for a virtual device)
+        :param auto_calibrate: derive the offsets, amplitudes and epsilons of the axes from the ranges reported by the device
+            (see absinfo_calibration), and also accept unknown devices that look like gamepads
+        :param process_reader: read, decode and calibrate the events of the device in a child process, so that reading isn't slowed down
+            by the binded functions (see ring.ProcessReader): read_inputs then takes the values from a ring buffer in shared memory
+            and calls the binded functions. Event taps, instrumentation and frame mode are not available in this mode
+        :param ring_capacity: number of events the ring buffer of process_reader holds (a power of 2)
+        :param kwargs: see FixedInputListHandler
+        """
+        if process_reader and frame_mode:
+            raise ValueError("frame_mode is not available with process_reader")
+        self.auto_calibrate = auto_calibrate
+        self.process_reader = process_reader
+        self.ring_capacity = ring_capacity
+        self._process_reader : "ProcessReader" = None
+        self._init_kwargs = dict(kwargs)
+        self._attached = threading.Event()
+        self.monitor : DeviceMonitor = None
+        source = kwargs.get("source")
+        if device is None and wait_for_device and source is None:
+            device = self.connect()
+        self.device = device
+        if device is not None:
+            kwargs |= self._get_additional_init_kwords()
+            self._attached.set()
+        # events of the frame being read, until the next SYN_REPORT
+        self._frame_buttons : List[EventInfo] = []
+        self._frame_axes : Dict[int, EventInfo] = {}
+        self._frame_mode = frame_mode
+        # last raw value of every key and absolute axis seen, by code, and whether events are being dropped until the next SYN_REPORT
+        self._key_state : Dict[int, int] = {}
+        self._abs_state : Dict[int, int] = {}
+        self._dropping = False
+        self._resync = resync
+        self._reset_state(device)
         super().__init__(**kwargs)
+        if device is None and source is None:
+            self.watch_devices()
+
+    @property
+    def frame_mode(self) -> bool:
+        return self._frame_mode
+
+    @frame_mode.setter
+    def frame_mode(self, enabled: bool) -> None:
+        self._frame_mode = bool(enabled)
+        self._frame_buttons = []
+        self._frame_axes = {}
+        self._install_dispatch()
+
+    def _select_dispatch(self) -> Callable[[evdev.events.InputEvent], None]:
+        """
+        Overrides parent method
+        """
+        if self._frame_mode:
+            dispatch = self._handle_event_framed
+        else:
+            dispatch = super()._select_dispatch()
+        if not self._resync:
+            return dispatch
+        return self._handle_event_resyncing(dispatch)
+
+    def _handle_event_resyncing(self, dispatch: Callable[[evdev.events.InputEvent], None]) -> Callable[[evdev.events.InputEvent], None]:
+        """
+        Stage of the dispatch keeping track of the state of keys and axes, and when the kernel reports lost events (SYN_DROPPED),
+        dropping the events up to the next SYN_REPORT then handling synthetic events for the inputs whose state changed (see resync).
+        :param dispatch: the handling of the events otherwise
+        """
+        EV_KEY, EV_ABS, EV_SYN = evdev.ecodes.EV_KEY, evdev.ecodes.EV_ABS, evdev.ecodes.EV_SYN
+        SYN_DROPPED, SYN_REPORT = evdev.ecodes.SYN_DROPPED, evdev.ecodes.SYN_REPORT
+        key_state = self._key_state
+        abs_state = self._abs_state
+
+        def handle_event(event: evdev.events.InputEvent) -> None:
+            type = event.type
+            if self._dropping:
+                if type == EV_SYN and event.code == SYN_REPORT:
+                    self._dropping = False
+                    # through the installed handle_event, so that taps and instrumentation see the synthetic events
+                    self.resync()
+                return
+            if type == EV_KEY:
+                # autorepeat (2) is still a pressed key, as reported by active_keys
+                key_state[event.code] = 1 if event.value else 0
+            elif type == EV_ABS:
+                abs_state[event.code] = event.value
+            elif type == EV_SYN and event.code == SYN_DROPPED:
+                self._dropping = True
+                return
+            dispatch(event)
+
+        return handle_event
+
+    def _reset_state(self, device: evdev.InputDevice) -> None:
+        """
+        Forget the state of the keys and axes of the previous device (see _handle_event_resyncing),
+        the axes start at their current position so that a resync only reports the ones that moved
+        """
+        # cleared in place, the resyncing stage of the dispatch keeps references to them
+        self._key_state.clear()
+        self._abs_state.clear()
+        self._dropping = False
+        if self._resync and device is not None:
+            absinfos = device.capabilities(absinfo=True).get(evdev.ecodes.EV_ABS, ())
+            self._abs_state.update((code, absinfo.value) for code, absinfo in absinfos)
+
+    def resync(self, dispatch: Callable[[evdev.events.InputEvent], None] = None) -> None:
+        """
+        Query the current state of the keys and absolute axes of the device in bulk,
+        and handle a synthetic event for every input whose state differs from the last event seen (followed by a SYN_REPORT).
+        :param dispatch: what handles the synthetic events, handle_event by default
+        """
+        device = self.device
+        if device is None:
+            return
+        if dispatch is None:
+            dispatch = self.handle_event
+        self.sync_clock()
+        capabilities = device.capabilities(absinfo=False)
+        now = self.event_clock_ns()
+        sec, usec = now // 1_000_000_000, now % 1_000_000_000 // 1000
+        changes = []
+        active_keys = set(device.active_keys())
+        for code in capabilities.get(evdev.ecodes.EV_KEY, ()):
+            value = 1 if code in active_keys else 0
+            if self.find_input(code) != self.NULL and self._key_state.get(code, 0) != value:
+                changes.append((evdev.ecodes.EV_KEY, code, value))
+                self._key_state[code] = value
+        for code in capabilities.get(evdev.ecodes.EV_ABS, ()):
+            value = device.absinfo(code).value
+            if self.find_input(code) != self.NULL and self._abs_state.get(code) != value:
+                changes.append((evdev.ecodes.EV_ABS, code, value))
+                self._abs_state[code] = value
+        if not changes:
+            return
+        for type, code, value in changes:
+            dispatch(evdev.events.InputEvent(sec, usec, type, code, value))
+        dispatch(evdev.events.InputEvent(sec, usec, evdev.ecodes.EV_SYN, evdev.ecodes.SYN_REPORT, 0))
+
+    def _handle_event_framed(self, event: evdev.events.InputEvent) -> None:
+        """
+        Frame mode: events are collected until the SYN_REPORT closing their frame,
+        keeping only the last value of each axis, then the binded functions are called and
+        the functions binded with bind_frame get the values of all the inputs of the frame at once.
+        """
+        if event.type == evdev.ecodes.EV_SYN:
+            if event.code == evdev.ecodes.SYN_REPORT:
+                self._flush_frame()
+            return
+        if not self.valid_event(event):
+            return
+        event_info = self.get_event_info(event)
+        if event_info.input == self.NULL:
+            return
+        # kept until the end of the frame
+        event_info = event_info.retained()
+        if event.type == evdev.ecodes.EV_ABS:
+            self._frame_axes[event_info.input] = event_info
+        else:
+            self._frame_buttons.append(event_info)
+
+    def _flush_frame(self) -> None:
+        buttons = self._frame_buttons
+        axes = self._frame_axes
+        if not buttons and not axes:
+            return
+        self._frame_buttons = []
+        self._frame_axes = {}
+        frame : Dict[int, float] = {}
+        for event_info in buttons:
+            self.emit_signal(event_info)
+            frame[event_info.input] = event_info.event_value
+        for event_info in axes.values():
+            self.emit_signal(event_info)
+            frame[event_info.input] = event_info.event_value
+        self.emit_frame(frame)
         
     def valid_event(self, event: evdev.events.InputEvent) -> bool:
         """
@@ -72,6 +279,25 @@ class GamepadHandler(FixedInputListHandler[evdev.events.InputEvent, int, int]):
         """
         return event.value
     
+    def get_event_timestamp_ns(self, event: evdev.events.InputEvent) -> int:
+        """
+        Overrides parent method: kernel timestamp of the event
+        """
+        return event.sec * 1_000_000_000 + event.usec * 1000
+
+    def encode_event(self, event: evdev.events.InputEvent) -> Tuple[int, int, int]:
+        """
+        Overrides parent method
+        """
+        return event.type, event.code, event.value
+
+    def decode_event(self, timestamp_ns: int, type: int, code: int, value: int) -> evdev.events.InputEvent:
+        """
+        Overrides parent method
+        """
+        sec, nsec = divmod(timestamp_ns, 1_000_000_000)
+        return evdev.events.InputEvent(sec, nsec // 1000, type, code, value)
+
     def make_input(self, input_like: str | int) -> int:
         if isinstance(input_like, int):
             return input_like
@@ -82,199 +308,253 @@ class GamepadHandler(FixedInputListHandler[evdev.events.InputEvent, int, int]):
         except AttributeError as e:
             raise ValueError(f"Unable to interpret '{input_like}' as a gamepad input") from e
     
+    @classmethod
+    def get_profile_database(cls) -> ProfileDatabase:
+        """
+        Override to use other device profiles
+        """
+        return default_database()
+
+    @classmethod
+    def get_profile(cls, device: evdev.InputDevice) -> DeviceProfile:
+        """
+        The profile of the device, found by its ids or its name (None if it is unknown)
+        """
+        return cls.get_profile_database().find(device)
+
+    @classmethod
+    def is_known_device(cls, device: evdev.InputDevice) -> bool:
+        return cls.get_profile(device) is not None
+
+    @classmethod
+    def is_gamepad(cls, device: evdev.InputDevice) -> bool:
+        """
+        Whether the device looks like a gamepad (gamepad buttons and at least one stick), known or not
+        """
+        capabilities = device.capabilities(absinfo=False)
+        keys = capabilities.get(evdev.ecodes.EV_KEY, ())
+        axes = capabilities.get(evdev.ecodes.EV_ABS, ())
+        return evdev.ecodes.BTN_GAMEPAD in keys and evdev.ecodes.ABS_X in axes and evdev.ecodes.ABS_Y in axes
+
+    def _match_device(self, device: evdev.InputDevice) -> bool:
+        if self.is_known_device(device):
+            return True
+        if self.auto_calibrate and self.is_gamepad(device):
+            print(f"Found unknown gamepad device [{device}], using auto calibration")
+            return True
+        print(f"Found unknown gamepad device [{device}]")
+        return False
+
     def connect(self) -> evdev.InputDevice:
+        """
+        Wait for a known device to be plugged in (returns right away if there is one already)
+        """
         print("connecting to gamepad...")
-        while True:
-            for device in map(evdev.InputDevice, evdev.list_devices()):
-                if device.name.strip() not in self.KNOWN_DEVICES:
-                    print(f"Found unknown gamepad device [{device}]")
-                    continue
-                print(f"Will connect to gamepad device [{device}]")
-                return device
-            time.sleep(1)
+        found : List[evdev.InputDevice] = []
+        monitor = DeviceMonitor(found.append, match=self._match_device)
+        try:
+            monitor.scan()
+            while not found:
+                monitor.poll()
+        finally:
+            monitor.close()
+        for device in found[1:]:
+            device.close()
+        print(f"Will connect to gamepad device [{found[0]}]")
+        return found[0]
+
+    def attach(self, device: evdev.InputDevice) -> None:
+        """
+        Start using a new device, with its own config
+        """
+        self.device = device
+        self._reset_state(device)
+        self.sync_clock()
+        self.configure(**(self._init_kwargs | self._get_additional_init_kwords()))
+        print(f"Will connect to gamepad device [{device}]")
+        self._attached.set()
+
+    def detach(self, device: evdev.InputDevice = None) -> None:
+        """
+        Stop using the current device (only if it is the given device, when one is given)
+        """
+        current = self.device
+        if current is None or (device is not None and device is not current):
+            return
+        self._attached.clear()
+        self.device = None
+        try:
+            current.close()
+        except OSError:
+            pass
+
+    def watch_devices(self) -> None:
+        """
+        Watch the devices plugged in and out (see hotplug.DeviceMonitor), in a background thread:
+        the handler attaches to the first known device plugged in when it has none, and detaches from it when it is unplugged.
+        read_inputs waits while there is no device.
+        """
+        if self.monitor is not None:
+            return
+        self.monitor = DeviceMonitor(self._on_device_connected, self._on_device_disconnected, match=self._match_device)
+        self.monitor.background_loop()
+
+    def _on_device_connected(self, device: evdev.InputDevice) -> None:
+        if self.device is None:
+            self.attach(device)
+        else:
+            device.close()
+
+    def _on_device_disconnected(self, path: str) -> None:
+        device = self.device
+        if device is not None and device.path == path:
+            print(f"Lost gamepad device [{device}]")
+            self.detach(device)
+
+    def events(self, maxsize: int = 1024, policy: str = "drop_oldest") -> "aio.EventStream":
+        """
+        Overrides parent method: the device is read on the event loop (evdev async_read_loop), without any thread.
+        Don't use together with loop or background_loop.
+        Without a device to read in this process (no device yet, a source, or process_reader), this is the parent method:
+        the events still need to be read by a thread (background_loop).
+        """
+        if self.device is None or self.source is not None or self.process_reader:
+            return super().events(maxsize, policy)
+        from . import aio
+        return aio.DeviceEventStream(self, maxsize, policy)
+
+    @classmethod
+    def find_devices(cls, include_unknown: bool = False) -> List[evdev.InputDevice]:
+        """
+        All the known gamepad devices currently plugged in
+        :param include_unknown: also include the unknown devices that look like gamepads (see is_gamepad, auto_calibrate)
+        """
+        devices = []
+        for device in map(evdev.InputDevice, evdev.list_devices()):
+            if cls.is_known_device(device) or (include_unknown and cls.is_gamepad(device)):
+                devices.append(device)
+            else:
+                device.close()
+        return devices
 
     def read_inputs(self) -> None:
         """
         Overrides parent method
         """
+        if self.source is not None:
+            # wake up for the values held back by the change filters
+            self.read_source(self.flush_change_filters())
+            return
+        self._attached.wait()
+        device = self.device
+        if self.process_reader:
+            self._read_process(device)
+            return
         try:
-            for event in self.device.read_loop():
-                self.handle_event(event)
+            while True:
+                # like device.read_loop, waking up for the values held back by the change filters
+                if select.select([device.fd], [], [], self.flush_change_filters())[0]:
+                    for event in device.read():
+                        self.handle_event(event)
 
         except (TypeError, IOError) as e:
-            raise
+            if self.monitor is None:
+                raise
+            # wait for the device to be plugged back in
+            self.detach(device)
     
-    def _get_additional_init_kwords(self) -> Dict[str, int]:
-        """
-        Get custom parameters corresponding to the detected device (returns empty dict if the device name is not known)
-        """
-        if self.device.name == "Generic X-Box pad":
-            return {
-                "circle_id": 305,
-                "triangle_id": 308,
-                "square_id": 307,
-                "cross_id": 304,
-                "RH_amplitude": 2**15,
-                "RV_amplitude": -2**15,
-                "LH_amplitude": 2**15,
-                "LV_amplitude": -2**15,
-                "R2_amplitude": 2**8,
-                "L2_amplitude": 2**8
-            }
-        elif self.device.name == "Wireless Controller":
-            return {
-                "circle_id": 305,
-                "triangle_id": 307,
-                "square_id": 308,
-                "cross_id": 304,
-                "RH_offset": 2**7,
-                "RV_offset": 2**7,
-                "LH_offset": 2**7,
-                "LV_offset": 2**7,
-                "RH_amplitude": 2**7,
-                "RV_amplitude": -2**7,
-                "LH_amplitude": 2**7,
-                "LV_amplitude": -2**7,
-                "R2_amplitude": 2**8,
-                "L2_amplitude": 2**8
-            }
-        elif self.device.name == "Sony Interactive Entertainment Wireless Controller":
-            return {
-                "circle_id": 305,
-                "triangle_id": 307,
-                "square_id": 308,
-                "cross_id": 304,
-                "RH_offset": 2**7,
-                "RV_offset": 2**7,
-                "LH_offset": 2**7,
-                "LV_offset": 2**7,
-                "RH_amplitude": 2**7,
-                "RV_amplitude": -2**7,
-                "LH_amplitude": 2**7,
-                "LV_amplitude": -2**7,
-                "R2_amplitude": 2**8,
-                "L2_amplitude": 2**8
-            }
-        elif self.device.name == "Xbox Wireless Controller":
-            return {
-                "circle_id": 305, #B
-                "triangle_id": 308, #Y
-                "square_id": 307, #X
-                "cross_id": 304, #A
-
-                "RH_id":2,
-                "RV_id":5,
-                "LH_id":0,
-                "LV_id":1,
-                "RH_offset": 2**15,
-                "RV_offset": 2**15,
-                "LH_offset": 2**15,
-                "LV_offset": 2**15,
-                "RH_amplitude": 2**15,
-                "RV_amplitude": -2**15,
-                "LH_amplitude": 2**15,
-                "LV_amplitude": -2**15,
-
-                "R2_id":9,
-                "L2_id":10,
-                "R2_amplitude": 2**10, #RT
-                "L2_amplitude": 2**10, #LT
-                "R2_offset": 0,
-                "L2_offset":0,
-
-                "PS_id":316,
-
-                "R1_id": 311, #RB
-                "L1_id": 310,#LB
-
-                "R3_id":318,
-                "L3_id":317, 
-
-                "dirH_amplitude":-1,
-                "dirV_amplitude":-1,
-                
-                "smoothing_epsilon": 0.1
-
-            }
-        
-        elif self.device.name == "SZMY-POWER CO.,LTD. PLAYSTATION(R)3 Controller":
-            return {
-                "circle_id": 305, #B
-                "triangle_id": 307, #Y
-                "square_id": 308, #X
-                "cross_id": 304, #A
-
-                "RH_id": 3,
-                "RV_id": 4,
-                "LH_id": 0,
-                "LV_id": 1,
-                "RH_offset": 128,
-                "RV_offset": 128,
-                "LH_offset": 128,
-                "LV_offset": 128,
-                "RH_amplitude": 128,
-                "RV_amplitude": -128,
-                "LH_amplitude": 128,
-                "LV_amplitude": -128,
-
-                "R2_id": 5,
-                "L2_id": 2,
-                "R2_amplitude": 255,
-                "L2_amplitude": 255,
-                "R2_offset": 0,
-                "L2_offset":0,
-
-                "PS_id":316,
-
-                "R1_id": 311,
-                "L1_id": 310,
-
-                "R3_id":318,
-                "L3_id":317, 
-
-                "dirH_amplitude":-1,
-                "dirV_amplitude":-1,
-                
-                "smoothing_epsilon": 0.1
-            }
-        
-        elif self.device.name in ("QIXIONG PC Gamepad", "PC Gamepad", "QIXIONG"):
-            return {
-                "circle_id": 305, #B
-                "triangle_id": 308, #Y
-                "square_id": 307, #X
-                "cross_id": 304, #A
-
-                "RH_id": 2,
-                "RV_id": 5,
-                "LH_id": 0,
-                "LV_id": 1,
-                "RH_offset": 128,
-                "RV_offset": 128,
-                "LH_offset": 128,
-                "LV_offset": 128,
-                "RH_amplitude": 128,
-                "RV_amplitude": -128,
-                "LH_amplitude": 128,
-                "LV_amplitude": -128,
-
-                "R2_id": 9,
-                "L2_id": 10,
-                "R2_amplitude": 255,
-                "L2_amplitude": 255,
-                "R2_offset": 0,
-                "L2_offset": 0,
-
-                "PS_id":316,
-
-                "R1_id": 311,
-                "L1_id": 310,
-
-                "R3_id":318,
-                "L3_id":317, 
-
-                "dirH_amplitude":-1,
-                "dirV_amplitude":-1,
-                
-                "smoothing_epsilon": 0.01
-            }
+    def _read_process(self, device: evdev.InputDevice) -> None:
+        """
+        read_inputs with process_reader: starts the child process reading the device if needed,
+        then handles the events it has read
+        """
+        reader = self._process_reader
+        if reader is None or reader.path != device.path:
+            from .ring import ProcessReader
+            # the device changed (see watch_devices)
+            self.stop_process_reader()
+            # the child process gets the same options, except the ones of the main process side (state, source, device id)
+            config = {key: value for key, value in self._init_kwargs.items() if key not in PROCESS_READER_LOCAL_OPTIONS}
+            config |= {"auto_calibrate": self.auto_calibrate, "resync": self._resync}
+            reader = self._process_reader = ProcessReader(device.path, config, self.ring_capacity)
+        timeout = self.flush_change_filters()
+        records = reader.read(timeout=1.0 if timeout is None else min(timeout, 1.0))
+        if records:
+            self.handle_records(records)
+        elif not reader.alive:
+            self.stop_process_reader()
+            if self.monitor is None:
+                raise IOError(f"Lost gamepad device [{device}]")
+            # wait for the device to be plugged back in
+            self.detach(device)
+
+    def handle_records(self, records: List[Tuple[int, float, int]]) -> None:
+        """
+        Call the binded functions for events already decoded by a ring.ProcessReader
+        :param records: (timestamp_ns, event value, input) of the events
+        """
+        make_event_info = self.make_event_info
+        emit_signal = self.emit_signal
+        device_id = self.device_id
+        filtered = bool(self.change_filters) or self._default_change_filter is not None
+        for timestamp_ns, event_value, input in records:
+            event_info = make_event_info(input, event_value, timestamp_ns, device_id)
+            if filtered:
+                change_filter = self.get_change_filter(input)
+                if change_filter is not None and not change_filter.accept(event_info):
+                    continue
+            emit_signal(event_info)
+
+    def stop_process_reader(self) -> None:
+        """
+        Stop the child process of process_reader (started again by the next read_inputs)
+        """
+        reader = self._process_reader
+        self._process_reader = None
+        if reader is not None:
+            reader.close()
+
+    def _get_additional_init_kwords(self) -> Dict[str, Any]:
+        """
+        Get custom parameters corresponding to the detected device, from its profile (returns empty dict if the device is not known)
+        and from the ranges of its axes with auto_calibrate
+        """
+        profile = self.get_profile(self.device)
+        config = dict(profile.config) if profile is not None else {}
+        if self.auto_calibrate:
+            calibration = self.absinfo_calibration(config)
+            # values given to the constructor are kept
+            config |= {key: value for key, value in calibration.items() if key not in self._init_kwargs}
+        return config
+
+    def absinfo_calibration(self, config: Dict[str, Any] = None) -> Dict[str, float]:
+        """
+        Offsets, amplitudes and epsilons of the analog axes of the device, derived from the range (min, max)
+        and the flat zone published by the kernel for every absolute axis:
+        centered axes are mapped to [-1, 1] and TRIGGERS to [0, 1], the epsilon of an axis covers its flat zone
+        (unless the config sets the epsilon of the axis or smoothing_epsilon).
+        :param config: the config of the device (ids and signs of the amplitudes, see AXIS_SIGNS for the default signs)
+        :return: keyword arguments for configure
+        """
+        if config is None:
+            config = {}
+        absinfos = dict(self.device.capabilities(absinfo=True).get(evdev.ecodes.EV_ABS, ()))
+        calibration = {}
+        for input, name in self.ANALOG_TRIGGERS.items():
+            code = config.get(f"{name}_id", self.DEFAULT_IDS[input])
+            absinfo = absinfos.get(code)
+            if absinfo is None or absinfo.max <= absinfo.min:
+                continue
+            amplitude = config.get(f"{name}_amplitude", self.AXIS_SIGNS.get(input, 1))
+            sign = -1 if amplitude < 0 else 1
+            if input in self.TRIGGERS:
+                offset = absinfo.min
+                half_range = absinfo.max - absinfo.min
+            else:
+                offset = (absinfo.min + absinfo.max) / 2
+                half_range = (absinfo.max - absinfo.min) / 2
+            calibration[f"{name}_offset"] = offset
+            calibration[f"{name}_amplitude"] = sign * half_range
+            if absinfo.flat > 0 and f"{name}_epsilon" not in config and "smoothing_epsilon" not in config:
+                calibration[f"{name}_epsilon"] = absinfo.flat / half_range
+        return calibration
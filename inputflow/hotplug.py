@@ -0,0 +1,276 @@
+from __future__ import annotations
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Dict, List, Set, Tuple
+
+
+INPUT_DIR = "/dev/input"
+
+
+class PollingDirectoryWatcher:
+    """
+    Watches the entries of a directory by listing it periodically (works anywhere, for instance on a temporary directory in tests)
+    """
+
+    def __init__(self, path: str = INPUT_DIR, interval: float = 1.0):
+        self.path = path
+        self.interval = interval
+        self._entries = set(self.list())
+
+    def list(self) -> List[str]:
+        try:
+            return sorted(os.listdir(self.path))
+        except FileNotFoundError:
+            return []
+
+    def snapshot(self) -> List[str]:
+        """
+        List the directory, the changes reported by the next wait are relative to this list
+        """
+        entries = self.list()
+        self._entries = set(entries)
+        return entries
+
+    def wait(self, timeout: float = None) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Wait for changes in the directory.
+        :param timeout: maximum waiting time in seconds (None to wait until something changes)
+        :return: the lists of names of the added, removed and modified entries (modifications are not detected by this watcher)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            entries = set(self.list())
+            added = sorted(entries - self._entries)
+            removed = sorted(self._entries - entries)
+            self._entries = entries
+            if added or removed:
+                return added, removed, []
+            if deadline is None:
+                time.sleep(self.interval)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return [], [], []
+            time.sleep(min(self.interval, remaining))
+
+    def fileno(self) -> int:
+        raise OSError("PollingDirectoryWatcher has no file descriptor")
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyDirectoryWatcher(PollingDirectoryWatcher):
+    """
+    Watches the entries of a directory with inotify (linux only), changes are reported as soon as they happen
+    """
+    IN_ATTRIB = 0x00000004
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = os.O_CLOEXEC
+    EVENT_HEADER = struct.Struct("iIII")
+
+    _libc = None
+
+    def __init__(self, path: str = INPUT_DIR):
+        libc = self._load_libc()
+        self.path = path
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CREATE | self.IN_DELETE | self.IN_ATTRIB | self.IN_MOVED_FROM | self.IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for '{path}'")
+
+    @classmethod
+    def _load_libc(cls) -> Any:
+        if cls._libc is None:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            if not hasattr(libc, "inotify_init1"):
+                raise OSError("inotify is not available")
+            cls._libc = libc
+        return cls._libc
+
+    def snapshot(self) -> List[str]:
+        """
+        Overrides parent method, inotify reports every change since the creation of the watcher
+        """
+        return self.list()
+
+    def wait(self, timeout: float = None) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Overrides parent method
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], [], []
+        added, removed, modified = [], [], []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return added, removed, modified
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                added.append(name)
+            elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                removed.append(name)
+            elif mask & self.IN_ATTRIB:
+                modified.append(name)
+        return added, removed, modified
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def make_directory_watcher(path: str = INPUT_DIR) -> PollingDirectoryWatcher:
+    """
+    An inotify watcher if possible, a polling watcher otherwise
+    """
+    try:
+        return InotifyDirectoryWatcher(path)
+    except OSError:
+        return PollingDirectoryWatcher(path)
+
+
+class DeviceMonitor:
+    """
+    Keeps track of the input devices plugged in, using a directory watcher (by default on /dev/input).
+    Only new device nodes are opened, their names are cached by path,
+    the devices accepted by the match function are kept open and given to on_connect, the others are closed right away.
+    on_disconnect gets the path of a connected device that was removed.
+    A node that can't be opened yet is retried when its attributes change, and otherwise after a growing delay.
+    """
+    # delay (seconds) before retrying to open a node, doubled after each failure up to MAX_RETRY_DELAY
+    RETRY_DELAY = 0.5
+    MAX_RETRY_DELAY = 30.0
+
+    def __init__(
+            self,
+            on_connect: Callable[[Any], None] = None,
+            on_disconnect: Callable[[str], None] = None,
+            match: Callable[[Any], bool] = None,
+            watcher: PollingDirectoryWatcher = None,
+            open_device: Callable[[str], Any] = None,
+            pattern: str = "event*"
+        ):
+        """
+        :param on_connect: function called with every new matching device
+        :param on_disconnect: function called with the path of every removed matching device
+        :param match: which devices to keep (all by default)
+        :param watcher: the directory watcher (see make_directory_watcher)
+        :param open_device: function opening the device at a path (evdev.InputDevice by default)
+        :param pattern: pattern of the names of the device nodes
+        """
+        if open_device is None:
+            import evdev
+            open_device = evdev.InputDevice
+        self.on_connect = on_connect if on_connect is not None else lambda device: None
+        self.on_disconnect = on_disconnect if on_disconnect is not None else lambda path: None
+        self.match = match if match is not None else lambda device: True
+        self.watcher = watcher if watcher is not None else make_directory_watcher()
+        self.open_device = open_device
+        self.pattern = pattern
+        # names of all the devices seen so far, by path
+        self.names : Dict[str, str] = {}
+        # paths of the matching devices
+        self.connected : Set[str] = set()
+        # nodes that couldn't be opened yet (permissions are usually set by udev right after creation)
+        # (retry delay, time of the next retry) by path
+        self.pending : Dict[str, Tuple[float, float]] = {}
+        self._running = False
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.watcher.path, name)
+
+    def scan(self) -> None:
+        """
+        Check all the devices currently in the directory (already known devices are not reopened)
+        """
+        # the watcher then only reports the changes after this scan
+        for name in self.watcher.snapshot():
+            if fnmatch.fnmatch(name, self.pattern) and self._path(name) not in self.names:
+                self._open(self._path(name))
+
+    def _open(self, path: str) -> None:
+        if path in self.names:
+            # already opened, reported again by the watcher (a node created during the scan for instance)
+            return
+        try:
+            device = self.open_device(path)
+        except OSError:
+            delay, _ = self.pending.get(path, (self.RETRY_DELAY / 2, 0.0))
+            delay = min(delay * 2, self.MAX_RETRY_DELAY)
+            self.pending[path] = (delay, time.monotonic() + delay)
+            return
+        self.pending.pop(path, None)
+        self.names[path] = device.name
+        if not self.match(device):
+            device.close()
+            return
+        self.connected.add(path)
+        self.on_connect(device)
+
+    def _remove(self, path: str) -> None:
+        self.names.pop(path, None)
+        self.pending.pop(path, None)
+        if path in self.connected:
+            self.connected.remove(path)
+            self.on_disconnect(path)
+
+    def poll(self, timeout: float = None) -> None:
+        """
+        Wait for changes in the directory (or for the timeout) and process them
+        """
+        added, removed, modified = self.watcher.wait(timeout)
+        for name in removed:
+            if fnmatch.fnmatch(name, self.pattern):
+                self._remove(self._path(name))
+        for name in added:
+            if fnmatch.fnmatch(name, self.pattern):
+                self._open(self._path(name))
+        for name in modified:
+            if self._path(name) in self.pending:
+                self._open(self._path(name))
+        now = time.monotonic()
+        for path, (_, retry_time) in list(self.pending.items()):
+            if retry_time <= now:
+                self._open(path)
+
+    def loop(self) -> None:
+        self._running = True
+        self.scan()
+        while self._running:
+            self.poll(1.0)
+
+    def background_loop(self, daemon: bool = True) -> None:
+        thread = threading.Thread(target=self.loop, daemon=daemon)
+        thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+
+    def close(self) -> None:
+        self.stop()
+        self.watcher.close()
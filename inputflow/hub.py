@@ -0,0 +1,138 @@
+from __future__ import annotations
+import selectors
+import threading
+from collections.abc import Callable
+from typing import Any, Dict, Iterable, List
+from .gamepad import GamepadHandler
+from .hotplug import DeviceMonitor
+
+
+class DeviceHub:
+    """
+    Reads the devices of many gamepad handlers from a single thread instead of one background_loop per handler:
+    the file descriptors of all the devices are multiplexed with selectors (epoll on linux),
+    and every ready device is read by non-blocking bursts and its events are dispatched to its handler.
+    Handlers should be added and removed before starting the loop, or from the thread of the loop.
+    With watch_devices, gamepads plugged in and out are also handled by the thread of the loop.
+    """
+
+    def __init__(self, handlers: Iterable[GamepadHandler] = (), burst: int = 8):
+        """
+        :param handlers: the handlers to read
+        :param burst: maximum number of reads (of up to 64 events each) per ready device and per poll, so that a busy device cannot starve the others
+        """
+        self.selector = selectors.DefaultSelector()
+        self.handlers : List[GamepadHandler] = []
+        self.burst = burst
+        self.monitor : DeviceMonitor = None
+        self._watch_interval : float = None
+        for handler in handlers:
+            self.add(handler)
+
+    @classmethod
+    def connect_all(cls, **kwargs) -> DeviceHub:
+        """
+        Create a hub with one handler for each known gamepad currently plugged in.
+        :param kwargs: arguments given to every GamepadHandler (with auto_calibrate, unknown gamepads are also included)
+        """
+        devices = GamepadHandler.find_devices(include_unknown=kwargs.get("auto_calibrate", False))
+        return cls(GamepadHandler(device=device, **kwargs) for device in devices)
+
+    def add(self, handler: GamepadHandler) -> None:
+        self.selector.register(handler.device.fd, selectors.EVENT_READ, handler)
+        self.handlers.append(handler)
+
+    def remove(self, handler: GamepadHandler) -> None:
+        """
+        Stop reading a handler, and close its device
+        """
+        if handler not in self.handlers:
+            return
+        self.selector.unregister(handler.device.fd)
+        self.handlers.remove(handler)
+        try:
+            handler.device.close()
+        except OSError:
+            # already gone
+            pass
+
+    def watch_devices(self, on_connect: Callable[[GamepadHandler], Any] = None, **kwargs) -> None:
+        """
+        Create a handler for every known gamepad plugged in from now on, and remove the handlers of unplugged gamepads.
+        The device directory is watched by the thread of the hub (see hotplug.DeviceMonitor).
+        :param on_connect: function called with every new handler, to bind its inputs
+        :param kwargs: arguments given to every new GamepadHandler
+        """
+        self._on_connect = on_connect if on_connect is not None else lambda handler: None
+        self._handler_kwargs : Dict[str, Any] = kwargs
+        self.monitor = DeviceMonitor(self._on_device_connected, self._on_device_disconnected, match=self._device_matcher(kwargs))
+        for handler in self.handlers:
+            self.monitor.names[handler.device.path] = handler.device.name
+            self.monitor.connected.add(handler.device.path)
+        try:
+            self.selector.register(self.monitor.watcher.fileno(), selectors.EVENT_READ, self.monitor)
+        except OSError:
+            self._watch_interval = self.monitor.watcher.interval
+        self.monitor.scan()
+
+    @staticmethod
+    def _device_matcher(kwargs: Dict[str, Any]) -> Callable[[Any], bool]:
+        """
+        The devices the handlers created with kwargs can read: known gamepads, and unknown ones with auto_calibrate
+        """
+        if kwargs.get("auto_calibrate", False):
+            return lambda device: GamepadHandler.is_known_device(device) or GamepadHandler.is_gamepad(device)
+        return GamepadHandler.is_known_device
+
+    def _on_device_connected(self, device: Any) -> None:
+        handler = GamepadHandler(device=device, **self._handler_kwargs)
+        self.add(handler)
+        self._on_connect(handler)
+
+    def _on_device_disconnected(self, path: str) -> None:
+        for handler in self.handlers:
+            if handler.device.path == path:
+                print(f"Lost gamepad device [{handler.device}]")
+                self.remove(handler)
+                return
+
+    def poll(self, timeout: float = None) -> int:
+        """
+        Wait for at least one device to be ready (or for the timeout) and dispatch the events of all the ready devices.
+        Handlers whose device was unplugged are removed.
+        :return: the number of events read
+        """
+        count = 0
+        # wake up for the values held back by the change filters of the handlers
+        for handler in self.handlers:
+            delay = handler.flush_change_filters()
+            if delay is not None:
+                timeout = delay if timeout is None else min(timeout, delay)
+        if self._watch_interval is not None:
+            timeout = self._watch_interval if timeout is None else min(timeout, self._watch_interval)
+            self.monitor.poll(0)
+        for key, _ in self.selector.select(timeout):
+            if key.data is self.monitor:
+                self.monitor.poll(0)
+                continue
+            handler = key.data
+            device = handler.device
+            try:
+                for _ in range(self.burst):
+                    for event in device.read():
+                        handler.handle_event(event)
+                        count += 1
+            except BlockingIOError:
+                pass
+            except OSError:
+                print(f"Lost gamepad device [{device}]")
+                self.remove(handler)
+        return count
+
+    def loop(self) -> None:
+        while True:
+            self.poll()
+
+    def background_loop(self, daemon: bool = True) -> None:
+        thread = threading.Thread(target=self.loop, daemon=daemon)
+        thread.start()
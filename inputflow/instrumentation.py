@@ -0,0 +1,185 @@
+from __future__ import annotations
+import time
+from collections.abc import Callable
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .flow_core import HandlerCore, EventInfo
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of durations in nanoseconds: log-linear buckets with a relative precision of 2**-(SIGNIFICANT_BITS - 1),
+    so recording is a few integer operations and a list increment.
+    Not locked: there must be a single writer (the reading thread of the handler), readers get an approximate snapshot.
+    """
+    SIGNIFICANT_BITS = 5
+    MAX_VALUE = 2**40   # about 18 minutes, larger values are clamped
+
+    def __init__(self):
+        half = 1 << (self.SIGNIFICANT_BITS - 1)
+        self.counts : List[int] = [0] * (self._index(self.MAX_VALUE) + 1)
+        self._half = half
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        shift = value.bit_length() - cls.SIGNIFICANT_BITS
+        if shift <= 0:
+            return value
+        return (shift << (cls.SIGNIFICANT_BITS - 1)) + (value >> shift)
+
+    def _lower_bound(self, index: int) -> int:
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        return (index - shift * self._half) << shift
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+        elif value > self.MAX_VALUE:
+            value = self.MAX_VALUE
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def percentile(self, percent: float) -> int:
+        """
+        Lower bound of the bucket of the given percentile (0 if the histogram is empty)
+        """
+        counts = list(self.counts)
+        total = sum(counts)
+        if total == 0:
+            return 0
+        rank = percent / 100 * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if count and seen >= rank:
+                return self._lower_bound(index)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "min_ns": self.min if self.min is not None else 0,
+            "mean_ns": self.total / self.count if self.count else 0.0,
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+            "p999_ns": self.percentile(99.9),
+            "max_ns": self.max,
+        }
+
+    def reset(self) -> None:
+        self.__init__()
+
+
+def callback_name(func: Callable) -> str:
+    """
+    Name of the function wrapped by a binded callable (EventFuncWrapper, ScheduledCall, functools.partial), by qualified name
+    """
+    while True:
+        # ScheduledCall wraps an EventFuncWrapper, which wraps the function
+        inner = getattr(func, "wrapper", None) or getattr(func, "func", None)
+        if inner is None:
+            break
+        func = inner
+    name = getattr(func, "__qualname__", None) or repr(func)
+    module = getattr(func, "__module__", None)
+    return f"{module}.{name}" if module else name
+
+
+class HandlerInstrumentation:
+    """
+    Latency histograms of a handler (see HandlerCore.enable_instrumentation):
+        kernel_to_dispatch: from the timestamp of the event (given by the device, see HandlerCore.get_event_timestamp_ns) to its reception by handle_event
+        handle_event: time spent in handle_event, binded functions included
+        callbacks: time spent in every binded function, by function name
+    """
+
+    def __init__(self, handler: HandlerCore):
+        self.handler = handler
+        self.kernel_to_dispatch = LatencyHistogram()
+        self.handle_event = LatencyHistogram()
+        self.callbacks : Dict[str, LatencyHistogram] = {}
+
+    def callback_histogram(self, func: Callable) -> LatencyHistogram:
+        name = callback_name(func)
+        histogram = self.callbacks.get(name)
+        if histogram is None:
+            histogram = self.callbacks.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def wrap_dispatch(self, dispatch: Callable[[Any], None]) -> Callable[[Any], None]:
+        handler = self.handler
+        clock = handler.event_clock_ns
+        get_event_timestamp_ns = handler.get_event_timestamp_ns
+        perf_counter_ns = time.perf_counter_ns
+        record_delay = self.kernel_to_dispatch.record
+        record_duration = self.handle_event.record
+
+        def handle_event(event: Any) -> None:
+            received = clock()
+            start = perf_counter_ns()
+            record_delay(received - get_event_timestamp_ns(event))
+            dispatch(event)
+            record_duration(perf_counter_ns() - start)
+
+        return handle_event
+
+    def wrap_callback(self, func: Callable[[EventInfo], Any], binded: Callable = None) -> Callable[[EventInfo], Any]:
+        """
+        :param func: the function to time
+        :param binded: the function named in the stats, if different from func (for instance an EventFuncWrapper for its invoke function)
+        """
+        record = self.callback_histogram(binded if binded is not None else func).record
+        perf_counter_ns = time.perf_counter_ns
+
+        def timed(event_info: EventInfo) -> Any:
+            start = perf_counter_ns()
+            try:
+                return func(event_info)
+            finally:
+                record(perf_counter_ns() - start)
+
+        return timed
+
+    def wrap_emit_signal(self) -> Callable[[EventInfo], None]:
+        """
+        Replacement of handler.emit_signal timing every binded function
+        """
+        handler = self.handler
+        # timed callbacks by input, built on the first event of each input like the compiled dispatch table,
+        # and dropped with it when the bindings change (see HandlerCore.invalidate_dispatch)
+        timed_callbacks : Dict[Any, Tuple[Callable[[EventInfo], Any], ...]] = {}
+        table = handler._dispatch_table
+
+        def emit_signal(event_info: EventInfo) -> None:
+            nonlocal timed_callbacks, table
+            if handler._dispatch_table is not table:
+                timed_callbacks, table = {}, handler._dispatch_table
+            try:
+                callbacks = timed_callbacks[event_info.input]
+            except KeyError:
+                callbacks = tuple(handler._compile_callback(func) for func in handler._dispatch_callbacks(event_info.input))
+                timed_callbacks[event_info.input] = callbacks
+            for func in callbacks:
+                func(event_info)
+
+        return emit_signal
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kernel_to_dispatch": self.kernel_to_dispatch.summary(),
+            "handle_event": self.handle_event.summary(),
+            "callbacks": {name: histogram.summary() for name, histogram in list(self.callbacks.items())},
+        }
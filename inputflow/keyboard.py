@@ -1,16 +1,31 @@
 from .flow_core import *
+from .chords import ChordMatcher
 from typing import Any
 import enum
+import functools
+import threading
+import time
 import pynput.keyboard as kbrd
 
 
+# event types used by encode_event
+KEY_BY_VK = 1
+KEY_BY_CHAR = 2
+
+
 class KeyAction(enum.Enum):
     PRESS = 0
     RELEASE = 1
 
 
 class PynputKeyboardEvent:
-    def __init__(self, key: kbrd.KeyCode | kbrd.Key, action: KeyAction):
+    __slots__ = ("key", "action", "timestamp_ns")
+
+    def __init__(self, key: kbrd.KeyCode | kbrd.Key, action: KeyAction, timestamp_ns: int = None):
+        """
+        :param timestamp_ns: time of the event on the monotonic clock, by default now (pynput gives no timestamp,
+            so events from the listener are stamped when its callback runs)
+        """
         if isinstance(key, kbrd.KeyCode):
             _key = key
         elif isinstance(key, enum.Enum):
@@ -19,6 +34,7 @@ class PynputKeyboardEvent:
             raise ValueError(f"Invalid key '{key}'")
         self.key = _key
         self.action = action
+        self.timestamp_ns = time.monotonic_ns() if timestamp_ns is None else timestamp_ns
 
 
 def str_to_keycode(name: str) -> kbrd.KeyCode:
@@ -28,6 +44,24 @@ def str_to_keycode(name: str) -> kbrd.KeyCode:
         return kbrd.KeyCode.from_char(name)
 
 
+def key_name(key: kbrd.KeyCode) -> str:
+    """
+    Name of a key for chords.py: its lowercase character, the name of a special key, or vk<code> for other keys
+    """
+    char = key.char
+    if char is not None and char.isprintable() and not char.isspace():
+        return char.lower()
+    if char is not None and len(char) == 1 and ord(char) < 0x20:
+        # control characters typed with ctrl on some platforms ("\x0b" for ctrl+k)
+        return chr(ord(char) + 0x60)
+    name = KeyboardHandler.SPECIAL_KEYS_NAMES.get(key)
+    if name is not None:
+        return name
+    if char == " ":
+        return "space"
+    return f"vk{key.vk}"
+
+
 class KeyboardHandlerMeta(type):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)        
@@ -46,21 +80,125 @@ class KeyboardHandler(HandlerCore[PynputKeyboardEvent, kbrd.KeyCode, kbrd.KeyCod
     Handler for keyboard
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, chord_timeout: float = 1.0, listen: bool = True, track_keys: bool = False, **kwargs):
+        """
+        :param chord_timeout: maximum delay between the chords of a sequence, in seconds (see bind_chord)
+        :param listen: start a pynput listener for the keys of the system keyboard,
+            set to False (or give a source) to only handle the events given to handle_event
+        :param track_keys: keep the state of the keys from the start for is_pressed,
+            otherwise it is kept from the first call of bind_chord or is_pressed
+        :param kwargs: see HandlerCore
+        """
+        # state of the keys and chords binded with bind_chord, updated before the event is dispatched
+        # (by a stage of the dispatch installed on first use, so that handlers without chords don't pay for it)
+        self.chords = ChordMatcher(chord_timeout)
+        self._key_slots : Dict[kbrd.KeyCode, int] = {}
+        self._track_keys = track_keys
         super().__init__(**kwargs)
-        self.listener = kbrd.Listener(on_press=self._on_press, on_release=self._on_release)
-        self.listener.start()
+        self.listener : kbrd.Listener = None
+        # the listener has no read loop, a timer emits the values held back by the change filters
+        # (the lock keeps the binded functions from being called by the listener and the timer at the same time)
+        self._listener_lock = threading.Lock()
+        self._flush_timer : threading.Timer = None
+        self._flush_due = 0.0
+        if listen and self.source is None:
+            self.listener = kbrd.Listener(on_press=self._on_press, on_release=self._on_release)
+            self.listener.start()
     
     def _on_press(self, key: kbrd.KeyCode | kbrd.Key) -> None:
-        self.handle_event(
+        self._handle_listener_event(
             PynputKeyboardEvent(key, KeyAction.PRESS)
         )
     
     def _on_release(self, key: kbrd.KeyCode | kbrd.Key) -> None:
-        self.handle_event(
+        self._handle_listener_event(
             PynputKeyboardEvent(key, KeyAction.RELEASE)
         )
+
+    def _handle_listener_event(self, event: PynputKeyboardEvent) -> None:
+        with self._listener_lock:
+            self.handle_event(event)
+            self._schedule_flush(self.flush_change_filters())
+
+    def _schedule_flush(self, delay: float) -> None:
+        """
+        Start the timer flushing the change filters in delay seconds, unless it is already due sooner (call with _listener_lock)
+        """
+        if delay is None:
+            return
+        due = time.monotonic() + delay
+        if self._flush_timer is not None:
+            if self._flush_due <= due:
+                return
+            self._flush_timer.cancel()
+        self._flush_due = due
+        self._flush_timer = threading.Timer(delay, self._flush_listener)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _flush_listener(self) -> None:
+        with self._listener_lock:
+            if threading.current_thread() is not self._flush_timer:
+                # replaced by a timer due sooner
+                return
+            self._flush_timer = None
+            self._schedule_flush(self.flush_change_filters())
         
+    def _select_dispatch(self) -> Callable[[PynputKeyboardEvent], None]:
+        """
+        Overrides parent method
+        """
+        dispatch = super()._select_dispatch()
+        if not self._track_keys:
+            return dispatch
+        return functools.partial(self._handle_event_chords, dispatch)
+
+    def _enable_key_tracking(self) -> None:
+        if not self._track_keys:
+            self._track_keys = True
+            self._install_dispatch()
+
+    def _handle_event_chords(self, dispatch: Callable[[PynputKeyboardEvent], None], event: PynputKeyboardEvent) -> None:
+        """
+        Updates the key state and matches the chords, then handles the event with dispatch
+        """
+        slot = self._key_slots.get(event.key)
+        if slot is None:
+            slot = self._key_slots[event.key] = self.chords.key_state.slot(key_name(event.key))
+        if event.action is KeyAction.PRESS:
+            self.chords.press(slot)
+        else:
+            self.chords.release(slot)
+        dispatch(event)
+
+    def bind_chord(self, chord: str, func: Callable[[], Any]) -> None:
+        """
+        Bind a function to a chord or a sequence of chords (see chords.ChordMatcher):
+            handler.bind_chord("ctrl+shift+k", func)
+            handler.bind_chord("ctrl+k ctrl+c", func)
+        A chord matches when its last key is pressed while exactly its modifiers (ctrl, shift, alt, cmd) are held.
+        Keys are named by the character they type ("k", "1") or by their name in KeyboardHandler.SPECIAL_KEYS ("f5", "space").
+        :param func: function called without arguments
+        """
+        self.chords.bind(chord, func)
+        self._enable_key_tracking()
+
+    def unbind_chord(self, chord: str, func: Callable = None) -> None:
+        """
+        Remove the functions binded to a chord (all of them if func is None)
+        """
+        self.chords.unbind(chord, func)
+
+    def is_pressed(self, key: kbrd.KeyCode | kbrd.Key | str) -> bool:
+        """
+        :param key: a key, or a modifier name ("ctrl" is pressed if either control key is)
+            (keys pressed before the first call are unknown, unless the handler was created with track_keys)
+        """
+        self._enable_key_tracking()
+        if isinstance(key, str) and len(key) > 1:
+            return self.chords.key_state.is_pressed(key)
+        return self.chords.key_state.is_pressed(key_name(self.resolve_input(key)))
+
     def is_input_valid(self, input: kbrd.KeyCode) -> bool:
         return isinstance(input, kbrd.KeyCode)
     
@@ -75,7 +213,34 @@ class KeyboardHandler(HandlerCore[PynputKeyboardEvent, kbrd.KeyCode, kbrd.KeyCod
     
     def get_event_raw_value(self, event: PynputKeyboardEvent) -> float:
         return 1.0 if event.action is KeyAction.PRESS else 0.0
+
+    def get_event_timestamp_ns(self, event: PynputKeyboardEvent) -> int:
+        """
+        Overrides parent method
+        """
+        return event.timestamp_ns
     
+    def encode_event(self, event: PynputKeyboardEvent) -> Tuple[int, int, int]:
+        """
+        Overrides parent method: keys are encoded by character when they have one, by virtual key code otherwise
+        """
+        value = 1 if event.action is KeyAction.PRESS else 0
+        if event.key.char is not None and len(event.key.char) == 1:
+            return KEY_BY_CHAR, ord(event.key.char), value
+        if event.key.vk is None:
+            raise ValueError("Unable to encode a key without character nor virtual key code")
+        return KEY_BY_VK, event.key.vk, value
+
+    def decode_event(self, timestamp_ns: int, type: int, code: int, value: int) -> PynputKeyboardEvent:
+        """
+        Overrides parent method
+        """
+        if type == KEY_BY_CHAR:
+            key = kbrd.KeyCode.from_char(chr(code))
+        else:
+            key = kbrd.KeyCode.from_vk(code)
+        return PynputKeyboardEvent(key, KeyAction.PRESS if value else KeyAction.RELEASE, timestamp_ns)
+
     def get_input_name(self, input: kbrd.KeyCode) -> str:
         if input.char is not None:
             return input.char
@@ -0,0 +1,161 @@
+"""
+Merge of the events of several handlers into a single stream ordered by time, for deterministic replay and latency accounting:
+    merger = EventMerger(window_ns=5_000_000)
+    merger.subscribe(on_event)
+    merger.attach(keyboard_handler, gamepad_handler)
+    ...
+    merger.tick()   # from time to time, so that the events of a handler that went quiet don't wait for the others
+Events are ordered by (timestamp_ns, device_id) (see EventInfo). Every handler gives its events in order,
+so this is a k-way merge: an event is released as soon as every handler has given a later one,
+or once it is older than the newest event by more than the reorder window.
+Events arriving after later events have been released (more than window_ns late) are counted in late,
+and delivered right away or dropped (see EventMerger).
+"""
+from __future__ import annotations
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .flow_core import HandlerCore, EventInfo
+
+
+LATE_POLICIES = ("emit", "drop")
+
+
+def event_order(event_info: EventInfo) -> Tuple[int, int]:
+    return event_info.timestamp_ns, event_info.device_id
+
+
+def merge_sorted(*streams: Iterable[EventInfo]) -> Iterator[EventInfo]:
+    """
+    Merge streams of event infos that are each in order (recordings for instance) into one ordered stream, lazily
+    """
+    return heapq.merge(*streams, key=event_order)
+
+
+class EventMerger:
+    """
+    Reorders the events of several handlers (or of anything calling push) and gives them in order to the functions
+    registered with subscribe. These functions are called with a lock held, from the thread that pushed the event
+    releasing them (or the thread calling tick or flush): they should be quick, like the functions binded to a handler.
+    """
+
+    def __init__(self, window_ns: int = 5_000_000, late: str = "emit", max_pending: int = 65536):
+        """
+        :param window_ns: how long an event may wait for the events of other handlers, in nanoseconds
+            (larger windows tolerate more delay between the handlers, at the cost of latency)
+        :param late: what to do with events older than events already released, "emit" (out of order) or "drop"
+        :param max_pending: number of waiting events above which the oldest ones are released whatever the window
+        """
+        if late not in LATE_POLICIES:
+            raise ValueError(f"Unknown late event policy '{late}', must be one of {LATE_POLICIES}")
+        if max_pending < 1:
+            raise ValueError(f"Invalid max_pending {max_pending}")
+        self.window_ns = window_ns
+        self.late_policy = late
+        self.max_pending = max_pending
+        # events that arrived too late, and events released early because of max_pending
+        self.late = 0
+        self.forced = 0
+        self.consumers : List[Callable[[EventInfo], Any]] = []
+        # (timestamp_ns, device_id, arrival number, event info), the arrival number keeps equal keys in arrival order
+        self._heap : List[Tuple[int, int, int, EventInfo]] = []
+        self._arrivals = itertools.count()
+        # timestamp of the last event of every device (-1 before its first event)
+        self._latest : Dict[int, int] = {}
+        self._newest_ns = -1
+        self._released_ns = -1
+        self._lock = threading.Lock()
+        self._handlers : List[HandlerCore] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def subscribe(self, func: Callable[[EventInfo], Any]) -> None:
+        self.consumers.append(func)
+
+    def unsubscribe(self, func: Callable[[EventInfo], Any]) -> None:
+        self.consumers.remove(func)
+
+    def attach(self, *handlers: HandlerCore) -> None:
+        """
+        Merge the events of handlers (their events wait for each other from now on)
+        """
+        with self._lock:
+            for handler in handlers:
+                self._latest.setdefault(handler.device_id, -1)
+                self._handlers.append(handler)
+                handler.subscribe(self.push)
+
+    def detach(self) -> None:
+        """
+        Stop merging the events of the attached handlers, and release the events still waiting
+        """
+        with self._lock:
+            handlers = self._handlers
+            self._handlers = []
+            for handler in handlers:
+                self._latest.pop(handler.device_id, None)
+        for handler in handlers:
+            handler.unsubscribe(self.push)
+        self.flush()
+
+    def push(self, event_info: EventInfo) -> None:
+        timestamp_ns = event_info.timestamp_ns
+        device_id = event_info.device_id
+        with self._lock:
+            if timestamp_ns < self._released_ns:
+                self.late += 1
+                if self.late_policy == "emit":
+                    self._emit(event_info)
+                return
+            heapq.heappush(self._heap, (timestamp_ns, device_id, next(self._arrivals), event_info.retained()))
+            if timestamp_ns > self._latest.get(device_id, -1):
+                self._latest[device_id] = timestamp_ns
+            if timestamp_ns > self._newest_ns:
+                self._newest_ns = timestamp_ns
+            # every device has given an event at least as recent as this watermark, the events before it are final
+            watermark = max(min(self._latest.values()), self._newest_ns - self.window_ns)
+            self._release(watermark)
+            if len(self._heap) > self.max_pending:
+                self.forced += len(self._heap) - self.max_pending
+                self._release_count(len(self._heap) - self.max_pending)
+
+    def tick(self, now_ns: int = None) -> None:
+        """
+        Release the events older than the window, even if some handlers have given no later event
+        :param now_ns: the current time on the monotonic clock, by default time.monotonic_ns()
+        """
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        with self._lock:
+            self._release(now_ns - self.window_ns)
+
+    def flush(self) -> None:
+        """
+        Release all the waiting events
+        """
+        with self._lock:
+            self._release_count(len(self._heap))
+
+    def _release(self, watermark: int) -> None:
+        heap = self._heap
+        while heap and heap[0][0] <= watermark:
+            self._emit_released(heapq.heappop(heap))
+
+    def _release_count(self, count: int) -> None:
+        heap = self._heap
+        for _ in range(count):
+            self._emit_released(heapq.heappop(heap))
+
+    def _emit_released(self, item: Tuple[int, int, int, EventInfo]) -> None:
+        self._released_ns = item[0]
+        self._emit(item[3])
+
+    def _emit(self, event_info: EventInfo) -> None:
+        for func in self.consumers:
+            func(event_info)
@@ -0,0 +1,489 @@
+"""
+Streaming the events of handlers over TCP, from a capture machine to other hosts:
+    server = EventServer(gamepad, keyboard, port=7531, delta=True)
+    await server.start()            # on an asyncio event loop, the handlers are read as usual (background_loop...)
+and on the other side:
+    remote = RemoteHandler("capture-box", 7531, device=gamepad.device_id)
+    remote.bind("LH", on_stick, "value")
+    remote.background_loop()
+The events are batched into binary frames (every flush_interval seconds) instead of one send per event.
+Inputs are sent by name (see HandlerCore.get_input_name) with the device id of their events (see HandlerCore.device_id),
+and then referred to by a 2-byte slot, so the inputs of several pads of the same kind don't mix.
+
+Messages are a header (payload size uint32, type uint8) and a payload, little endian:
+    HELLO:  protocol version (uint16), monotonic time of the server in ns (int64), flags (uint8, 1 for delta)
+    DEFINE: slot (uint16), device id (uint32), name of the input (utf-8)
+    EVENTS: time of the first event in ns (int64), device id (uint32),
+            then records of slot (uint16), time since the first event in ns (uint32), value (float32)
+With delta encoding, events that don't change the last value sent for their input are not sent,
+and new clients get the current value of every input first.
+"""
+from __future__ import annotations
+import asyncio
+import socket
+import struct
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Dict, Iterator, List, Set, Tuple
+from .flow_core import HandlerCore, EventInfo
+
+
+PROTOCOL_VERSION = 2
+DEFAULT_PORT = 7531
+
+HEADER = struct.Struct("<IB")               # payload size, message type
+HELLO_PAYLOAD = struct.Struct("<HqB")       # protocol version, server time, flags
+DEFINE_PAYLOAD = struct.Struct("<HI")       # slot, device id, followed by the name
+EVENTS_PAYLOAD = struct.Struct("<qI")       # time of the first event, device id, followed by the records
+EVENT_RECORD = struct.Struct("<HIf")        # slot, time since the first event, value
+
+HELLO = 1
+DEFINE = 2
+EVENTS = 3
+
+FLAG_DELTA = 1
+MAX_SLOTS = 1 << 16
+# records per EVENTS message
+MAX_RECORDS = 4096
+MAX_TIME_DELTA_NS = (1 << 32) - 1
+
+# (slot, timestamp_ns, value, device_id)
+PendingEvent = Tuple[int, int, float, int]
+
+
+def encode_message(type: int, payload: bytes) -> bytes:
+    return HEADER.pack(len(payload), type) + payload
+
+
+def encode_define(slot: int, device_id: int, name: str) -> bytes:
+    return encode_message(DEFINE, DEFINE_PAYLOAD.pack(slot, device_id & 0xFFFFFFFF) + name.encode())
+
+
+def encode_events(events: List[PendingEvent]) -> bytearray:
+    """
+    EVENTS messages for events in order, a new message whenever the device changes or the time since the first event
+    doesn't fit in the record
+    """
+    data = bytearray()
+    pack_into = EVENT_RECORD.pack_into
+    start = 0
+    while start < len(events):
+        _, base_ns, _, device_id = events[start]
+        end = start + 1
+        limit = min(len(events), start + MAX_RECORDS)
+        while end < limit:
+            _, timestamp_ns, _, event_device_id = events[end]
+            if event_device_id != device_id or not 0 <= timestamp_ns - base_ns <= MAX_TIME_DELTA_NS:
+                break
+            end += 1
+        payload_size = EVENTS_PAYLOAD.size + (end - start) * EVENT_RECORD.size
+        offset = len(data) + HEADER.size + EVENTS_PAYLOAD.size
+        data += HEADER.pack(payload_size, EVENTS)
+        data += EVENTS_PAYLOAD.pack(base_ns, device_id & 0xFFFFFFFF)
+        data += bytes(payload_size - EVENTS_PAYLOAD.size)
+        for slot, timestamp_ns, value, _ in events[start:end]:
+            pack_into(data, offset, slot, timestamp_ns - base_ns, value)
+            offset += EVENT_RECORD.size
+        start = end
+    return data
+
+
+class EventServer:
+    """
+    Asyncio TCP server streaming the events of handlers to every connected RemoteHandler.
+    The handlers keep being read by their own threads (or by the event loop): their events are queued, and sent in batches
+    from the event loop flush_interval seconds after the first event of a batch.
+    Clients that don't read fast enough (more than max_buffer bytes waiting) miss batches, counted in dropped_bytes.
+    """
+
+    def __init__(
+            self,
+            *handlers: HandlerCore,
+            host: str = "127.0.0.1",
+            port: int = DEFAULT_PORT,
+            delta: bool = False,
+            flush_interval: float = 0.001,
+            max_buffer: int = 1 << 20
+        ):
+        """
+        :param handlers: the handlers whose events are sent
+        :param host: the address to listen on
+        :param port: the port to listen on (0 for any free port, see port after start)
+        :param delta: only send the events that change the value of their input (see the module documentation)
+        :param flush_interval: how long events wait for others to be sent with them, in seconds
+        :param max_buffer: bytes waiting to be sent to a client above which its batches are dropped
+        """
+        self.handlers = list(handlers)
+        self.host = host
+        self.port = port
+        self.delta = delta
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        # stats: events received and sent, events not sent because of delta encoding, bytes sent, bytes dropped
+        self.events = 0
+        self.sent_events = 0
+        self.suppressed = 0
+        self.sent_bytes = 0
+        self.dropped_bytes = 0
+        self.loop : asyncio.AbstractEventLoop = None
+        self.server : asyncio.AbstractServer = None
+        self.clients : List[asyncio.StreamWriter] = []
+        self._client_tasks : Set[asyncio.Task] = set()
+        # (device id, name) of the slots, slot of every (handler, device id, input)
+        self._names : List[Tuple[int, str]] = []
+        self._slots : Dict[Tuple[int, int, Any], int] = {}
+        # DEFINE messages not yet sent, events not yet sent, and last event of every slot (for delta encoding)
+        self._defines : List[bytes] = []
+        self._pending : List[PendingEvent] = []
+        self._state : Dict[int, PendingEvent] = {}
+        self._lock = threading.Lock()
+        self._subscribers : Dict[HandlerCore, Callable[[EventInfo], None]] = {}
+
+    async def start(self) -> None:
+        """
+        Listen for clients and subscribe to the handlers, from a running event loop
+        """
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self._on_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        for handler in self.handlers:
+            self._subscribers[handler] = self._make_subscriber(handler)
+            handler.subscribe(self._subscribers[handler])
+
+    async def serve_forever(self) -> None:
+        if self.server is None:
+            await self.start()
+        await self.server.serve_forever()
+
+    async def close(self) -> None:
+        for handler, subscriber in self._subscribers.items():
+            handler.unsubscribe(subscriber)
+        self._subscribers = {}
+        if self.server is not None:
+            self.server.close()
+        # wait_closed also waits for the connections of the clients (python 3.12), they are closed first
+        for writer in self.clients:
+            writer.close()
+        self.clients = []
+        tasks = list(self._client_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+
+    def _make_subscriber(self, handler: HandlerCore) -> Callable[[EventInfo], None]:
+        slots = self._slots
+        handler_id = id(handler)
+        lock = self._lock
+        pending = self._pending
+        state = self._state
+        delta = self.delta
+
+        def on_event(event_info: EventInfo) -> None:
+            input = event_info.input
+            device_id = event_info.device_id
+            with lock:
+                self.events += 1
+                slot = slots.get((handler_id, device_id, input))
+                if slot is None:
+                    slot = self._define(handler_id, device_id, input, handler.get_input_name(input))
+                event = (slot, event_info.timestamp_ns, event_info.event_value, device_id)
+                if delta:
+                    last = state.get(slot)
+                    if last is not None and last[2] == event[2]:
+                        self.suppressed += 1
+                        return
+                    state[slot] = event
+                if not pending:
+                    self.loop.call_soon_threadsafe(self._schedule_flush)
+                pending.append(event)
+
+        return on_event
+
+    def _define(self, handler_id: int, device_id: int, input: Any, name: str) -> int:
+        slot = len(self._names)
+        if slot >= MAX_SLOTS:
+            raise ValueError(f"Too many inputs to stream (at most {MAX_SLOTS})")
+        self._names.append((device_id, name))
+        self._slots[(handler_id, device_id, input)] = slot
+        self._defines.append(encode_define(slot, device_id, name))
+        return slot
+
+    def _schedule_flush(self) -> None:
+        if self.flush_interval > 0:
+            self.loop.call_later(self.flush_interval, self.flush)
+        else:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Send the events waiting, from the event loop
+        """
+        with self._lock:
+            data = self._take_pending()
+        self._broadcast(data)
+
+    def _take_pending(self) -> bytes:
+        """
+        The DEFINE messages and events waiting, encoded, they are no longer waiting (call with _lock)
+        """
+        defines = self._defines
+        events = self._pending[:]
+        self._defines = []
+        self._pending.clear()
+        if not events and not defines:
+            return b""
+        self.sent_events += len(events)
+        return b"".join(defines) + encode_events(events)
+
+    def _broadcast(self, data: bytes) -> None:
+        if not data:
+            return
+        for writer in self.clients:
+            self._send(writer, data)
+
+    def _send(self, writer: asyncio.StreamWriter, data: bytes) -> None:
+        if writer.transport.get_write_buffer_size() > self.max_buffer:
+            self.dropped_bytes += len(data)
+            return
+        writer.write(data)
+        self.sent_bytes += len(data)
+
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # the waiting events are sent to the other clients, and the state taken, at once:
+        # the state then holds exactly the events sent before this client gets the next ones (no duplicates)
+        with self._lock:
+            flushed = self._take_pending()
+            names = list(self._names)
+            state = sorted(self._state.values(), key=lambda event: (event[3], event[1]))
+        self._broadcast(flushed)
+        data = encode_message(HELLO, HELLO_PAYLOAD.pack(PROTOCOL_VERSION, time.monotonic_ns(), FLAG_DELTA if self.delta else 0))
+        data += b"".join(encode_define(slot, device_id, name) for slot, (device_id, name) in enumerate(names))
+        data += encode_events(state)
+        self._send(writer, data)
+        self.clients.append(writer)
+        task = asyncio.current_task()
+        self._client_tasks.add(task)
+        try:
+            # clients send nothing, wait for them to disconnect
+            await reader.read()
+        except (ConnectionError, asyncio.CancelledError):
+            # or cancelled by close, the task just ends
+            pass
+        finally:
+            self._client_tasks.discard(task)
+            if writer in self.clients:
+                self.clients.remove(writer)
+            writer.close()
+
+
+class FrameDecoder:
+    """
+    Turns the bytes received from an EventServer into (input name, value, timestamp_ns, device id) events.
+    Input names are prefixed with the id of their device ("1/LH", see qualify_name) unless qualified is False.
+    """
+
+    def __init__(self, qualified: bool = True):
+        self.buffer = bytearray()
+        self.qualified = qualified
+        # name of the events of every slot, and (device id, input name) of every slot
+        self.names : Dict[int, str] = {}
+        self.inputs : Dict[int, Tuple[int, str]] = {}
+        self.server_time_ns : int = None
+        self.delta = False
+
+    def feed(self, data: bytes) -> Iterator[Tuple[str, float, int, int]]:
+        buffer = self.buffer
+        buffer += data
+        offset = 0
+        header_size = HEADER.size
+        try:
+            while len(buffer) - offset >= header_size:
+                size, type = HEADER.unpack_from(buffer, offset)
+                start = offset + header_size
+                end = start + size
+                if end > len(buffer):
+                    break
+                if type == EVENTS:
+                    base_ns, device_id = EVENTS_PAYLOAD.unpack_from(buffer, start)
+                    names = self.names
+                    # a copy of the records: a view would keep the buffer from being resized in finally
+                    # while the iterator is alive (when the caller stops iterating early)
+                    records = buffer[start + EVENTS_PAYLOAD.size:end]
+                    # consumed, the events of the message aren't given again after an early stop
+                    offset = end
+                    for slot, delta_ns, value in EVENT_RECORD.iter_unpack(records):
+                        yield names[slot], value, base_ns + delta_ns, device_id
+                elif type == DEFINE:
+                    slot, device_id = DEFINE_PAYLOAD.unpack_from(buffer, start)
+                    name = bytes(buffer[start + DEFINE_PAYLOAD.size:end]).decode()
+                    self.inputs[slot] = (device_id, name)
+                    self.names[slot] = qualify_name(device_id, name) if self.qualified else name
+                elif type == HELLO:
+                    version, self.server_time_ns, flags = HELLO_PAYLOAD.unpack_from(buffer, start)
+                    if version != PROTOCOL_VERSION:
+                        raise ValueError(f"Unsupported protocol version {version} (expected {PROTOCOL_VERSION})")
+                    self.delta = bool(flags & FLAG_DELTA)
+                else:
+                    raise ValueError(f"Unknown message type {type}")
+                offset = end
+        finally:
+            del buffer[:offset]
+
+
+def qualify_name(device_id: int, name: str) -> str:
+    """
+    Name of an input of a RemoteHandler reading all the devices of the server: "<device id>/<input name>"
+    """
+    return f"{device_id}/{name}"
+
+
+class RemoteHandler(HandlerCore[Tuple[str, float, int, int], str, str]):
+    """
+    Handler for the events streamed by an EventServer, reading one device of the server (see the device_id of its handlers),
+    or all of them: inputs are the names of the inputs of the handlers of the server ("LH", "cross", "a", "ctrl_l"...),
+    prefixed with the id of their device when reading all the devices ("1/LH", "2/LH"), binded like the inputs of any handler.
+    The events keep their time (converted to the monotonic clock of this host when connecting, see sync_clock).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, connect: bool = True, device: int = None, **kwargs):
+        """
+        :param host: address of the EventServer
+        :param port: port of the EventServer
+        :param connect: connect right away (otherwise see connect)
+        :param device: id of the device of the server whose events are handled (see devices), None for all of them
+            (their inputs are then named "<device id>/<input name>", see qualify_name)
+        :param kwargs: see HandlerCore
+        """
+        self.host = host
+        self.port = port
+        self.device = device
+        self.socket : socket.socket = None
+        self.decoder = FrameDecoder(qualified=device is None)
+        self.closed = False
+        # bytes and events received
+        self.received_bytes = 0
+        self.received_events = 0
+        super().__init__(**kwargs)
+        if connect:
+            self.connect()
+
+    def connect(self, timeout: float = None) -> None:
+        """
+        Connect to the server (nothing is read before read_inputs, so that functions binded after connecting
+        get the first events, like the current values sent with delta encoding)
+        """
+        self.socket = socket.create_connection((self.host, self.port), timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.settimeout(None)
+        self.decoder = FrameDecoder(qualified=self.device is None)
+        self.closed = False
+
+    def sync_clock(self) -> None:
+        """
+        Overrides parent method: the offset between the clocks of the server and of this host, measured when connecting
+        (the time the first message takes to arrive is neglected)
+        """
+        server_time_ns = self.decoder.server_time_ns
+        self._clock_offset_ns = 0 if server_time_ns is None else server_time_ns - time.monotonic_ns()
+
+    @property
+    def inputs(self) -> List[str]:
+        """
+        The inputs defined by the server so far (of the device read by this handler)
+        """
+        if self.device is None:
+            return list(self.decoder.names.values())
+        return [name for device_id, name in self.decoder.inputs.values() if device_id == self.device]
+
+    @property
+    def devices(self) -> Dict[int, List[str]]:
+        """
+        The names of the inputs defined by the server so far, by device id
+        """
+        devices : Dict[int, List[str]] = {}
+        for device_id, name in self.decoder.inputs.values():
+            devices.setdefault(device_id, []).append(name)
+        return devices
+
+    def read_inputs(self) -> None:
+        """
+        Overrides parent method: handle the events received from the server, waiting for some
+        """
+        if self.source is not None:
+            self.read_source()
+            return
+        try:
+            data = self.socket.recv(1 << 16)
+        except OSError:
+            if self.closed:
+                return
+            raise
+        if not data:
+            self.close()
+            return
+        self.received_bytes += len(data)
+        synced = self.decoder.server_time_ns is not None
+        handle_event = self.handle_event
+        device = self.device
+        for event in self.decoder.feed(data):
+            if not synced:
+                # the first message of the server (before any event) gives its time
+                self.sync_clock()
+                synced = True
+            if device is not None and event[3] != device:
+                continue
+            self.received_events += 1
+            handle_event(event)
+        if not synced and self.decoder.server_time_ns is not None:
+            self.sync_clock()
+
+    def loop(self) -> None:
+        """
+        Overrides parent method: read until the connection is closed
+        """
+        while not self.closed:
+            self.read_inputs()
+
+    def close(self) -> None:
+        """
+        Close the connection (a thread waiting in read_inputs returns)
+        """
+        self.closed = True
+        if self.socket is not None:
+            try:
+                self.socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.socket.close()
+
+    def is_input_valid(self, input: str) -> bool:
+        return isinstance(input, str)
+
+    def make_input(self, input_like: str) -> str:
+        if not isinstance(input_like, str):
+            raise ValueError(f"Unable to interpret '{input_like}' as a remote input, inputs are given by name")
+        return input_like
+
+    def get_input_id(self, input: str) -> str:
+        return input
+
+    def find_input(self, id: str) -> str:
+        return id
+
+    def get_event_id(self, event: Tuple[str, float, int, int]) -> str:
+        return event[0]
+
+    def get_event_raw_value(self, event: Tuple[str, float, int, int]) -> float:
+        return event[1]
+
+    def get_event_timestamp_ns(self, event: Tuple[str, float, int, int]) -> int:
+        """
+        Overrides parent method: time of the event on the monotonic clock of the server
+        """
+        return event[2]
@@ -0,0 +1,267 @@
+"""
+Database of device profiles: the config (ids, offsets, amplitudes... see FixedInputListHandler) of known devices,
+read from JSON files:
+    {
+        "name": "Xbox Wireless Controller",
+        "names": ["Xbox Wireless Controller"],
+        "ids": [{"bustype": 5, "vendor": "0x045e", "product": "0x0b13", "version": "0x0509"}],
+        "notes": ["sticks: LH code 0, LV code 1..."],
+        "config": {"cross_id": 304, "LV_amplitude": -32768, "smoothing_epsilon": 0.1}
+    }
+Devices are looked up by the ids of device.info (bus, vendor, product and version, the version can be left out of a profile
+to match all versions), then by device name.
+The profiles of the package match by name only (their "ids" are empty), except the virtual gamepad of inputflow.sources:
+the ids of these pads weren't recorded, and some pads have other nodes with the same ids (the touchpad and motion sensors
+of a Sony controller), which a lookup by ids would take for the pad. Add the ids printed by identify_gamepad.py to a profile
+of your own to match a pad whatever its name.
+Profiles come with the package (inputflow/device_profiles) and from the directories of the INPUTFLOW_PROFILES environment variable.
+The index is built on first use, and kept in a JSON cache file keyed by the paths, sizes and modification times of the profiles,
+so that only the first use after a change of the profiles parses them.
+"""
+from __future__ import annotations
+import dataclasses
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+PACKAGE_PROFILES = pathlib.Path(__file__).parent / "device_profiles"
+# bump when the format of the cache changes
+CACHE_VERSION = 2
+
+DeviceIds = Tuple[int, int, int, int]
+
+
+@dataclass
+class DeviceProfile:
+    name: str
+    names: List[str] = field(default_factory=list)
+    ids: List[Dict[str, int]] = field(default_factory=list)
+    config: Dict[str, Any] = field(default_factory=dict)
+    notes: List[str] = field(default_factory=list)
+    path: str = ""
+
+
+def _parse_id(value: int | str) -> int:
+    return int(value, 0) if isinstance(value, str) else int(value)
+
+
+def parse_profile(data: Dict[str, Any], path: str = "") -> DeviceProfile:
+    """
+    :param data: the content of a profile file
+    :param path: the file, for error messages
+    """
+    if not isinstance(data.get("config"), dict):
+        raise ValueError(f"Invalid device profile '{path}': missing config")
+    names = [name.strip() for name in data.get("names", ())]
+    ids = []
+    for device_ids in data.get("ids", ()):
+        try:
+            ids.append({key: _parse_id(value) for key, value in device_ids.items()})
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid ids {device_ids} in device profile '{path}'") from e
+        if not {"bustype", "vendor", "product"} <= set(ids[-1]):
+            raise ValueError(f"Ids {device_ids} of device profile '{path}' need at least bustype, vendor and product")
+    if not names and not ids:
+        raise ValueError(f"Device profile '{path}' matches no device, it needs names or ids")
+    notes = data.get("notes", [])
+    return DeviceProfile(
+        name=data.get("name") or (names[0] if names else os.path.basename(path)),
+        names=names,
+        ids=ids,
+        config=data["config"],
+        notes=[notes] if isinstance(notes, str) else list(notes),
+        path=path,
+    )
+
+
+def default_cache_dir() -> pathlib.Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return pathlib.Path(base) / "inputflow"
+
+
+class ProfileIndex:
+    """
+    Profiles indexed by device ids and by name
+    """
+
+    def __init__(self, profiles: Iterable[DeviceProfile]):
+        self.profiles = list(profiles)
+        self.by_ids : Dict[DeviceIds, DeviceProfile] = {}
+        # profiles without a version, by (bus, vendor, product)
+        self.by_product : Dict[Tuple[int, int, int], DeviceProfile] = {}
+        self.by_name : Dict[str, DeviceProfile] = {}
+        for profile in self.profiles:
+            for ids in profile.ids:
+                key = (ids["bustype"], ids["vendor"], ids["product"])
+                if "version" in ids:
+                    self.by_ids.setdefault((*key, ids["version"]), profile)
+                else:
+                    self.by_product.setdefault(key, profile)
+            for name in profile.names:
+                self.by_name.setdefault(name, profile)
+
+    def find(self, ids: DeviceIds = None, name: str = None) -> DeviceProfile:
+        """
+        :return: the profile of the device, None if it is unknown
+        """
+        if ids is not None:
+            profile = self.by_ids.get(tuple(ids))
+            if profile is None:
+                profile = self.by_product.get(tuple(ids[:3]))
+            if profile is not None:
+                return profile
+        if name is not None:
+            return self.by_name.get(name.strip())
+        return None
+
+
+class ProfileDatabase:
+    """
+    Profiles of the JSON files of some directories (see the module documentation), loaded on first use
+    """
+
+    def __init__(self, directories: Iterable[str | os.PathLike] = None, cache_dir: str | os.PathLike = None, use_cache: bool = True):
+        """
+        :param directories: the directories of the profiles, by default the profiles of the package and the directories of INPUTFLOW_PROFILES
+        :param cache_dir: where to keep the parsed profiles, by default $XDG_CACHE_HOME/inputflow
+        :param use_cache: False to parse the profiles every time
+        """
+        if directories is None:
+            directories = [PACKAGE_PROFILES]
+            directories += [path for path in os.environ.get("INPUTFLOW_PROFILES", "").split(os.pathsep) if path]
+        self.directories = [pathlib.Path(directory) for directory in directories]
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        self.use_cache = use_cache
+        self._index : ProfileIndex = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> ProfileIndex:
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load()
+                index = self._index
+        return index
+
+    def reload(self) -> None:
+        """
+        Read the profiles again on next use (after adding profile files)
+        """
+        self._index = None
+
+    def _files(self) -> List[pathlib.Path]:
+        files = []
+        for directory in self.directories:
+            if directory.is_dir():
+                files.extend(sorted(directory.glob("*.json")))
+        return files
+
+    def _cache_file(self) -> pathlib.Path:
+        """
+        One cache file per list of directories, so that processes with different INPUTFLOW_PROFILES don't overwrite each other's
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        for directory in self.directories:
+            digest.update(os.fsencode(os.path.abspath(directory)) + b"\0")
+        return self.cache_dir / f"profiles-{digest.hexdigest()}.json"
+
+    def _load(self) -> ProfileIndex:
+        files = self._files()
+        # the files are only read when one of them changed
+        key = [CACHE_VERSION]
+        for path in files:
+            stat = path.stat()
+            key.append([str(path), stat.st_size, stat.st_mtime_ns])
+        cache_file = self._cache_file()
+
+        if self.use_cache:
+            profiles = self._read_cache(cache_file, key)
+            if profiles is not None:
+                return ProfileIndex(profiles)
+
+        profiles = []
+        for path in files:
+            try:
+                data = json.loads(path.read_bytes())
+            except ValueError as e:
+                raise ValueError(f"Invalid device profile '{path}': {e}") from e
+            profiles.append(parse_profile(data, str(path)))
+        if self.use_cache:
+            self._write_cache(cache_file, key, profiles)
+        return ProfileIndex(profiles)
+
+    def _read_cache(self, cache_file: pathlib.Path, key: List[Any]) -> List[DeviceProfile]:
+        """
+        :return: the profiles of the cache file, None if it is missing, invalid or made from other versions of the profiles
+        """
+        try:
+            with open(cache_file, "rb") as file:
+                data = json.load(file)
+            if data["key"] != key:
+                return None
+            return [DeviceProfile(**profile) for profile in data["profiles"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_cache(self, cache_file: pathlib.Path, key: List[Any], profiles: List[DeviceProfile]) -> None:
+        """
+        Replace the cache file with the given profiles (errors are ignored, the cache is only an optimisation)
+        """
+        data = {"key": key, "profiles": [dataclasses.asdict(profile) for profile in profiles]}
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".profiles-")
+            try:
+                with os.fdopen(fd, "w") as file:
+                    json.dump(data, file)
+                # atomic, readers get either file
+                os.replace(tmp_path, cache_file)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def find(self, device: Any) -> DeviceProfile:
+        """
+        :param device: an evdev.InputDevice, or anything with a name and optionally info (bustype, vendor, product, version)
+        :return: the profile of the device, None if it is unknown
+        """
+        info = getattr(device, "info", None)
+        ids = None
+        if info is not None:
+            ids = (info.bustype, info.vendor, info.product, info.version)
+        return self.index.find(ids, getattr(device, "name", None))
+
+    def names(self) -> List[str]:
+        """
+        The names of all the known devices
+        """
+        return list(self.index.by_name)
+
+    def __iter__(self):
+        return iter(self.index.profiles)
+
+    def __len__(self) -> int:
+        return len(self.index.profiles)
+
+
+_default_database : ProfileDatabase = None
+
+
+def default_database() -> ProfileDatabase:
+    """
+    The database used by GamepadHandler (created on first call, profiles loaded on first lookup)
+    """
+    global _default_database
+    if _default_database is None:
+        _default_database = ProfileDatabase()
+    return _default_database
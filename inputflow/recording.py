@@ -0,0 +1,161 @@
+from __future__ import annotations
+import mmap
+import struct
+import threading
+import time
+from typing import Any, BinaryIO, Iterator, Tuple
+from .flow_core import HandlerCore
+
+
+# file layout: a header, then fixed-size little endian records (timestamp in ns, type, code, value),
+# so that a log can be memory-mapped and read as an array of records
+MAGIC = b"INPTFLOW"
+VERSION = 2
+HEADER = struct.Struct("<8sII")     # magic, version, record size
+# 32 bit codes: X11 virtual key codes of media keys are above 0xFFFF
+RECORD = struct.Struct("<qH2xIi")   # timestamp_ns, type, code, value
+
+
+class EventRecorder:
+    """
+    Records the raw events of handlers into a binary log that EventLog can read and replay:
+        with EventRecorder("session.log", handler):
+            handler.loop()
+    Events are encoded by the handler (see HandlerCore.encode_event) and recorded before any filtering.
+    Events the handler can't encode are not recorded, they are counted in skipped.
+    """
+
+    def __init__(self, path: str, *handlers: HandlerCore):
+        """
+        :param path: the file to write (overwritten)
+        :param handlers: handlers to record right away (see attach)
+        """
+        self.file : BinaryIO = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self.count = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._taps = []
+        for handler in handlers:
+            self.attach(handler)
+
+    def record(self, timestamp_ns: int, type: int, code: int, value: int) -> None:
+        with self._lock:
+            self.file.write(RECORD.pack(timestamp_ns, type, code, value))
+            self.count += 1
+
+    def attach(self, handler: HandlerCore) -> None:
+        """
+        Record all the events of the handler from now on
+        """
+        if type(handler).encode_event is HandlerCore.encode_event:
+            raise ValueError(f"'{handler.__class__.__name__}' doesn't support event encoding, its events can't be recorded")
+
+        def tap(event: Any) -> None:
+            # the tap runs in the reader of the handler (a pynput listener for instance), it must not raise
+            try:
+                record = RECORD.pack(handler.get_event_timestamp_ns(event), *handler.encode_event(event))
+            except (ValueError, struct.error):
+                with self._lock:
+                    self.skipped += 1
+                return
+            with self._lock:
+                self.file.write(record)
+                self.count += 1
+
+        handler.add_event_tap(tap)
+        self._taps.append((handler, tap))
+
+    def close(self) -> None:
+        for handler, tap in self._taps:
+            handler.remove_event_tap(tap)
+        self._taps = []
+        with self._lock:
+            self.file.close()
+
+    def __enter__(self) -> EventRecorder:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class EventLog:
+    """
+    Read access to a log written by EventRecorder, through a memory map
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC or record_size != RECORD.size:
+            raise ValueError(f"'{path}' is not an inputflow event log")
+        if version != VERSION:
+            raise ValueError(f"Unsupported event log version {version} for '{path}'")
+        self.records = memoryview(self.mmap)[HEADER.size:]
+        # ignore a truncated last record, for logs whose recording was interrupted
+        self.records = self.records[:len(self.records) - len(self.records) % RECORD.size]
+
+    def __len__(self) -> int:
+        return len(self.records) // RECORD.size
+
+    def __getitem__(self, index: int) -> Tuple[int, int, int, int]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event log index out of range")
+        return RECORD.unpack_from(self.records, index * RECORD.size)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int, int]]:
+        return RECORD.iter_unpack(self.records)
+
+    def as_numpy(self) -> Any:
+        """
+        Zero-copy numpy structured array of the records (fields timestamp_ns, type, code, value)
+        """
+        import numpy
+        dtype = numpy.dtype({
+            "names": ["timestamp_ns", "type", "code", "value"],
+            "formats": ["<i8", "<u2", "<u4", "<i4"],
+            "offsets": [0, 8, 12, 16],
+            "itemsize": RECORD.size,
+        })
+        return numpy.frombuffer(self.records, dtype=dtype)
+
+    def replay(self, handler: HandlerCore, realtime: bool = False, speed: float = 1.0) -> int:
+        """
+        Feed the recorded events to handler.handle_event.
+        :param realtime: keep the original delays between the events (divided by speed), otherwise replay as fast as possible
+        :return: the number of events replayed
+        """
+        decode_event = handler.decode_event
+        handle_event = handler.handle_event
+        count = 0
+        if not realtime:
+            for timestamp_ns, type, code, value in RECORD.iter_unpack(self.records):
+                handle_event(decode_event(timestamp_ns, type, code, value))
+                count += 1
+            return count
+
+        start = time.perf_counter_ns()
+        first_timestamp_ns = None
+        for timestamp_ns, type, code, value in RECORD.iter_unpack(self.records):
+            if first_timestamp_ns is None:
+                first_timestamp_ns = timestamp_ns
+            delay = (timestamp_ns - first_timestamp_ns) / speed - (time.perf_counter_ns() - start)
+            if delay > 0:
+                time.sleep(delay / 1e9)
+            handle_event(decode_event(timestamp_ns, type, code, value))
+            count += 1
+        return count
+
+    def close(self) -> None:
+        self.records.release()
+        self.mmap.close()
+
+    def __enter__(self) -> EventLog:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
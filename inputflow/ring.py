@@ -0,0 +1,264 @@
+"""
+Reading a device in a child process, so that reading and decoding the events doesn't compete for the GIL with the binded functions
+(see GamepadHandler process_reader):
+    the child process reads the device with its own handler (decoding and calibration included) and writes an
+    (timestamp_ns, event value, input) record per event into an EventRing, a single-producer single-consumer ring buffer
+    in shared memory; the main process drains the ring in batches and calls the binded functions.
+"""
+from __future__ import annotations
+import multiprocessing
+import os
+import select
+import struct
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from multiprocessing import shared_memory
+    from multiprocessing.connection import Connection
+
+
+RECORD = struct.Struct("<qdi4x")        # timestamp_ns, event value, input
+# header: 8-byte counters, the ones written by the reader on their own cache line
+HEADER_SIZE = 128
+HEAD = 0            # number of records written (writer)
+DROPPED = 1         # number of records dropped because the ring was full (writer)
+CAPACITY = 2
+TAIL = 8            # number of records read (reader)
+
+Record = Tuple[int, float, int]
+
+
+class EventRing:
+    """
+    Fixed-size event records in a ring buffer in shared memory, for one writer and one reader (usually in different processes).
+    There is no lock: the writer fills the records then publishes them by increasing head, the reader reads up to head
+    then frees them by increasing tail (aligned 8 byte stores, atomic on the platforms supported by evdev).
+    When the ring is full, new records are dropped and counted in dropped (the writer never waits for the reader).
+    """
+
+    def __init__(self, capacity: int = 4096, name: str = None):
+        """
+        :param capacity: number of records, a power of 2
+        :param name: name of the shared memory block (a name is generated if none is given)
+        """
+        if capacity < 1 or capacity & (capacity - 1):
+            raise ValueError(f"Invalid ring capacity {capacity}, must be a power of 2")
+        from multiprocessing import shared_memory
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + capacity * RECORD.size)
+        self._map(capacity)
+        self.header[:] = array("Q", bytes(HEADER_SIZE))
+        self.header[CAPACITY] = capacity
+
+    @classmethod
+    def attach(cls, name: str) -> EventRing:
+        """
+        Open a ring created by another process
+        """
+        from multiprocessing import shared_memory
+        ring = cls.__new__(cls)
+        ring.shm = shared_memory.SharedMemory(name=name)
+        ring._map(ring.shm.buf[:HEADER_SIZE].cast("Q")[CAPACITY])
+        return ring
+
+    def _map(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self.header = self.shm.buf[:HEADER_SIZE].cast("Q")
+        self.records = self.shm.buf[HEADER_SIZE:HEADER_SIZE + capacity * RECORD.size]
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def dropped(self) -> int:
+        return self.header[DROPPED]
+
+    def __len__(self) -> int:
+        return self.header[HEAD] - self.header[TAIL]
+
+    def write(self, timestamp_ns: int, event_value: float, input: int) -> bool:
+        """
+        :return: False if the ring is full (the record is dropped)
+        """
+        return self.write_many(((timestamp_ns, event_value, input),)) == 1
+
+    def write_many(self, records: Iterable[Record]) -> int:
+        """
+        Write records and publish them at once (writer side)
+        :return: the number of records written, the others are dropped
+        """
+        header = self.header
+        head = header[HEAD]
+        free = self.capacity - (head - header[TAIL])
+        pack_into = RECORD.pack_into
+        buffer = self.records
+        mask = self._mask
+        size = RECORD.size
+        written = 0
+        dropped = 0
+        for record in records:
+            if written == free:
+                dropped += 1
+                continue
+            pack_into(buffer, ((head + written) & mask) * size, *record)
+            written += 1
+        if dropped:
+            header[DROPPED] += dropped
+        # publish the records once they are complete
+        header[HEAD] = head + written
+        return written
+
+    def read(self, max_records: int = None) -> List[Record]:
+        """
+        Take the records written so far (reader side)
+        :param max_records: maximum number of records to take
+        """
+        header = self.header
+        tail = header[TAIL]
+        count = header[HEAD] - tail
+        if max_records is not None:
+            count = min(count, max_records)
+        if count == 0:
+            return []
+        size = RECORD.size
+        start = tail & self._mask
+        end = start + count
+        if end <= self.capacity:
+            records = list(RECORD.iter_unpack(self.records[start * size:end * size]))
+        else:
+            records = list(RECORD.iter_unpack(self.records[start * size:]))
+            records += RECORD.iter_unpack(self.records[:(end - self.capacity) * size])
+        # free the slots once they are read
+        header[TAIL] = tail + count
+        return records
+
+    def close(self) -> None:
+        """
+        Release the shared memory block of this process (the creator should also call unlink).
+        """
+        self.header.release()
+        self.records.release()
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
+
+
+def _notify(fd: int) -> None:
+    """
+    Wake the reader up (non blocking: if the pipe is full, the reader has wakeups pending anyway)
+    """
+    try:
+        os.write(fd, b"\x01")
+    except BlockingIOError:
+        pass
+
+
+def _read_device(path: str, config: Dict[str, Any], ring_name: str, notify: Connection) -> None:
+    """
+    Main function of the child process of a ProcessReader: reads the device with a GamepadHandler
+    and writes the records of its events into the ring, one batch per read of the device.
+    Returns when the device is lost or when the main process is gone.
+    """
+    import evdev
+    from .gamepad import GamepadHandler
+
+    ring = EventRing.attach(ring_name)
+    notify_fd = notify.fileno()
+    os.set_blocking(notify_fd, False)
+    parent = os.getppid()
+    device = None
+    try:
+        device = evdev.InputDevice(path)
+        handler = GamepadHandler(device=device, compiled_dispatch=True, **config)
+        batch : List[Record] = []
+        handler.subscribe(lambda event_info: batch.append((event_info.timestamp_ns, event_info.event_value, event_info.input)))
+        handle_event = handler.handle_event
+        while os.getppid() == parent:
+            if not select.select([device.fd], [], [], 1.0)[0]:
+                continue
+            try:
+                events = device.read()
+            except BlockingIOError:
+                # woken up without any event to read (the device is opened non blocking), not a lost device
+                continue
+            for event in events:
+                handle_event(event)
+            if batch:
+                ring.write_many(batch)
+                batch.clear()
+                _notify(notify_fd)
+    except OSError:
+        # the device is lost (or the main process is gone)
+        pass
+    finally:
+        ring.close()
+        if device is not None:
+            try:
+                device.close()
+            except OSError:
+                pass
+
+
+class ProcessReader:
+    """
+    Child process reading a device into an EventRing, and the main process side of it
+    """
+
+    def __init__(self, path: str, config: Dict[str, Any], capacity: int = 4096):
+        """
+        :param path: the path of the device (/dev/input/eventN)
+        :param config: arguments of the GamepadHandler of the child process (ids, offsets, amplitudes, epsilons, smoothing_epsilon,
+            auto_calibrate, resync...), they must be picklable
+        :param capacity: capacity of the ring (see EventRing)
+        """
+        self.path = path
+        self.ring = EventRing(capacity)
+        # a new interpreter rather than a fork, the main process may have threads (listeners, pools...)
+        context = multiprocessing.get_context("spawn")
+        self._notify_reader, notify_writer = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_read_device,
+            args=(path, config, self.ring.name, notify_writer),
+            name=f"inputflow-reader-{os.path.basename(path)}",
+            daemon=True,
+        )
+        self.process.start()
+        notify_writer.close()
+        self._notify_fd = self._notify_reader.fileno()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def read(self, timeout: float = None) -> List[Record]:
+        """
+        Take the records written by the child process, waiting for some if there are none.
+        :param timeout: maximum wait in seconds, None to wait until there are records or the child process ends
+        :return: the records (empty after a timeout, or when the child process has ended)
+        """
+        records = self.ring.read()
+        if records:
+            return records
+        # the writer notifies after publishing, so records written before the wakeup are visible after it
+        ready = select.select([self._notify_fd], [], [], timeout)[0]
+        if ready:
+            try:
+                # an empty read means the child process has ended
+                os.read(self._notify_fd, 4096)
+            except OSError:
+                pass
+        return self.ring.read()
+
+    def close(self) -> None:
+        """
+        Stop the child process and free the ring
+        """
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self._notify_reader.close()
+        self.ring.close()
+        self.ring.unlink()
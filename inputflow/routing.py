@@ -0,0 +1,345 @@
+"""
+Declarative routing of input values between handlers, with transforms:
+    graph = RoutingGraph()
+    graph.source("lt", gamepad, "L2")
+    graph.source("rt", gamepad, "R2")
+    graph.combine("trigger", max, "lt", "rt")
+    graph.map("throttle", lambda value: value ** 2, "trigger")
+    graph.sink("out", "throttle", target_handler, target_input)
+    graph.attach()
+The graph is sorted topologically and compiled once into a flat execution plan per source input,
+run by a single subscriber per source handler (no closure or bind per connection).
+"""
+from __future__ import annotations
+import math
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .flow_core import HandlerCore, EventInfo
+
+
+SOURCE = 0
+MAP = 1
+FILTER = 2
+COMBINE = 3
+SINK = 4
+# sink into a handler, emitted once the plan has run
+EMIT = 5
+
+KIND_NAMES = {SOURCE: "source", MAP: "map", FILTER: "filter", COMBINE: "combine", SINK: "sink", EMIT: "sink"}
+
+
+def magnitude(*values: float) -> float:
+    """
+    Norm of a vector of values, for instance the magnitude of a stick: graph.combine("lm", magnitude, "lh", "lv")
+    """
+    return math.hypot(*values)
+
+
+class RoutingNode:
+    def __init__(self, name: str, kind: int, inputs: Tuple[str, ...] = (), func: Callable = None, handler: HandlerCore = None, input: Any = None):
+        """
+        :param name: name of the node in the graph
+        :param kind: SOURCE, MAP, FILTER, COMBINE or SINK
+        :param inputs: names of the nodes giving their value to this one
+        :param func: the transform, predicate, combining function, or function called by a sink
+        :param handler: the handler of a source, or the target handler of a sink
+        :param input: the input of a source, or the target input of a sink
+        """
+        self.name = name
+        self.kind = kind
+        self.inputs = inputs
+        self.func = func
+        self.handler = handler
+        self.input = input
+
+    def __repr__(self) -> str:
+        return f"RoutingNode({self.name!r}, {KIND_NAMES[self.kind]}, inputs={list(self.inputs)})"
+
+
+class RoutingGraph:
+    """
+    Graph of nodes computing values from the events of source inputs:
+        source: the value of an input of a handler
+        map: func(value) of another node
+        filter: the value of another node, only when predicate(value) is true (the nodes after it don't run otherwise)
+        combine: func(*values) of several nodes, using the last value of every one of them (0 before their first value),
+            run whenever one of them changes
+        sink: gives the value of a node to an input of a handler (through its emit_signal) or to a function
+    Nodes are given by name and may refer to nodes added later, the graph is checked (unknown nodes, cycles)
+    when it is compiled. A sink feeding an input that is also a source of the graph counts as an edge of the graph.
+    """
+
+    def __init__(self):
+        self.nodes : Dict[str, RoutingNode] = {}
+        # compiled plans {source handler: {source input: plan}} (see compile)
+        self.plans : Dict[HandlerCore, Dict[Any, Tuple]] = {}
+        self._slots : Dict[str, int] = {}
+        self._values : List[float] = []
+        self._stamps : List[int] = []
+        self._tick = 0
+        # time and device of the source event of the current run, given to the events emitted by the sinks
+        self._timestamp_ns = 0
+        self._device_id = 0
+        self._lock : threading.Lock = None
+        self._subscribers : Dict[HandlerCore, Callable[[EventInfo], None]] = {}
+
+    def _add(self, node: RoutingNode) -> str:
+        if node.name in self.nodes:
+            raise ValueError(f"Node '{node.name}' is already in the graph")
+        self.nodes[node.name] = node
+        self.plans = {}
+        return node.name
+
+    def source(self, name: str, handler: HandlerCore, input: Any) -> str:
+        input = handler.resolve_input(input)
+        return self._add(RoutingNode(name, SOURCE, handler=handler, input=input))
+
+    def map(self, name: str, func: Callable[[float], float], node: str) -> str:
+        return self._add(RoutingNode(name, MAP, (node,), func))
+
+    def filter(self, name: str, predicate: Callable[[float], bool], node: str) -> str:
+        return self._add(RoutingNode(name, FILTER, (node,), predicate))
+
+    def combine(self, name: str, func: Callable[..., float], *nodes: str) -> str:
+        if not nodes:
+            raise ValueError(f"Combine node '{name}' needs at least one input")
+        return self._add(RoutingNode(name, COMBINE, nodes, func))
+
+    def sink(self, name: str, node: str, target: HandlerCore | Callable[[float], Any], target_input: Any = None) -> str:
+        """
+        :param target: a handler, or a function taking the value
+        :param target_input: the input of the target handler
+        """
+        if callable(getattr(target, "emit_signal", None)):
+            target_input = target.resolve_input(target_input)
+            return self._add(RoutingNode(name, SINK, (node,), handler=target, input=target_input))
+        return self._add(RoutingNode(name, SINK, (node,), target))
+
+    def remove(self, name: str) -> None:
+        del self.nodes[name]
+        self.plans = {}
+
+    def _edges(self) -> Dict[str, List[str]]:
+        """
+        The nodes fed by every node
+        """
+        edges : Dict[str, List[str]] = {name: [] for name in self.nodes}
+        sources : Dict[Tuple[int, Any], List[str]] = {}
+        for node in self.nodes.values():
+            if node.kind == SOURCE:
+                sources.setdefault((id(node.handler), node.input), []).append(node.name)
+            for input in node.inputs:
+                if input not in self.nodes:
+                    raise ValueError(f"Unknown node '{input}' given as input of '{node.name}'")
+                edges[input].append(node.name)
+        for node in self.nodes.values():
+            if node.kind == SINK and node.handler is not None:
+                edges[node.name].extend(sources.get((id(node.handler), node.input), ()))
+        return edges
+
+    def topological_order(self) -> List[str]:
+        """
+        The names of all the nodes, every node after the nodes it depends on.
+        :raise ValueError: if the graph has a cycle
+        """
+        edges = self._edges()
+        in_degrees = {name: 0 for name in self.nodes}
+        for targets in edges.values():
+            for target in targets:
+                in_degrees[target] += 1
+        ready = [name for name, degree in in_degrees.items() if degree == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for target in edges[name]:
+                in_degrees[target] -= 1
+                if in_degrees[target] == 0:
+                    ready.append(target)
+        if len(order) != len(self.nodes):
+            cycle = sorted(name for name, degree in in_degrees.items() if degree > 0)
+            raise ValueError(f"The routing graph has a cycle through the nodes {cycle}")
+        return order
+
+    def compile(self) -> Dict[HandlerCore, Dict[Any, Tuple]]:
+        """
+        Build the execution plan of every source input: the steps (kind, slot, func, input slots) of the nodes
+        reachable from the sources of that input, in topological order.
+        Called by attach, and needed again after any change of the graph.
+        """
+        order = self.topological_order()
+        edges = self._edges()
+        slots = {name: slot for slot, name in enumerate(order)}
+
+        plans : Dict[HandlerCore, Dict[Any, Tuple]] = {}
+        for name in order:
+            node = self.nodes[name]
+            if node.kind != SOURCE:
+                continue
+            plan = plans.setdefault(node.handler, {}).get(node.input)
+            reachable = set(plan[1]) if plan is not None else set()
+            source_slots = list(plan[0]) if plan is not None else []
+            source_slots.append(slots[name])
+            stack = [name]
+            while stack:
+                for target in edges[stack.pop()]:
+                    # sinks into a source of the graph go through the target handler, not through this plan
+                    if target not in reachable and self.nodes[target].kind != SOURCE:
+                        reachable.add(target)
+                        stack.append(target)
+            plans[node.handler][node.input] = (tuple(source_slots), reachable)
+
+        source_keys = {(id(node.handler), node.input) for node in self.nodes.values() if node.kind == SOURCE}
+        for handler, handler_plans in plans.items():
+            for input, (source_slots, reachable) in handler_plans.items():
+                steps = tuple(self._step(self.nodes[name], slots, source_keys) for name in order if name in reachable)
+                # without filters every node reachable from the source runs, no need to track which ones did
+                conditional = any(self.nodes[name].kind == FILTER for name in reachable)
+                handler_plans[input] = (source_slots, steps, conditional)
+
+        self._slots = slots
+        self._values = [0.0] * len(order)
+        self._stamps = [0] * len(order)
+        self._tick = 0
+        self.plans = plans
+        return plans
+
+    def _step(self, node: RoutingNode, slots: Dict[str, int], source_keys: set) -> Tuple[int, int, Any, Any]:
+        input_slots = tuple(slots[input] for input in node.inputs)
+        if node.kind == COMBINE:
+            return COMBINE, slots[node.name], node.func, input_slots
+        if node.kind != SINK or node.handler is None:
+            return node.kind, slots[node.name], node.func, input_slots[0]
+        handler = node.handler
+        target_input = node.input
+        if (id(handler), target_input) in source_keys:
+            return EMIT, slots[node.name], (handler, target_input), input_slots[0]
+        emit_signal = handler.emit_signal
+        make_event_info = handler.make_event_info
+
+        def emit(value: float) -> None:
+            emit_signal(make_event_info(target_input, value, self._timestamp_ns, self._device_id))
+
+        return SINK, slots[node.name], emit, input_slots[0]
+
+    def run(self, handler: HandlerCore, input: Any, value: float, timestamp_ns: int = None, device_id: int = None) -> None:
+        """
+        Run the plan of a source input for a new value
+        :param timestamp_ns: time of the value (monotonic clock), by default now
+        :param device_id: device of the value, by default the device id of the handler
+        """
+        plan = self.plans.get(handler, {}).get(input)
+        if plan is not None:
+            if timestamp_ns is None:
+                timestamp_ns = time.monotonic_ns()
+            self._execute(plan, value, timestamp_ns, handler.device_id if device_id is None else device_id)
+
+    def _execute(self, plan: Tuple, value: float, timestamp_ns: int, device_id: int) -> None:
+        if self._lock is None:
+            self._timestamp_ns = timestamp_ns
+            self._device_id = device_id
+            emits = self._run(plan, value)
+        else:
+            with self._lock:
+                self._timestamp_ns = timestamp_ns
+                self._device_id = device_id
+                emits = self._run(plan, value)
+        if emits is not None:
+            for handler, target_input, value in emits:
+                handler.emit_signal(handler.make_event_info(target_input, value, timestamp_ns, device_id))
+
+    def _run(self, plan: Tuple, value: float) -> List[Tuple[HandlerCore, Any, float]]:
+        """
+        :return: the values of the sinks into sources of the graph, emitted after the run so that the plan of that source
+            runs only once this one is complete (None if there are none)
+        """
+        emits = None
+        values = self._values
+        source_slots, steps, conditional = plan
+        for slot in source_slots:
+            values[slot] = value
+        if not conditional:
+            for kind, slot, func, inputs in steps:
+                if kind == SINK:
+                    func(values[inputs])
+                elif kind == MAP:
+                    values[slot] = func(values[inputs])
+                elif kind == COMBINE:
+                    values[slot] = func(*[values[input] for input in inputs])
+                else:
+                    if emits is None:
+                        emits = []
+                    emits.append((*func, values[inputs]))
+            return emits
+
+        stamps = self._stamps
+        self._tick += 1
+        tick = self._tick
+        for slot in source_slots:
+            stamps[slot] = tick
+        for kind, slot, func, inputs in steps:
+            if kind == COMBINE:
+                for input in inputs:
+                    if stamps[input] == tick:
+                        break
+                else:
+                    continue
+                values[slot] = func(*[values[input] for input in inputs])
+                stamps[slot] = tick
+                continue
+            if stamps[inputs] != tick:
+                continue
+            if kind == MAP:
+                values[slot] = func(values[inputs])
+            elif kind == FILTER:
+                if not func(values[inputs]):
+                    continue
+                values[slot] = values[inputs]
+            elif kind == SINK:
+                func(values[inputs])
+                continue
+            else:
+                if emits is None:
+                    emits = []
+                emits.append((*func, values[inputs]))
+                continue
+            stamps[slot] = tick
+        return emits
+
+    def attach(self) -> None:
+        """
+        Compile the graph and subscribe to the events of every source handler (once per handler).
+        When the sources belong to several handlers, runs are serialised with a lock since the handlers may be read from different threads.
+        """
+        self.detach()
+        plans = self.compile()
+        self._lock = threading.Lock() if len(plans) > 1 else None
+        for handler, handler_plans in plans.items():
+            self._subscribers[handler] = self._make_subscriber(handler_plans)
+            handler.subscribe(self._subscribers[handler])
+
+    def _make_subscriber(self, handler_plans: Dict[Any, Tuple]) -> Callable[[EventInfo], None]:
+        get_plan = handler_plans.get
+        execute = self._execute
+
+        def on_event(event_info: EventInfo) -> None:
+            plan = get_plan(event_info.input)
+            if plan is not None:
+                execute(plan, event_info.event_value, event_info.timestamp_ns, event_info.device_id)
+
+        return on_event
+
+    def detach(self) -> None:
+        for handler, subscriber in self._subscribers.items():
+            handler.unsubscribe(subscriber)
+        self._subscribers = {}
+
+    def value(self, name: str) -> float:
+        """
+        Last value of a node (0 before its first value), after compile
+        """
+        return self._values[self._slots[name]]
@@ -0,0 +1,201 @@
+"""
+Event sources that don't need a physical device, for tests and load generation:
+    MemoryEventSource: events pushed from code, read by a handler created with source=... (see HandlerCore.read_inputs)
+    UInputGamepad: a virtual gamepad created through /dev/uinput (evdev.UInput), read like a real one by GamepadHandler
+"""
+from __future__ import annotations
+import collections
+import importlib.util
+import os
+import threading
+import time
+from typing import Any, Deque, Iterable, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import evdev
+
+# evdev is only imported by UInputGamepad (it is slow to import, and MemoryEventSource doesn't need it)
+EV_KEY = 1
+EV_ABS = 3
+
+
+class SyntheticEvent:
+    """
+    Event shaped like evdev.events.InputEvent (sec, usec, type, code, value), without the evdev dependency
+    """
+    __slots__ = ("sec", "usec", "type", "code", "value")
+
+    def __init__(self, sec: int, usec: int, type: int, code: int, value: int):
+        self.sec = sec
+        self.usec = usec
+        self.type = type
+        self.code = code
+        self.value = value
+
+    def timestamp(self) -> float:
+        return self.sec + self.usec / 1_000_000
+
+    def __repr__(self) -> str:
+        return f"SyntheticEvent({self.sec}, {self.usec}, {self.type}, {self.code}, {self.value})"
+
+
+class MemoryEventSource:
+    """
+    In-memory queue of events, filled by push from any thread and read by a handler created with source=...:
+        source = MemoryEventSource()
+        handler = GamepadHandler(source=source)
+        handler.background_loop()
+        source.push_event(EV_KEY, BTN_SOUTH, 1)
+    The events go through handle_event like the events of a device (any event type the handler accepts can be pushed,
+    for instance PynputKeyboardEvent for a KeyboardHandler).
+    Reading drains the whole queue at once, so that millions of events cost little more than their handling.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        """
+        :param maxsize: number of events after which push waits for the handler to read (0 for no limit)
+        """
+        self.maxsize = maxsize
+        self.closed = False
+        self._events : Deque[Any] = collections.deque()
+        self._condition = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def _wait_for_room(self) -> None:
+        while self.maxsize and len(self._events) >= self.maxsize and not self.closed:
+            self._condition.wait()
+
+    def push(self, event: Any) -> None:
+        with self._condition:
+            if self.closed:
+                raise ValueError("Push to a closed event source")
+            self._wait_for_room()
+            self._events.append(event)
+            self._condition.notify_all()
+
+    def push_many(self, events: Iterable[Any]) -> None:
+        """
+        Push events at once (maxsize is only checked before pushing)
+        """
+        with self._condition:
+            if self.closed:
+                raise ValueError("Push to a closed event source")
+            self._wait_for_room()
+            self._events.extend(events)
+            self._condition.notify_all()
+
+    def push_event(self, type: int, code: int, value: int, timestamp_ns: int = None) -> None:
+        """
+        Push a SyntheticEvent, stamped with the current time (CLOCK_REALTIME like evdev) by default
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        sec, nsec = divmod(timestamp_ns, 1_000_000_000)
+        self.push(SyntheticEvent(sec, nsec // 1000, type, code, value))
+
+    def read(self, timeout: float = None) -> Deque[Any]:
+        """
+        Take all the events pushed so far, waiting for at least one unless the source is closed.
+        :param timeout: maximum wait in seconds, None to wait until there are events
+        :return: the events (empty after a timeout, or when the source is closed and empty)
+        """
+        with self._condition:
+            if not self._events and not self.closed:
+                self._condition.wait_for(lambda: self._events or self.closed, timeout)
+            events = self._events
+            self._events = collections.deque()
+            self._condition.notify_all()
+        return events
+
+    def close(self) -> None:
+        """
+        No more events: readers stop once the queue is empty (see HandlerCore.loop)
+        """
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+def uinput_available() -> bool:
+    return importlib.util.find_spec("evdev") is not None and os.access("/dev/uinput", os.W_OK)
+
+
+class UInputGamepad:
+    """
+    Virtual gamepad created through /dev/uinput (needs evdev and write access to /dev/uinput, see uinput_available).
+    It is a real input device for the kernel, found by GamepadHandler and DeviceHub like a physical one
+    (see device_profiles/inputflow_virtual_gamepad.json):
+        pad = UInputGamepad()
+        handler = GamepadHandler(device=pad.open_device())
+        pad.press(ecodes.BTN_SOUTH)
+        pad.move(ecodes.ABS_X, 1000)
+    """
+    NAME = "inputflow virtual gamepad"
+    BUTTONS = (304, 305, 307, 308, 310, 311, 314, 315, 316, 317, 318)   # BTN_SOUTH ... BTN_THUMBR
+    STICK_AXES = (0, 1, 3, 4)       # ABS_X, ABS_Y, ABS_RX, ABS_RY
+    TRIGGER_AXES = (2, 5)           # ABS_Z, ABS_RZ
+    HAT_AXES = (16, 17)             # ABS_HAT0X, ABS_HAT0Y
+
+    def __init__(self, name: str = NAME):
+        try:
+            import evdev
+        except ImportError as e:
+            raise ImportError("UInputGamepad requires evdev") from e
+        self.evdev = evdev
+        axes = (
+            [(code, evdev.AbsInfo(0, -32768, 32767, 16, 128, 0)) for code in self.STICK_AXES]
+            + [(code, evdev.AbsInfo(0, 0, 255, 0, 0, 0)) for code in self.TRIGGER_AXES]
+            + [(code, evdev.AbsInfo(0, -1, 1, 0, 0, 0)) for code in self.HAT_AXES]
+        )
+        capabilities = {EV_KEY: list(self.BUTTONS), EV_ABS: axes}
+        self.uinput = evdev.UInput(capabilities, name=name, vendor=0x1, product=0x1, version=0x1)
+
+    def open_device(self, timeout: float = 1.0) -> evdev.InputDevice:
+        """
+        The input device of the virtual gamepad, to give to a GamepadHandler (waits for udev to create its node)
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self.evdev.InputDevice(self.uinput.device.path)
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+
+    def emit(self, type: int, code: int, value: int, syn: bool = True) -> None:
+        """
+        :param syn: end the frame with a SYN_REPORT
+        """
+        self.uinput.write(type, code, value)
+        if syn:
+            self.uinput.syn()
+
+    def emit_many(self, events: Iterable[tuple]) -> None:
+        """
+        Write (type, code, value) events, then a single SYN_REPORT
+        """
+        write = self.uinput.write
+        for type, code, value in events:
+            write(type, code, value)
+        self.uinput.syn()
+
+    def press(self, code: int) -> None:
+        self.emit(EV_KEY, code, 1)
+
+    def release(self, code: int) -> None:
+        self.emit(EV_KEY, code, 0)
+
+    def move(self, axis: int, value: int) -> None:
+        self.emit(EV_ABS, axis, value)
+
+    def close(self) -> None:
+        self.uinput.close()
+
+    def __enter__(self) -> UInputGamepad:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import weakref
+from array import array
+from typing import Any, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from multiprocessing import shared_memory
+
+
+class InputStateVector:
+    """
+    Current value of every input of a handler whose inputs are small integers (see FixedInputListHandler),
+    kept in a flat buffer of doubles: the value of input i is at index i and the last slot holds a sequence number,
+    which is odd while a write is in progress and is increased by 2 by every write (seqlock).
+    The buffer can live in shared memory so that other processes can read it (see attach).
+    There must be a single writer, any number of readers.
+    """
+    BACKENDS = ("array", "numpy", "shared")
+
+    def __init__(self, size: int, backend: str = "array", name: str = None):
+        """
+        :param size: the number of inputs (largest input + 1)
+        :param backend: "array" (array.array), "numpy" (numpy.ndarray) or "shared" (multiprocessing.shared_memory)
+        :param name: name of the shared memory block, only for the "shared" backend (a name is generated if none is given)
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown state buffer backend '{backend}', must be one of {self.BACKENDS}")
+        self.size = size
+        self.backend = backend
+        self.shm : shared_memory.SharedMemory = None
+        # view given by snapshot, made once and released by close (the shared memory block can't be closed while it exists)
+        self._view : memoryview = None
+        self._unlink : weakref.finalize = None
+        if backend == "array":
+            self.buffer = array("d", bytes(8 * (size + 1)))
+        elif backend == "numpy":
+            try:
+                import numpy
+            except ImportError as e:
+                raise ImportError("The 'numpy' state buffer backend requires numpy") from e
+            self.buffer = numpy.zeros(size + 1, dtype=numpy.float64)
+        else:
+            # imported here, it is slow to import and only needed by this backend
+            from multiprocessing import shared_memory
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=8 * (size + 1))
+            self.buffer = self.shm.buf.cast("d")
+            self.buffer[:] = array("d", bytes(8 * (size + 1)))
+            # the creator owns the block: it is unlinked on close, or when the state vector is garbage collected
+            self._unlink = weakref.finalize(self, self.shm.unlink)
+        self._sequence = 0
+
+    @classmethod
+    def attach(cls, name: str, size: int) -> InputStateVector:
+        """
+        Open the state vector of a handler from another process, for reading.
+        :param name: name of the shared memory block (see the name property)
+        :param size: the number of inputs of the handler
+        """
+        from multiprocessing import shared_memory
+        state = cls.__new__(cls)
+        state.size = size
+        state.backend = "shared"
+        state.shm = shared_memory.SharedMemory(name=name)
+        state._view = None
+        state._unlink = None
+        state.buffer = state.shm.buf.cast("d")
+        state._sequence = int(state.buffer[size])
+        return state
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the shared memory block (None if the buffer is not shared)
+        """
+        return self.shm.name if self.shm is not None else None
+
+    @property
+    def sequence(self) -> int:
+        return int(self.buffer[self.size])
+
+    def update(self, event_info: Any) -> None:
+        """
+        Store the value of an event (writer side).
+        """
+        if event_info.input < 0:
+            # NULL input, the event isn't mapped to any input
+            return
+        buffer = self.buffer
+        sequence = self._sequence
+        buffer[self.size] = sequence + 1
+        buffer[event_info.input] = event_info.event_value
+        buffer[self.size] = sequence + 2
+        self._sequence = sequence + 2
+
+    def snapshot(self) -> Any:
+        """
+        Zero-copy view of the values indexed by input, it follows the updates (use read for a consistent copy).
+        :return: a memoryview, or a numpy array for the "numpy" backend.
+            A "shared" state vector gives the same memoryview every time, released by close.
+        """
+        if self.backend == "numpy":
+            return self.buffer[:self.size]
+        if self.backend == "array":
+            return memoryview(self.buffer)[:self.size]
+        if self._view is None:
+            self._view = self.buffer[:self.size]
+        return self._view
+
+    def read(self) -> Tuple[int, List[float]]:
+        """
+        Consistent copy of the values, retried while a write is in progress.
+        :return: the sequence number and the list of values
+        """
+        buffer = self.buffer
+        while True:
+            sequence = buffer[self.size]
+            values = buffer[:self.size].tolist()
+            if sequence % 2 == 0 and buffer[self.size] == sequence:
+                return int(sequence), values
+
+    def close(self) -> None:
+        """
+        Release the shared memory block of this process, the creator also unlinks it.
+        """
+        if self.shm is not None:
+            if self._view is not None:
+                self._view.release()
+                self._view = None
+            self.buffer.release()
+            self.shm.close()
+            if self._unlink is not None:
+                self._unlink()
+
+    def unlink(self) -> None:
+        if self._unlink is not None:
+            # the finalizer unlinks once
+            self._unlink()
+        elif self.shm is not None:
+            self.shm.unlink()
@@ -19,11 +19,16 @@ setup(
         url="https://github.com/maschull106/inputflow.git",
         packages=find_packages(),
         python_requires=">=3.9",
-        install_requires=[
-                "pynput",
-        ],
+        install_requires=[],
+        extras_require={
+                "keyboard": ["pynput"],
+                "gamepad": ["evdev"],
+                "numpy": ["numpy"],
+                "all": ["pynput", "evdev", "numpy"],
+        },
         include_package_data=True,
         package_data={
+                "inputflow": ["device_profiles/*.json"],
         },
         keywords=["python, input, event, gamepad, keyboard, mouse"],
 )
\ No newline at end of file
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+from inputflow.aio import DeviceEventStream, EventStream
+from inputflow.flow_core import EventInfo, FixedInputListHandler
+from inputflow.sources import SyntheticEvent
+
+
+class Handler:
+    def __init__(self, device=None):
+        self.device = device
+        self.subscribers = []
+
+    def subscribe(self, func):
+        self.subscribers.append(func)
+
+    def unsubscribe(self, func):
+        self.subscribers.remove(func)
+
+    def handle_event(self, event):
+        for func in self.subscribers:
+            func(EventInfo(0, event))
+
+    def flush_change_filters(self):
+        return None
+
+
+class UnpluggedDevice:
+    async def async_read_loop(self):
+        yield 1.0
+        await asyncio.sleep(0.05)
+        raise OSError(19, "No such device")
+
+
+def test_unplug_ends_waiting_iteration():
+    async def main():
+        values = []
+        try:
+            async for event_info in DeviceEventStream(Handler(UnpluggedDevice())):
+                values.append(event_info.event_value)
+        except OSError as error:
+            return values, error.errno
+
+    assert asyncio.run(asyncio.wait_for(main(), 2)) == ([1.0], 19)
+
+
+def test_close_releases_blocked_producer():
+    async def main():
+        stream = EventStream(Handler(), maxsize=1, policy="block")
+        producer = threading.Thread(target=lambda: [stream._on_event(EventInfo(0, value)) for value in range(3)])
+        producer.start()
+        assert (await stream.__anext__()).event_value == 0
+        await asyncio.sleep(0.05)
+        await stream.aclose()
+        await asyncio.to_thread(producer.join, 1)
+        return producer.is_alive(), stream.dropped
+
+    assert asyncio.run(main()) == (False, 1)
+
+
+class AxisHandler(FixedInputListHandler):
+    INPUTS = {-1: "NULL", 0: "x"}
+    DEFAULT_IDS = {0: 0}
+
+    def get_event_id(self, event):
+        return event.code
+
+    def get_event_raw_value(self, event):
+        return event.value
+
+
+class MovingDevice:
+    async def async_read_loop(self):
+        for value in (1, 2, 3):
+            yield SyntheticEvent(0, 0, 3, 0, value)
+        await asyncio.sleep(10)
+
+
+def test_device_stream_flushes_the_last_value():
+    async def main():
+        handler = AxisHandler()
+        handler.device = MovingDevice()
+        handler.set_change_filter(0, max_rate=20)
+        values = []
+        async with DeviceEventStream(handler) as stream:
+            async for event_info in stream:
+                values.append(event_info.event_value)
+                if len(values) == 2:
+                    break
+        return values
+
+    assert asyncio.run(asyncio.wait_for(main(), 2)) == [1.0, 3.0]
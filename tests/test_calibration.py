@@ -0,0 +1,19 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from inputflow.calibration import AxisCalibration, Calibrator
+
+
+def test_signed_axis_batch():
+    calibrator = Calibrator({"x": AxisCalibration(offset=0, amplitude=32768)})
+    raw = np.array([-32768, -16384, 0, 16384, 32767, 40000, -40000], dtype=np.int32)
+    values = calibrator.calibrate_batch(np.full(len(raw), "x"), raw)
+    assert values.tolist() == pytest.approx([-1.0, -0.5, 0.0, 0.5, 32767 / 32768, 1.0, -1.0])
+    assert calibrator.lut_range("x") == (-32768, 32768)
+
+
+def test_values_outside_explicit_range_are_not_wrapped():
+    calibrator = Calibrator({"x": AxisCalibration(offset=128, amplitude=128, clamp=None)})
+    raw = np.array([0, 255, 300, -10])
+    values = calibrator.calibrate_batch(np.full(len(raw), "x"), raw, low=0, high=255)
+    assert values.tolist() == pytest.approx([-1.0, 127 / 128, 172 / 128, -138 / 128])
@@ -0,0 +1,89 @@
+import threading
+import time
+import pytest
+from inputflow.flow_core import FixedInputListHandler
+from inputflow.sources import EV_ABS, MemoryEventSource, SyntheticEvent
+
+ABS_X = 0
+
+
+class AxisHandler(FixedInputListHandler):
+    INPUTS = {-1: "NULL", 0: "x", 1: "y"}
+    DEFAULT_IDS = {0: 0, 1: 1}
+
+    def get_event_id(self, event):
+        return event.code
+
+    def get_event_raw_value(self, event):
+        return event.value
+
+
+def test_rate_limited_values_are_flushed_by_the_reader():
+    source = MemoryEventSource()
+    handler = AxisHandler(source=source)
+    values, threads = [], set()
+
+    def on_event(value):
+        values.append(value)
+        threads.add(threading.current_thread())
+
+    handler.bind(0, on_event, "value")
+    handler.set_change_filter(0, max_rate=20)
+    thread = handler.background_loop()
+    source.push_many(SyntheticEvent(0, 0, 3, 0, value) for value in range(1, 6))
+    deadline = time.monotonic() + 2.0
+    while values != [1.0, 5.0] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    source.close()
+    thread.join(2.0)
+    assert values == [1.0, 5.0]
+    # no timer thread: the values held back are emitted by the thread reading the handler
+    assert threads == {thread}
+
+
+def test_flush_waits_for_the_interval():
+    handler = AxisHandler(source=MemoryEventSource())
+    values = []
+    handler.bind(1, lambda value: values.append(value), "value")
+    handler.set_change_filter(1, max_rate=10)
+    for value in (1, 2, 3):
+        handler.handle_event(SyntheticEvent(0, 0, 3, 1, value))
+    assert values == [1.0]
+    delay = handler.flush_change_filters()
+    assert 0 < delay <= 0.1
+    assert handler.flush_change_filters(time.monotonic() + delay) is None
+    assert values == [1.0, 3.0]
+
+
+def test_gamepad_source_flushes_the_last_value():
+    gamepad = pytest.importorskip("inputflow.gamepad", exc_type=ImportError)
+    source = MemoryEventSource()
+    handler = gamepad.GamepadHandler(source=source)
+    values = []
+    handler.bind(handler.LH, lambda value: values.append(value), "value")
+    handler.set_change_filter(handler.LH, max_rate=20)
+    thread = handler.background_loop()
+    source.push_many(SyntheticEvent(0, 0, EV_ABS, ABS_X, value) for value in (10, 20, 30))
+    deadline = time.monotonic() + 2.0
+    while values != [10.0, 30.0] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    source.close()
+    thread.join(2.0)
+    assert values == [10.0, 30.0]
+
+
+def test_keyboard_listener_flushes_the_last_value():
+    keyboard = pytest.importorskip("inputflow.keyboard", exc_type=ImportError)
+    handler = keyboard.KeyboardHandler(listen=False)
+    key = keyboard.kbrd.KeyCode.from_char("a")
+    values = []
+    handler.bind(key, lambda value: values.append(value), "value")
+    handler.set_change_filter(key, max_rate=20)
+    # the events of the pynput listener
+    handler._on_press(key)
+    handler._on_release(key)
+    assert values == [1.0]
+    deadline = time.monotonic() + 2.0
+    while values != [1.0, 0.0] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert values == [1.0, 0.0]
@@ -0,0 +1,48 @@
+import pytest
+
+gamepad = pytest.importorskip("inputflow.gamepad", exc_type=ImportError)
+from evdev import ecodes
+from evdev.events import InputEvent
+
+
+class AbsInfo:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeDevice:
+    name = "Generic X-Box pad"
+
+    def __init__(self):
+        self.keys = []
+        self.axes = {ecodes.ABS_X: 0, ecodes.ABS_Y: 0}
+
+    def capabilities(self, absinfo=True):
+        axes = [(code, AbsInfo(value)) for code, value in self.axes.items()] if absinfo else list(self.axes)
+        return {ecodes.EV_KEY: [ecodes.BTN_SOUTH, ecodes.BTN_EAST], ecodes.EV_ABS: axes}
+
+    def active_keys(self):
+        return self.keys
+
+    def absinfo(self, code):
+        return AbsInfo(self.axes[code])
+
+
+def test_resync_events_go_through_taps():
+    device = FakeDevice()
+    handler = gamepad.GamepadHandler(device=device, resync=True)
+    tapped, values = [], []
+    handler.add_event_tap(lambda event: tapped.append((event.type, event.code, event.value)))
+    handler.bind_all(lambda value, input: values.append((input, value)), "value", "input")
+    # the kernel buffer overflowed: the press of BTN_SOUTH is lost, BTN_EAST is pressed and ABS_X moved meanwhile
+    device.keys = [ecodes.BTN_EAST]
+    device.axes[ecodes.ABS_X] = 100
+    for type, code, value in ((ecodes.EV_SYN, ecodes.SYN_DROPPED, 0), (ecodes.EV_KEY, ecodes.BTN_SOUTH, 1), (ecodes.EV_SYN, ecodes.SYN_REPORT, 0)):
+        handler.handle_event(InputEvent(0, 0, type, code, value))
+    assert tapped[3:] == [(ecodes.EV_KEY, ecodes.BTN_EAST, 1), (ecodes.EV_ABS, ecodes.ABS_X, 100), (ecodes.EV_SYN, ecodes.SYN_REPORT, 0)]
+    assert [input for input, _ in values] == [handler.CIRCLE, handler.LH]
+
+
+def test_resync_is_opt_in():
+    handler = gamepad.GamepadHandler(device=FakeDevice())
+    assert handler.handle_event == handler._handle_event_interpreted
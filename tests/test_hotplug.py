@@ -0,0 +1,95 @@
+import os
+from inputflow.hotplug import DeviceMonitor, PollingDirectoryWatcher
+
+
+class FakeDevice:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path) as file:
+            self.name = file.read()
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def make_monitor(path, connected, disconnected, opened):
+    def open_device(device_path):
+        opened.append(os.path.basename(device_path))
+        return FakeDevice(device_path)
+    return DeviceMonitor(
+        lambda device: connected.append(os.path.basename(device.path)),
+        lambda device_path: disconnected.append(os.path.basename(device_path)),
+        match=lambda device: device.name == "pad",
+        watcher=PollingDirectoryWatcher(str(path), interval=0.01),
+        open_device=open_device,
+    )
+
+
+def test_plug_and_unplug(tmp_path):
+    connected, disconnected, opened = [], [], []
+    monitor = make_monitor(tmp_path, connected, disconnected, opened)
+    monitor.scan()
+    (tmp_path / "event0").write_text("pad")
+    (tmp_path / "event1").write_text("keyboard")
+    (tmp_path / "mouse0").write_text("pad")
+    monitor.poll(1.0)
+    assert connected == ["event0"]
+    assert sorted(opened) == ["event0", "event1"]
+    (tmp_path / "event0").unlink()
+    monitor.poll(1.0)
+    assert disconnected == ["event0"]
+    assert str(tmp_path / "event0") not in monitor.connected
+
+
+def test_devices_present_at_scan_connect_once(tmp_path):
+    # the watcher lists the directory when it is created, the device must not be reported again after the scan
+    connected, disconnected, opened = [], [], []
+    monitor = make_monitor(tmp_path, connected, disconnected, opened)
+    (tmp_path / "event0").write_text("pad")
+    monitor.scan()
+    monitor.poll(0.05)
+    monitor.scan()
+    assert connected == ["event0"]
+    assert opened == ["event0"]
+
+
+def test_known_path_is_not_reopened(tmp_path):
+    connected, disconnected, opened = [], [], []
+    monitor = make_monitor(tmp_path, connected, disconnected, opened)
+    (tmp_path / "event0").write_text("pad")
+    path = str(tmp_path / "event0")
+    monitor._open(path)
+    monitor._open(path)
+    assert connected == ["event0"]
+    assert opened == ["event0"]
+
+
+def test_unreadable_node_is_retried_after_delay(tmp_path):
+    attempts = []
+
+    def open_device(device_path):
+        attempts.append(device_path)
+        if len(attempts) < 3:
+            raise PermissionError(13, "Permission denied")
+        return FakeDevice(device_path)
+    connected = []
+    monitor = DeviceMonitor(
+        lambda device: connected.append(os.path.basename(device.path)),
+        watcher=PollingDirectoryWatcher(str(tmp_path), interval=0.01),
+        open_device=open_device,
+    )
+    monitor.RETRY_DELAY = 0.2
+    monitor.scan()
+    (tmp_path / "event0").write_text("pad")
+    monitor.poll(0.01)
+    for _ in range(5):
+        monitor.poll(0.01)
+    # not retried on every poll
+    assert len(attempts) == 1
+    monitor.poll(0.25)
+    assert len(attempts) == 2
+    monitor.poll(0.45)
+    assert len(attempts) == 3
+    assert connected == ["event0"]
+    assert not monitor.pending
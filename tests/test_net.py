@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+from inputflow.flow_core import FixedInputListHandler
+from inputflow.net import EventServer, FrameDecoder, RemoteHandler, encode_define, encode_events, encode_message, HELLO, HELLO_PAYLOAD, PROTOCOL_VERSION
+from inputflow.sources import MemoryEventSource, SyntheticEvent
+
+
+class PadHandler(FixedInputListHandler):
+    INPUTS = {-1: "NULL", 0: "LH", 1: "cross"}
+    DEFAULT_IDS = {0: 0, 1: 304}
+
+    def get_event_id(self, event):
+        return event.code
+
+    def get_event_raw_value(self, event):
+        return event.value
+
+
+def event(code, value):
+    return SyntheticEvent(0, 0, 3, code, value)
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_inputs_of_several_devices_are_kept_apart():
+    async def main():
+        pads = [PadHandler(source=MemoryEventSource(), device_id=device_id) for device_id in (1, 2)]
+        server = EventServer(*pads, port=0)
+        await server.start()
+        every_device = RemoteHandler("127.0.0.1", server.port)
+        second_pad = RemoteHandler("127.0.0.1", server.port, device=2)
+        received, second = [], []
+        every_device.bind("1/LH", lambda value: received.append(("1/LH", value)), "value")
+        every_device.bind("2/LH", lambda value: received.append(("2/LH", value)), "value")
+        second_pad.bind("LH", lambda value: second.append(value), "value")
+        readers = [every_device.background_loop(), second_pad.background_loop()]
+        # without delta encoding, the events sent before a client is accepted don't reach it
+        await wait_for(lambda: len(server.clients) == 2)
+
+        pads[0].handle_event(event(0, 0.25))
+        pads[1].handle_event(event(0, -0.5))
+        pads[0].handle_event(event(0, 0.75))
+        await wait_for(lambda: len(received) == 3 and len(second) == 1)
+        assert received == [("1/LH", 0.25), ("2/LH", -0.5), ("1/LH", 0.75)]
+        assert second == [-0.5]
+        assert every_device.devices == {1: ["LH"], 2: ["LH"]}
+        assert second_pad.inputs == ["LH"]
+
+        # the clients are still connected
+        await asyncio.wait_for(server.close(), 5.0)
+        for reader in readers:
+            reader.join(5.0)
+            assert not reader.is_alive()
+
+    asyncio.run(main())
+
+
+def test_late_client_gets_the_current_values_with_delta():
+    async def main():
+        pad = PadHandler(source=MemoryEventSource(), device_id=7)
+        server = EventServer(pad, port=0, delta=True)
+        await server.start()
+        pad.handle_event(event(304, 1))
+        pad.handle_event(event(304, 1))
+        await wait_for(lambda: server.events == 2)
+        remote = RemoteHandler("127.0.0.1", server.port, device=7)
+        values = []
+        remote.bind("cross", lambda value: values.append(value), "value")
+        reader = remote.background_loop()
+        await wait_for(lambda: values == [1.0])
+        assert server.suppressed == 1
+        remote.close()
+        reader.join(5.0)
+        await asyncio.wait_for(server.close(), 5.0)
+
+    asyncio.run(main())
+
+
+def test_decoder_handles_split_messages():
+    records = [(0, 100, 0.5, 1), (1, 200, 1.0, 1), (0, 300, 0.25, 2), (1, 300 + 2 ** 33, 0.0, 2)]
+    data = encode_message(HELLO, HELLO_PAYLOAD.pack(PROTOCOL_VERSION, 5, 0))
+    data += encode_define(0, 1, "LH") + encode_define(1, 2, "cross") + bytes(encode_events(records))
+    decoder = FrameDecoder()
+    events = []
+    for start in range(0, len(data), 7):
+        events += decoder.feed(data[start:start + 7])
+    assert events == [("1/LH", 0.5, 100, 1), ("2/cross", 1.0, 200, 1), ("1/LH", 0.25, 300, 2), ("2/cross", 0.0, 300 + 2 ** 33, 2)]
+    assert decoder.inputs == {0: (1, "LH"), 1: (2, "cross")}
+
+
+def test_decoder_stopped_early_keeps_the_next_messages():
+    data = encode_define(0, 1, "LH") + bytes(encode_events([(0, 100, 0.5, 1), (0, 200, 0.75, 1)]))
+    decoder = FrameDecoder()
+    events = decoder.feed(data + bytes(encode_events([(0, 300, 1.0, 1)])))
+    assert next(events) == ("1/LH", 0.5, 100, 1)
+    events.close()
+    assert list(decoder.feed(b"")) == [("1/LH", 1.0, 300, 1)]
+
+
+def test_late_client_gets_waiting_events_once():
+    async def main():
+        pad = PadHandler(source=MemoryEventSource(), device_id=7)
+        server = EventServer(pad, port=0, delta=True, flush_interval=0.2)
+        await server.start()
+        # still waiting to be sent when the client connects
+        pad.handle_event(event(304, 1))
+        remote = RemoteHandler("127.0.0.1", server.port, device=7)
+        values = []
+        remote.bind("cross", lambda value: values.append(value), "value")
+        reader = remote.background_loop()
+        await wait_for(lambda: values == [1.0])
+        await asyncio.sleep(0.4)
+        assert values == [1.0]
+        remote.close()
+        reader.join(5.0)
+        await asyncio.wait_for(server.close(), 5.0)
+
+    asyncio.run(main())
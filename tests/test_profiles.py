@@ -0,0 +1,45 @@
+import json
+import os
+import types
+from inputflow.profiles import ProfileDatabase
+
+
+def write_profile(path, name, cross_id):
+    path.write_text(json.dumps({"names": [name], "config": {"cross_id": cross_id}}))
+
+
+def test_cache_follows_changes(tmp_path):
+    profiles, cache = tmp_path / "profiles", tmp_path / "cache"
+    profiles.mkdir()
+    write_profile(profiles / "pad.json", "Pad", 304)
+    pad = types.SimpleNamespace(name="Pad")
+    assert ProfileDatabase([profiles], cache_dir=cache).find(pad).config == {"cross_id": 304}
+    assert [path.suffix for path in cache.iterdir()] == [".json"]
+    # from the cache
+    assert ProfileDatabase([profiles], cache_dir=cache).find(pad).config == {"cross_id": 304}
+
+    write_profile(profiles / "pad.json", "Pad", 305)
+    stat = os.stat(profiles / "pad.json")
+    os.utime(profiles / "pad.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert ProfileDatabase([profiles], cache_dir=cache).find(pad).config == {"cross_id": 305}
+
+
+def test_cache_files_of_other_directories_are_kept(tmp_path):
+    first, second, cache = tmp_path / "first", tmp_path / "second", tmp_path / "cache"
+    for directory in (first, second):
+        directory.mkdir()
+        write_profile(directory / "pad.json", directory.name, 304)
+    assert len(ProfileDatabase([first], cache_dir=cache)) == 1
+    assert len(ProfileDatabase([second], cache_dir=cache)) == 1
+    assert len(list(cache.iterdir())) == 2
+
+
+def test_invalid_cache_is_ignored(tmp_path):
+    profiles, cache = tmp_path / "profiles", tmp_path / "cache"
+    profiles.mkdir()
+    write_profile(profiles / "pad.json", "Pad", 304)
+    database = ProfileDatabase([profiles], cache_dir=cache)
+    assert len(database) == 1
+    for cache_file in cache.iterdir():
+        cache_file.write_text("{not json")
+    assert ProfileDatabase([profiles], cache_dir=cache).find(types.SimpleNamespace(name="Pad")) is not None
@@ -0,0 +1,90 @@
+import pytest
+from inputflow.flow_core import FixedInputListHandler
+from inputflow.recording import EventLog, EventRecorder
+from inputflow.sources import EV_ABS, EV_KEY, MemoryEventSource
+
+BTN_SOUTH = 304
+ABS_X = 0
+# XF86AudioPlay, above 0xFFFF like the other X11 media keys
+VK_MEDIA_PLAY = 0x1008FF14
+
+
+def test_gamepad_record_replay(tmp_path):
+    gamepad = pytest.importorskip("inputflow.gamepad", exc_type=ImportError)
+    source = MemoryEventSource()
+    handler = gamepad.GamepadHandler(source=source)
+    path = str(tmp_path / "session.log")
+    with EventRecorder(path, handler) as recorder:
+        source.push_event(EV_KEY, BTN_SOUTH, 1, timestamp_ns=1_000_000_000)
+        source.push_event(EV_ABS, ABS_X, -300, timestamp_ns=1_000_001_000)
+        source.push_event(EV_KEY, BTN_SOUTH, 0, timestamp_ns=1_000_002_000)
+        handler.read_source()
+    assert recorder.count == 3
+
+    replayed = []
+    handler = gamepad.GamepadHandler(source=MemoryEventSource())
+    handler.add_event_tap(lambda event: replayed.append((event.type, event.code, event.value)))
+    with EventLog(path) as log:
+        assert len(log) == 3
+        assert log[1] == (1_000_001_000, EV_ABS, ABS_X, -300)
+        assert log.replay(handler) == 3
+    assert replayed == [(EV_KEY, BTN_SOUTH, 1), (EV_ABS, ABS_X, -300), (EV_KEY, BTN_SOUTH, 0)]
+
+
+def test_keyboard_wide_key_codes(tmp_path):
+    keyboard = pytest.importorskip("inputflow.keyboard", exc_type=ImportError)
+    source = MemoryEventSource()
+    handler = keyboard.KeyboardHandler(source=source)
+    media_key = keyboard.kbrd.KeyCode.from_vk(VK_MEDIA_PLAY)
+    path = str(tmp_path / "keys.log")
+    with EventRecorder(path, handler) as recorder:
+        source.push(keyboard.PynputKeyboardEvent(media_key, keyboard.KeyAction.PRESS))
+        source.push(keyboard.PynputKeyboardEvent(keyboard.kbrd.KeyCode.from_char("\U0001F600"), keyboard.KeyAction.PRESS))
+        source.push(keyboard.PynputKeyboardEvent(media_key, keyboard.KeyAction.RELEASE))
+        handler.read_source()
+    assert (recorder.count, recorder.skipped) == (3, 0)
+    with pytest.raises(ValueError):
+        handler.encode_event(keyboard.PynputKeyboardEvent(keyboard.kbrd.KeyCode(), keyboard.KeyAction.PRESS))
+
+    keys = []
+    handler = keyboard.KeyboardHandler(source=MemoryEventSource())
+    handler.add_event_tap(lambda event: keys.append((event.key, event.action)))
+    with EventLog(path) as log:
+        log.replay(handler)
+    assert keys == [
+        (media_key, keyboard.KeyAction.PRESS),
+        (keyboard.kbrd.KeyCode.from_char("\U0001F600"), keyboard.KeyAction.PRESS),
+        (media_key, keyboard.KeyAction.RELEASE),
+    ]
+
+
+def test_unencodable_events_are_skipped(tmp_path):
+    gamepad = pytest.importorskip("inputflow.gamepad", exc_type=ImportError)
+    source = MemoryEventSource()
+    handler = gamepad.GamepadHandler(source=source)
+    encode_event = handler.encode_event
+
+    def encode_some(event):
+        if event.code == BTN_SOUTH:
+            raise ValueError("Unable to encode")
+        return encode_event(event)
+
+    handler.encode_event = encode_some
+    path = str(tmp_path / "session.log")
+    with EventRecorder(path, handler) as recorder:
+        source.push_event(EV_KEY, BTN_SOUTH, 1)
+        source.push_event(EV_ABS, ABS_X, 10)
+        # the reader of the handler goes on
+        assert handler.read_source() == 2
+    assert (recorder.count, recorder.skipped) == (1, 1)
+
+
+def test_handler_without_encoding_is_rejected(tmp_path):
+    class AxisHandler(FixedInputListHandler):
+        INPUTS = {-1: "NULL", 0: "x"}
+
+    handler = AxisHandler(source=MemoryEventSource())
+    with EventRecorder(str(tmp_path / "axis.log")) as recorder:
+        with pytest.raises(ValueError):
+            recorder.attach(handler)
+        assert not handler.event_taps
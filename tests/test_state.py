@@ -0,0 +1,19 @@
+from inputflow.state import InputStateVector
+
+
+class Event:
+    def __init__(self, input, event_value):
+        self.input = input
+        self.event_value = event_value
+
+
+def test_shared_snapshot_is_one_view():
+    state = InputStateVector(4, "shared")
+    views = [state.snapshot() for _ in range(100)]
+    assert all(view is views[0] for view in views)
+    state.update(Event(2, 1.5))
+    state.update(Event(-1, 9.0))
+    assert list(views[0]) == [0.0, 0.0, 1.5, 0.0]
+    assert state.sequence == 2
+    # the view doesn't keep the shared memory block open
+    state.close()